@@ -1,8 +1,19 @@
 """
 AeroAR - QR Code Scanner Application
 Web application package
+
+app and run_server are imported from src.app on first use, so processes that only
+need src.utils (the job worker's pool) don't load the web app.
 """
 
-from .app import app, run_server
+import importlib
 
 __all__ = ['app', 'run_server']
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module('.app', __name__)
+        # Importing the submodule bound src.app to it; the package exports the Flask app
+        globals().update(app=module.app, run_server=module.run_server)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,5 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file, abort, render_template, session, redirect, url_for
+from flask import Flask, request, jsonify, send_from_directory, send_file, abort, render_template, session, redirect, url_for, Response, stream_with_context, g, make_response
+from flask.helpers import get_debug_flag
 from werkzeug.utils import secure_filename
 from datetime import timedelta
 import os
@@ -6,11 +7,32 @@ import re
 import hashlib
 import secrets
 import shutil
+import sys
+import signal
+import subprocess
+import functools
 import threading
+import time
 import glob
 import json
+from concurrent.futures import CancelledError, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 
-from src.utils.audio_processor import convert_to_wav, transcribe_audio
+# The audio/ML stack is only imported by the job worker, through these wrappers
+from src.utils.audio_tasks import process_clip, transcribe_window, stitch_transcriptions, transcription_entry, init_worker_process
+from src.utils.job_queue import JobQueue, WORKER_PROCESSES
+from src.utils.module_registry import ModuleRegistry
+from src.utils.transcript_cache import TranscriptCache
+from src.utils.audio_store import AudioStore, manifest_blob, AUDIO_RENDITIONS
+from src.utils.module_manifest import new_manifest, read_manifest, write_manifest, update_manifest, migrate_modules
+from src.utils.module_manifest import manifest_identity, manifest_cache_stats
+from src.utils.lru_cache import LRUCache
+from src.utils.offline_bundle import module_bundle
+from src.utils.metrics import metrics
+from src.utils.clip_journal import append_journal, read_journal, clear_journal
+from src.utils.chunked_upload import UploadError, UPLOAD_CHUNK_BYTES, start_upload, upload_total, upload_last_activity, init_clip, clip_state, append_chunk, finalize_clip, upload_tasks, close_upload
+from src.utils.qr_generator import build_module_qr_cache, cached_module_qr_zip, stream_module_qr_zip, build_module_qr_sheet, sheet_layout
+from src.server import run_production_server
 
 # Get the directory where this file is located
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -22,12 +44,65 @@ app = Flask(__name__,
 # Configuration
 app.secret_key = os.environ.get('SECRET_KEY', 'hardcoded_secret_key_for_demo_purposes_only') # IN PRODUCTION USE ENV VAR
 app.permanent_session_lifetime = timedelta(hours=6)
-app.config['MODULES_FOLDER'] = os.path.join(basedir, 'modules')
-app.config['DEMO_FOLDER'] = os.path.join(app.config['MODULES_FOLDER'], 'demo')
+# Uploaded modules and the server's state (AEROAR_MODULES_FOLDER moves them, e.g. for tests)
+app.config['MODULES_FOLDER'] = os.environ.get('AEROAR_MODULES_FOLDER') or os.path.join(basedir, 'modules')
+# Shipped with the code
+app.config['DEMO_FOLDER'] = os.path.join(basedir, 'modules', 'demo')
+app.config['JOBS_FOLDER'] = os.path.join(app.config['MODULES_FOLDER'], '.jobs')
+app.config['REGISTRY_PATH'] = os.path.join(app.config['MODULES_FOLDER'], '.registry.sqlite3')
+# Deduplicated audio shared by all modules
+app.config['AUDIO_STORE_FOLDER'] = os.path.join(app.config['MODULES_FOLDER'], '.store')
+# Metrics snapshots of the web and job worker processes, merged by /metrics
+app.config['METRICS_FOLDER'] = os.path.join(app.config['MODULES_FOLDER'], '.metrics')
 
 # Ensure modules directory exists
 os.makedirs(app.config['MODULES_FOLDER'], exist_ok=True)
 
+metrics.configure(app.config['METRICS_FOLDER'])
+metrics.describe('aeroar_http_request_duration_seconds', 'histogram', "Time to handle a request, by route.")
+metrics.describe('aeroar_http_response_bytes_total', 'counter', "Response body bytes sent, by route (responses streamed from a generator excluded).")
+metrics.describe('aeroar_job_queue_depth', 'gauge', "Module jobs waiting or running.")
+metrics.describe('aeroar_clip_stage_seconds', 'histogram', "Time spent per clip in each processing stage (convert, transcribe, write).")
+metrics.describe('aeroar_module_processing_seconds', 'histogram', "Time to process a whole module.")
+metrics.describe('aeroar_whisper_model_load_seconds', 'gauge', "Whisper model load time of the most recently started worker process.")
+metrics.describe('aeroar_qr_build_seconds', 'histogram', "Time to generate a module's QR archive or print sheet.")
+metrics.describe('aeroar_cache_hits_total', 'counter', "Cache hits, by cache.")
+metrics.describe('aeroar_cache_misses_total', 'counter', "Cache misses, by cache.")
+
+# Modules still keeping their state in separate text files get a manifest
+migrated = migrate_modules(app.config['MODULES_FOLDER'])
+if migrated:
+    print(f"Migrated {migrated} module(s) to manifest.json")
+
+# Index of module metadata, populated from the module folders on first start
+module_registry = ModuleRegistry(app.config['REGISTRY_PATH'])
+if module_registry.is_empty():
+    indexed = module_registry.rebuild(app.config['MODULES_FOLDER'])
+    print(f"Indexed {indexed} module(s) into the module registry")
+
+audio_store = AudioStore(app.config['AUDIO_STORE_FOLDER'])
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Request timing middleware: latency and bytes sent per route."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The route pattern, not the path, so module codes don't explode the label set
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe(
+            'aeroar_http_request_duration_seconds', time.perf_counter() - start,
+            route=route, method=request.method, status=response.status_code
+        )
+        # Files (send_file) count too; only generators have no length up front
+        if response.content_length:
+            metrics.inc('aeroar_http_response_bytes_total', response.content_length, route=route)
+        metrics.flush()
+    return response
+
 @app.route('/')
 @app.route('/index.html')
 def index():
@@ -44,29 +119,19 @@ def scan_page():
         if module_code:
             # Try to read module details
             module_folder = os.path.join(app.config['MODULES_FOLDER'], secure_filename(module_code))
-            name_file = os.path.join(module_folder, 'name.txt')
-            trainer_file = os.path.join(module_folder, 'trainer.txt')
-            
-            module_name = "Unknown Module"
-            trainer_name = "Unknown Trainer"
-            
-            if os.path.exists(name_file):
-                with open(name_file, 'r') as f:
-                    module_name = f.read().strip()
-            
-            if os.path.exists(trainer_file):
-                with open(trainer_file, 'r') as f:
-                    trainer_name = f.read().strip()
-            
+            manifest = read_manifest(module_folder) or {}
+
             module_info = {
-                'name': module_name,
-                'trainer': trainer_name,
+                'code': secure_filename(module_code),
+                'name': manifest.get('name') or "Unknown Module",
+                'trainer': manifest.get('trainer') or "Unknown Trainer",
                 'is_demo': False
             }
     
     # If no valid module info found (guest or just generic access), treat as demo
     if not module_info:
         module_info = {
+            'code': 'demo',
             'name': 'DEMO MODE',
             'trainer': 'Guest Access',
             'is_demo': True
@@ -74,6 +139,10 @@ def scan_page():
         
     return render_template('scan.html', module_info=module_info)
 
+# Rendered glossary pages of finished modules, keyed by module folder and manifest version
+GLOSSARY_CACHE_SIZE = int(os.environ.get('GLOSSARY_CACHE_SIZE', 128))
+glossary_cache = LRUCache(GLOSSARY_CACHE_SIZE)
+
 @app.route('/glossary')
 def glossary():
     role = session.get('role')
@@ -90,18 +159,32 @@ def glossary():
     if not module_folder or not os.path.exists(module_folder):
         module_folder = app.config['DEMO_FOLDER']
         is_demo = True
-    
-    # Read transcripts.json
+
+    # The page only changes when the manifest does, so a whole class viewing one module shares a render
+    cache_key = (module_folder, is_demo, manifest_identity(module_folder))
+    html = glossary_cache.get(cache_key)
+    if html is not None:
+        return html
+
+    # Read the module's transcripts
     items = []
-    json_path = os.path.join(module_folder, 'transcripts.json')
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, 'r') as f:
-                items = json.load(f)
-        except Exception as e:
-            print(f"Error reading glossary data: {e}")
-            
-    return render_template('glossary.html', items=items, is_demo=is_demo)
+    try:
+        items = (read_manifest(module_folder) or {}).get('items', [])
+    except Exception as e:
+        print(f"Error reading glossary data: {e}")
+
+    # A module still processing shows the clips finished so far
+    progress = None
+    if not is_demo:
+        module = module_registry.get_module(os.path.basename(module_folder))
+        if module and module['status'] in ('UPLOADING', 'PROCESSING'):
+            progress = {'done': module['done'] or 0, 'total': module['total']}
+
+    html = render_template('glossary.html', items=items, is_demo=is_demo, progress=progress)
+    # Pages of processing modules show live progress, so they aren't kept
+    if progress is None:
+        glossary_cache.put(cache_key, html)
+    return html
 
 def is_valid_module_code(code):
     """
@@ -114,72 +197,334 @@ def is_valid_module_code(code):
         return True
     return bool(re.fullmatch(r'[0-9A-F]{10}', code))
 
-def process_module_background(module_folder, tasks):
+def set_module_status(module_folder, status, items=None):
+    """
+    Writes a module's status (and its transcripts when items are given) to its
+    manifest and mirrors it into the module registry.
+    """
+    if items is not None:
+        update_manifest(module_folder, status=status, items=items)
+    else:
+        update_manifest(module_folder, status=status)
+
+    module_code = os.path.basename(module_folder)
+    module_registry.set_status(module_code, status, items)
+    publish_status_event(module_code, status)
+
+# Partial results of a processing module are rewritten at most this often
+PARTIAL_RESULTS_INTERVAL_SECONDS = 2.0
+
+def save_partial_results(module_folder, entries, completed, total):
+    """Publishes the finished clips (indexes in completed) to the manifest and the registry, in upload order."""
+    results = [entries[index] for index in sorted(completed) if entries[index]]
+    update_manifest(module_folder, items=results, done=len(completed), total=total)
+    module_registry.set_progress(os.path.basename(module_folder), len(completed), total, results)
+
+# Wakes up the status streams of this process when an event is published
+status_changed = threading.Condition()
+
+def publish_status_event(module_code, status, done=None, total=None):
+    """Records a status/progress event for the module's trainer and notifies listeners."""
+    module_registry.add_event(module_code, status, done, total)
+    with status_changed:
+        status_changed.notify_all()
+
+def process_module_background(module_folder, tasks, executor=None):
     """
     Background worker to process audio files.
+    Each finished clip is journaled and published as a partial result, so a rerun
+    after a crash resumes where the previous run stopped.
     tasks: list of dicts {'raw_path': str, 'final_wav_path': str, 'real_name': str, 'transcript_text': str}
+    executor: optional pool the clips are fanned out on (processed inline otherwise)
     """
+    started = time.perf_counter()
     try:
-        status_file = os.path.join(module_folder, 'status.txt')
-        transcript_json_file = os.path.join(module_folder, 'transcripts.json')
-        results = []
-        
-        for task in tasks:
-            raw_path = task['raw_path']
-            final_wav_path = task['final_wav_path']
-            real_name = task['real_name']
-            provided_text = task['transcript_text']
-            
-            # The filename relative to the module folder
-            filename = os.path.basename(final_wav_path)
-
-            # 1. Convert/Move to WAV
-            if raw_path != final_wav_path:
-                # Need conversion
-                with open(raw_path, 'rb') as f:
-                    wav_data = convert_to_wav(f)
-                
-                if wav_data:
-                    with open(final_wav_path, 'wb') as f:
-                        f.write(wav_data.read())
-                    # Clean up raw file
-                    try:
-                        os.remove(raw_path)
-                    except OSError:
-                        pass
-                else:
-                    # Conversion failed
-                    print(f"Failed to convert {raw_path}")
-                    continue
-            
-            # 2. Transcribe
-            final_transcript = ""
-            if provided_text:
-                final_transcript = provided_text
-            else:
-                final_transcript = transcribe_audio(final_wav_path)
-            
-            results.append({
-                "name": real_name,
-                "transcript": final_transcript,
-                "filename": filename 
-            })
-        
-        # Write transcripts.json
-        with open(transcript_json_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        # Update Status to COMPLETE
-        with open(status_file, 'w') as f:
-            f.write("COMPLETE")
-            
+        module_code = os.path.basename(module_folder)
+        total = len(tasks)
+        entries = [None] * total
+
+        # Clips finished by an earlier, interrupted run are not processed again, and clips
+        # started while the module was still uploading are picked up where they are
+        with early_clips_lock:
+            journal = read_journal(module_folder)
+            adopted = {
+                index: early_clips.pop((module_code, index))
+                for index in range(total) if (module_code, index) in early_clips
+            }
+        completed = set()
+        for index, record in journal.items():
+            if index < total and record['filename'] == os.path.basename(tasks[index]['final_wav_path']):
+                entries[index] = record['entry']
+                completed.add(index)
+        resumed = set(completed)
+        if resumed:
+            print(f"Resuming module {module_code}: {len(resumed)}/{total} clips already processed")
+        save_partial_results(module_folder, entries, completed, total)
+        publish_status_event(module_code, "PROCESSING", len(completed), total)
+        last_saved = time.monotonic()
+        saved_count = len(completed)
+
+        # Windows of long clips still being transcribed: clip index -> results in order
+        windows = {}
+
+        # future -> (clip index, window number or None for the clip itself)
+        pending = {
+            adopted.get(i) or submit_work(executor, process_clip, task): (i, None)
+            for i, task in enumerate(tasks) if i not in resumed
+        }
+
+        # Clips finish in any order; report progress as they do and keep upload order for the results
+        try:
+            while pending:
+                finished, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                # Clips cancelled by a shutdown of the pool never count as finished for wait()
+                finished |= {future for future in pending if future.cancelled()}
+                # In submission order, so inline runs record clips in upload order
+                for future in [future for future in pending if future in finished]:
+                    index, window = pending.pop(future)
+                    work_result = future.result()
+                    worker_stats[work_result['pid']] = work_result['stats']
+                    record_work_metrics(work_result)
+
+                    if window is None:
+                        entries[index] = work_result['entry']
+                        if work_result.get('windows'):
+                            # Long clip: its windows are transcribed in parallel on the same pool
+                            windows[index] = [None] * len(work_result['windows'])
+                            for number, window_task in enumerate(work_result['windows']):
+                                pending[submit_work(executor, transcribe_window, window_task)] = (index, number)
+                            continue
+                    else:
+                        windows[index][window] = work_result['transcription']
+                        if any(part is None for part in windows[index]):
+                            continue
+                        stitched = stitch_transcriptions(windows.pop(index), entries[index]['duration'])
+                        entries[index].update(transcription_entry(stitched))
+
+                    # Durable before it counts: a crash from here on won't redo this clip
+                    with metrics.timer('aeroar_clip_stage_seconds', stage='write'):
+                        append_journal(module_folder, index, os.path.basename(tasks[index]['final_wav_path']), entries[index])
+                        completed.add(index)
+                        if len(completed) == total or time.monotonic() - last_saved >= PARTIAL_RESULTS_INTERVAL_SECONDS:
+                            save_partial_results(module_folder, entries, completed, total)
+                            last_saved = time.monotonic()
+                            saved_count = len(completed)
+                    publish_status_event(module_code, "PROCESSING", len(completed), total)
+                    metrics.flush()
+        finally:
+            # Whatever finished stays visible even when this run fails
+            if len(completed) != saved_count:
+                save_partial_results(module_folder, entries, completed, total)
+
+        results = [entry for entry in entries if entry]
+
+        # Module audio lives in the shared store, the manifest maps names to blobs
+        update_manifest(module_folder, audio={
+            os.path.splitext(entry['filename'])[0]: entry['audio'] for entry in results if entry.get('audio')
+        })
+
+        # QR codes are fixed once processing completes, render them now rather than per download
+        try:
+            with metrics.timer('aeroar_qr_build_seconds', kind='zip'):
+                build_module_qr_cache(module_folder)
+        except Exception as e:
+            print(f"Error building QR cache for {module_code}: {e}")
+
+        # Write the transcripts and update Status to COMPLETE
+        set_module_status(module_folder, "COMPLETE", results)
+        clear_journal(module_folder)
+
+        # Default print sheet, labelled from the transcripts just written
+        try:
+            module = module_registry.get_module(module_code)
+            with metrics.timer('aeroar_qr_build_seconds', kind='sheet'):
+                build_module_qr_sheet(module_folder, title=module['name'] if module else None)
+        except Exception as e:
+            print(f"Error building QR sheet for {module_code}: {e}")
+
+        metrics.observe('aeroar_module_processing_seconds', time.perf_counter() - started)
+
+    except (BrokenProcessPool, CancelledError):
+        # Leave the module PROCESSING: the job queue retries it on a fresh pool, or
+        # resumes it on the next start when the server is shutting down
+        raise
     except Exception as e:
         print(f"Background processing error: {e}")
         try:
-            with open(status_file, 'w') as f:
-                f.write(f"ERROR: {str(e)}")
+            set_module_status(module_folder, f"ERROR: {str(e)}")
         except:
             pass
+    finally:
+        metrics.flush(force=True)
+
+def record_work_metrics(work_result):
+    """Records the stage timings and model load time a pool worker reported with its result."""
+    for stage, seconds in work_result.get('timings', {}).items():
+        metrics.observe('aeroar_clip_stage_seconds', seconds, stage=stage)
+    load_seconds = work_result['stats'].get('load_seconds')
+    if load_seconds:
+        metrics.set('aeroar_whisper_model_load_seconds', load_seconds)
+
+def submit_work(executor, fn, task):
+    """Runs fn(task) on the executor, or right away when there is none. Returns its future."""
+    if executor:
+        return executor.submit(fn, task)
+
+    future = Future()
+    try:
+        future.set_result(fn(task))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def module_job_tasks(module_folder, job_tasks):
+    """Resolves the file names stored in a queued job against the module folder."""
+    return [{
+        'raw_path': os.path.join(module_folder, task['raw_file']),
+        'final_wav_path': os.path.join(module_folder, task['wav_file']),
+        'real_name': task['real_name'],
+        'transcript_text': task['transcript_text'],
+        'store_root': app.config['AUDIO_STORE_FOLDER'],
+        'module_code': os.path.basename(module_folder),
+        'name': os.path.splitext(task['wav_file'])[0]
+    } for task in job_tasks]
+
+def run_module_job(payload, executor):
+    """Job queue handler: processes one uploaded module, or starts on one clip of a module still uploading."""
+    module_folder = os.path.join(app.config['MODULES_FOLDER'], payload['module_code'])
+    if not os.path.isdir(module_folder):
+        # Module was deleted while it was queued
+        return
+    if 'clip' in payload:
+        start_early_clip(module_folder, payload, executor)
+        return
+    process_module_background(module_folder, module_job_tasks(module_folder, payload['tasks']), executor)
+
+# Clips of modules still uploading, submitted as soon as each one arrived:
+# (module code, clip index) -> future, adopted by process_module_background once the module is complete
+early_clips = {}
+early_clips_lock = threading.Lock()
+
+def expire_early_clips():
+    """
+    Drops the early clips of modules that were deleted, or whose upload was abandoned
+    (see UPLOAD_EXPIRY_SECONDS): no job will ever adopt them.
+    """
+    with early_clips_lock:
+        for module_code in {code for code, _ in early_clips}:
+            module = module_registry.get_module(module_code)
+            if module is not None and (module['status'] != 'UPLOADING' or not upload_abandoned(module_code)):
+                continue
+            for key in [key for key in early_clips if key[0] == module_code]:
+                del early_clips[key]
+
+def start_early_clip(module_folder, payload, executor):
+    """Submits one finalized clip of a module still uploading, without waiting for it."""
+    module_code = payload['module_code']
+    index = payload['clip']
+    task = module_job_tasks(module_folder, [payload['task']])[0]
+    expire_early_clips()
+    with early_clips_lock:
+        if (module_code, index) in early_clips or index in read_journal(module_folder):
+            return
+        # Until done, the pool works on it while the rest of the module uploads
+        future = early_clips[(module_code, index)] = submit_work(executor, process_clip, task)
+    future.add_done_callback(functools.partial(record_early_clip, module_folder, index, payload['total'], task))
+
+def record_early_clip(module_folder, index, total, task, future):
+    """Journals an early clip and reports progress. Failures and long clips are left to the module's job."""
+    try:
+        work_result = future.result()
+        worker_stats[work_result['pid']] = work_result['stats']
+        record_work_metrics(work_result)
+        if work_result.get('windows'):
+            return
+
+        module_code = os.path.basename(module_folder)
+        with early_clips_lock:
+            # Callbacks run after waiters wake up: once the module's job adopted the clip it
+            # records it, and may already have completed the module and cleared the journal
+            if early_clips.get((module_code, index)) is not future:
+                return
+            early_clips.pop((module_code, index))
+            append_journal(module_folder, index, os.path.basename(task['final_wav_path']), work_result['entry'])
+            journal = read_journal(module_folder)
+
+            items = [journal[i]['entry'] for i in sorted(journal) if journal[i]['entry']]
+            module_registry.set_progress(module_code, len(journal), total, items)
+            # UPLOADING, or PROCESSING once the upload completed and the job waits in the queue
+            status = (module_registry.get_module(module_code) or {}).get('status', "UPLOADING")
+            publish_status_event(module_code, status, len(journal), total)
+    except Exception as e:
+        print(f"Early processing of clip {index} in {module_folder} failed: {e}")
+
+def fail_module_job(payload):
+    """Job queue give-up handler: marks a module whose job kept crashing the workers."""
+    module_folder = os.path.join(app.config['MODULES_FOLDER'], payload['module_code'])
+    if os.path.isdir(module_folder):
+        set_module_status(module_folder, "ERROR: Processing failed repeatedly")
+
+job_queue = JobQueue(
+    app.config['JOBS_FOLDER'],
+    run_module_job,
+    initializer=functools.partial(init_worker_process, WORKER_PROCESSES),
+    on_give_up=fail_module_job
+)
+
+# Latest engine stats reported by each worker process, keyed by pid
+worker_stats = {}
+
+# Chunked uploads nothing arrived for in this long are abandoned and deleted
+UPLOAD_EXPIRY_SECONDS = float(os.environ.get('UPLOAD_EXPIRY_SECONDS', 2 * 24 * 3600))
+
+def upload_abandoned(module_code):
+    """True when nothing arrived for the module's upload in UPLOAD_EXPIRY_SECONDS."""
+    module_folder = os.path.join(app.config['MODULES_FOLDER'], module_code)
+    last_activity = upload_last_activity(module_folder)
+    if last_activity is None and os.path.isdir(module_folder):
+        last_activity = os.path.getmtime(module_folder)
+    return last_activity is None or time.time() - last_activity > UPLOAD_EXPIRY_SECONDS
+
+def recover_interrupted_modules():
+    """
+    Marks modules left in PROCESSING without a queued job (e.g. uploads from before the
+    job queue existed) as failed. Modules with a job file are resumed by the queue itself.
+    Uploads left UPLOADING for longer than UPLOAD_EXPIRY_SECONDS are deleted.
+    """
+    queued = job_queue.pending_ids()
+
+    for module_code in module_registry.codes_with_status('PROCESSING'):
+        module_folder = os.path.join(app.config['MODULES_FOLDER'], module_code)
+        if module_code not in queued and os.path.isdir(module_folder):
+            print(f"Module {module_code} was interrupted without a queued job")
+            set_module_status(module_folder, "ERROR: Processing was interrupted")
+
+    for module_code in module_registry.codes_with_status('UPLOADING'):
+        if upload_abandoned(module_code):
+            print(f"Deleting module {module_code}, its upload was abandoned")
+            try:
+                remove_module(module_code)
+            except OSError as e:
+                print(f"Error deleting module {module_code}: {e}")
+
+def remove_module(module_code):
+    """Deletes a module's folder and registry entry, and frees audio no other module uses."""
+    module_path = os.path.join(app.config['MODULES_FOLDER'], module_code)
+    if os.path.isdir(module_path):
+        shutil.rmtree(module_path)
+    module_registry.remove_module(module_code)
+
+    # After the folder is gone: clips still processing release what they store from then on
+    audio_store.release_module(module_code)
+    blobs, freed = audio_store.gc()
+    if blobs:
+        print(f"Freed {blobs} audio blob(s), {freed} bytes")
+    expire_early_clips()
+
+def start_background_processing():
+    """Recovers interrupted work and starts the job dispatcher."""
+    recover_interrupted_modules()
+    job_queue.start()
 
 @app.route('/login/trainer', methods=['GET', 'POST'])
 def login_trainer():
@@ -228,17 +573,15 @@ def create_module():
             os.makedirs(module_folder, exist_ok=True)
 
             # Save trainer info & Initial Status
-            with open(os.path.join(module_folder, 'trainer.txt'), 'w') as f:
-                f.write(session.get('username', 'Unknown'))
-            
-            with open(os.path.join(module_folder, 'name.txt'), 'w') as f:
-                f.write(module_name)
-            
-            with open(os.path.join(module_folder, 'status.txt'), 'w') as f:
-                f.write("PROCESSING")
+            manifest = new_manifest(session.get('username', 'Unknown'), module_name, "PROCESSING")
+            write_manifest(module_folder, manifest)
 
-            # Prepare tasks for background thread
-            bg_tasks = []
+            module_registry.add_module(
+                module_code, manifest['trainer'], module_name, "PROCESSING", created_at=manifest['created_at']
+            )
+
+            # Prepare tasks for the job queue (file names relative to the module folder)
+            job_tasks = []
 
             for i, name in enumerate(names):
                 if not name.strip():
@@ -249,30 +592,27 @@ def create_module():
                     continue
                 
                 safe_name = secure_filename(name.strip())
-                base_path = os.path.join(module_folder, safe_name)
-                final_wav_path = f"{base_path}.wav"
+                wav_file = f"{safe_name}.wav"
                 
                 original_filename = secure_filename(file_obj.filename)
                 _, ext = os.path.splitext(original_filename)
                 
                 # Save the RAW file first (so thread can read it)
                 # We use a temp name to avoid conflict if user uploaded 'foo.wav' but we want 'safe.wav'
-                raw_path = os.path.join(module_folder, f"temp_{i}{ext}")
-                file_obj.save(raw_path)
+                raw_file = f"temp_{i}{ext}"
+                file_obj.save(os.path.join(module_folder, raw_file))
 
                 transcript_val = transcripts[i].strip() if i < len(transcripts) else ""
                 
-                bg_tasks.append({
-                    'raw_path': raw_path,
-                    'final_wav_path': final_wav_path,
+                job_tasks.append({
+                    'raw_file': raw_file,
+                    'wav_file': wav_file,
                     'real_name': name.strip(),
                     'transcript_text': transcript_val
                 })
 
-            # Start background thread
-            thread = threading.Thread(target=process_module_background, args=(module_folder, bg_tasks))
-            thread.daemon = True
-            thread.start()
+            # Queue for background processing (persisted, survives restarts)
+            job_queue.submit(module_code, {'module_code': module_code, 'tasks': job_tasks})
 
             # Pass success flag to index (or list modules page)
             return redirect(url_for('list_modules'))
@@ -281,7 +621,139 @@ def create_module():
             print(f"Error creating module: {e}")
             return f"Error: {e}", 500
 
-    return render_template('create_module.html')
+    return render_template('create_module.html', upload_chunk_bytes=UPLOAD_CHUNK_BYTES)
+
+# Chunked uploads: the module is created first, then each clip is announced, sent in chunks
+# (each acknowledged once on disk, so a dropped connection resumes from the last acknowledged
+# offset) and finalized; finalized clips start processing while the others are still uploading.
+
+@app.route('/trainer/api/uploads', methods=['POST'])
+def create_upload():
+    """Creates a module for a chunked upload. JSON {module_name, clips: number of clips}."""
+    if session.get('role') != 'trainer':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+    module_name = str(data.get('module_name') or '').strip()
+    total = data.get('clips')
+    if not module_name:
+        return jsonify({'error': 'Module name is required'}), 400
+    if not isinstance(total, int) or total <= 0:
+        return jsonify({'error': 'clips must be a positive number'}), 400
+
+    module_code = secrets.token_hex(5).upper()
+    module_folder = os.path.join(app.config['MODULES_FOLDER'], module_code)
+    os.makedirs(module_folder, exist_ok=True)
+    start_upload(module_folder, total)
+
+    # UPLOADING until every clip arrived: the trainer can still delete it, and it expires if abandoned
+    manifest = new_manifest(session.get('username', 'Unknown'), module_name, "UPLOADING")
+    manifest.update(done=0, total=total)
+    write_manifest(module_folder, manifest)
+    module_registry.add_module(
+        module_code, manifest['trainer'], module_name, "UPLOADING", created_at=manifest['created_at']
+    )
+    module_registry.set_progress(module_code, 0, total)
+
+    return jsonify({'module_code': module_code, 'chunk_bytes': UPLOAD_CHUNK_BYTES}), 201
+
+def upload_module_folder(module_code):
+    """The folder of one of the trainer's modules with an open upload; aborts with a JSON error otherwise."""
+    if session.get('role') != 'trainer':
+        abort(make_response(jsonify({'error': 'Unauthorized'}), 401))
+    if not is_valid_module_code(module_code) or module_code.lower() == 'demo':
+        abort(make_response(jsonify({'error': 'Invalid module code format'}), 400))
+
+    safe_code = secure_filename(module_code)
+    module_folder = os.path.join(app.config['MODULES_FOLDER'], safe_code)
+    module = module_registry.get_module(safe_code)
+    if module is None or not os.path.isdir(module_folder):
+        abort(make_response(jsonify({'error': 'Module not found'}), 404))
+    if module['trainer'] != session.get('username'):
+        abort(make_response(jsonify({'error': 'Permission denied'}), 403))
+    if upload_total(module_folder) is None:
+        abort(make_response(jsonify({'error': 'Upload already completed'}), 409))
+    return module_folder
+
+def upload_error_response(error):
+    body = {'error': str(error)}
+    if error.offset is not None:
+        body['offset'] = error.offset
+    return jsonify(body), error.status
+
+@app.route('/trainer/api/uploads/<module_code>/clips/<int:index>', methods=['GET', 'POST'])
+def upload_clip(module_code, index):
+    """
+    POST JSON {name, filename, size, sha256, transcript} announces a clip (again, to resume it);
+    GET returns its state. Both answer {index, size, offset, finalized}.
+    """
+    module_folder = upload_module_folder(module_code)
+    if request.method == 'GET':
+        state = clip_state(module_folder, index)
+        if state is None:
+            return jsonify({'error': 'Clip was not announced'}), 404
+        return jsonify(state)
+
+    data = request.get_json(silent=True) or {}
+    try:
+        state = init_clip(
+            module_folder, index, data.get('name'), data.get('filename'),
+            data.get('size'), data.get('sha256'), data.get('transcript')
+        )
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify(state)
+
+@app.route('/trainer/api/uploads/<module_code>/clips/<int:index>/chunks', methods=['PUT'])
+def upload_chunk(module_code, index):
+    """
+    Raw chunk bytes at ?offset=N, optionally checked against an X-Chunk-SHA256 header.
+    Answers {offset} (acknowledged), or 409 with the offset to resume from.
+    """
+    module_folder = upload_module_folder(module_code)
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset is required'}), 400
+    try:
+        # Read from the socket as it arrives, never spooled in full
+        acknowledged = append_chunk(
+            module_folder, index, offset, request.stream, request.content_length,
+            request.headers.get('X-Chunk-SHA256')
+        )
+    except UploadError as e:
+        return upload_error_response(e)
+    return jsonify({'offset': acknowledged})
+
+@app.route('/trainer/api/uploads/<module_code>/clips/<int:index>/finalize', methods=['POST'])
+def finalize_upload_clip(module_code, index):
+    """Verifies a fully sent clip against its checksum and queues it for processing right away."""
+    module_folder = upload_module_folder(module_code)
+    try:
+        task = finalize_clip(module_folder, index)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    safe_code = os.path.basename(module_folder)
+    job_queue.submit(safe_code, {
+        'module_code': safe_code, 'clip': index, 'total': upload_total(module_folder), 'task': task
+    })
+    return jsonify(clip_state(module_folder, index))
+
+@app.route('/trainer/api/uploads/<module_code>/complete', methods=['POST'])
+def complete_upload(module_code):
+    """Queues the module once every clip is finalized; clips already processed are not redone."""
+    module_folder = upload_module_folder(module_code)
+    try:
+        job_tasks = upload_tasks(module_folder)
+    except UploadError as e:
+        return upload_error_response(e)
+
+    safe_code = os.path.basename(module_folder)
+    # Before the job is queued, so a fast job's COMPLETE isn't overwritten
+    set_module_status(module_folder, "PROCESSING")
+    job_queue.submit(safe_code, {'module_code': safe_code, 'tasks': job_tasks})
+    close_upload(module_folder)
+    return jsonify({'module_code': safe_code, 'redirect': url_for('list_modules')})
 
 @app.route('/login/trainee', methods=['GET', 'POST'])
 def login_trainee():
@@ -304,13 +776,9 @@ def login_trainee():
             session['role'] = 'trainee'
             session['module_code'] = module_code
             
-            # Read module name
-            name_file = os.path.join(module_path, 'name.txt')
-            module_name = module_code # Default to code if no name
-            if os.path.exists(name_file):
-                with open(name_file, 'r') as f:
-                    module_name = f.read().strip()
-            session['module_name'] = module_name
+            # Read module name (default to code if no name)
+            manifest = read_manifest(module_path) or {}
+            session['module_name'] = manifest.get('name') or module_code
             
             return redirect(url_for('index'))
             
@@ -323,12 +791,25 @@ def logout():
     session.clear()
     return redirect(url_for('index'))
 
+# One year: audio of a completed module is immutable
+AUDIO_CACHE_MAX_AGE = 365 * 24 * 3600
+
+def is_within(path, folder):
+    """Whether path is folder or inside it (compares whole path components, not string prefixes)."""
+    path, folder = os.path.abspath(path), os.path.abspath(folder)
+    try:
+        return os.path.commonpath([path, folder]) == folder
+    except ValueError:
+        # Different drives on Windows
+        return False
+
 @app.route('/audios', methods=["GET"])
 def audios():
     """
     Audio endpoint that receives a 'name' parameter via GET request
-    and returns the audio file as an octet stream.
+    and returns the audio file as an octet stream (a compact rendition when available).
     If a trainee is logged in, it looks in a subfolder named after the module code.
+    The scanner also sends 'module', which only keys the offline cache per module.
     """
     name = request.args.get('name', '')
 
@@ -358,12 +839,18 @@ def audios():
         # User is using demo version of the scanner, serve from demo folder
         base_folder = app.config['DEMO_FOLDER']
 
-    # Construct full file path
-    audio_path = os.path.join(base_folder, audio_filename)
+    # Construct full file path: through the module manifest into the shared store,
+    # or the module's own file for modules created before the store
+    digest = manifest_blob(base_folder, safe_name) if os.path.isdir(base_folder) else None
+    if digest:
+        audio_path = audio_store.audio_path(digest)
+    else:
+        audio_path = os.path.join(base_folder, audio_filename)
 
-    # Ensure the resolved path is within the config directory (extra security)
-    # We verify it's inside the MAIN modules folder to allow subfolders
-    if not os.path.abspath(audio_path).startswith(os.path.abspath(app.config['MODULES_FOLDER'])):
+    # Ensure the resolved path is within the config directories (extra security): the
+    # modules folder (subfolders allowed), the audio store and the demo shipped with the code
+    roots = (app.config['MODULES_FOLDER'], app.config['AUDIO_STORE_FOLDER'], app.config['DEMO_FOLDER'])
+    if not any(is_within(audio_path, root) for root in roots):
         print(f"Path traversal attempt detected: {name}")
         abort(403, description="Invalid audio name")
 
@@ -372,16 +859,101 @@ def audios():
         print(f"Audio file not found: {audio_path}")
         abort(404, description=f"Audio file '{safe_name}' not found")
 
+    # Pick the rendition to serve: an explicit ?format= wins (the scanner asks for one
+    # its browser can play), otherwise negotiate on Accept. The WAV master is the fallback.
+    base_path, _ = os.path.splitext(audio_path)
+    available = {'wav': (audio_path, 'audio/wav')}
+    for extension, (mimetype, _) in AUDIO_RENDITIONS.items():
+        rendition_path = f"{base_path}.{extension}"
+        if os.path.exists(rendition_path):
+            available[extension] = (rendition_path, mimetype)
+
+    requested = request.args.get('format', '')
+    if requested in available:
+        extension = requested
+    else:
+        # Compact renditions first, so */* gets the smallest file
+        preference = [ext for ext in AUDIO_RENDITIONS if ext in available] + ['wav']
+        if request.accept_mimetypes:
+            best = request.accept_mimetypes.best_match([available[ext][1] for ext in preference])
+            extension = next((ext for ext in preference if available[ext][1] == best), 'wav')
+        else:
+            # No Accept header means anything is acceptable
+            extension = preference[0]
+    audio_path, mimetype = available[extension]
+    audio_filename = f"{safe_name}.{extension}"
+
     print(f"Serving audio file: {audio_path}")
 
-    # Send the file as an octet stream
-    return send_file(
+    # Send the file as an octet stream.
+    # conditional=True answers Range requests with 206 (so players can seek and start
+    # early) and If-None-Match/If-Modified-Since with 304 using the file's strong ETag.
+    response = send_file(
         audio_path,
-        mimetype='audio/wav',
+        mimetype=mimetype,
         as_attachment=True,
-        download_name=audio_filename
+        download_name=audio_filename,
+        conditional=True,
+        etag=True
     )
 
+    # Module audio never changes once processing completed, so clients can keep it.
+    # The URL is the same for every module (the module comes from the session),
+    # so the response is private and varies on the session cookie.
+    module = module_registry.get_module(os.path.basename(base_folder))
+    if module and module['status'] == 'COMPLETE':
+        # send_file marks every response no-cache, which would force a revalidation per play
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = AUDIO_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.vary.add('Cookie')
+    response.vary.add('Accept')
+    return response
+
+# Offline bundles of finished modules, keyed by module folder and manifest version
+offline_bundle_cache = LRUCache(GLOSSARY_CACHE_SIZE)
+
+@app.route('/offline/bundle')
+def offline_bundle():
+    """
+    Offline bundle of the session's module (the demo for guests): the audio URLs, glossary
+    data and pages the scanner's service worker precaches, versioned by content hash.
+    """
+    role = session.get('role')
+    if role == 'trainer':
+        abort(403, description="Offline bundles are for the scanner")
+
+    module_code = 'demo'
+    module_folder = app.config['DEMO_FOLDER']
+    if role == 'trainee':
+        module_code = secure_filename(session.get('module_code', ''))
+        module_folder = os.path.join(app.config['MODULES_FOLDER'], module_code)
+        if not module_code or not os.path.isdir(module_folder):
+            abort(404, description="Module not found")
+
+        # Audio of a module still processing changes, so it isn't taken offline yet
+        module = module_registry.get_module(module_code)
+        if not module or module['status'] != 'COMPLETE':
+            return jsonify({'error': 'Module is not ready for offline use'}), 409
+
+    cache_key = (module_folder, manifest_identity(module_folder))
+    bundle = offline_bundle_cache.get(cache_key)
+    if bundle is None:
+        bundle = module_bundle(module_folder, module_code, audio_store)
+        offline_bundle_cache.put(cache_key, bundle)
+
+    # Revalidated on every check, so an unchanged module costs a 304
+    response = jsonify(bundle)
+    response.set_etag(bundle['version'])
+    response.cache_control.no_cache = True
+    response.cache_control.private = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
 @app.route('/trainer/modules')
 def list_modules():
     if session.get('role') != 'trainer':
@@ -389,94 +961,106 @@ def list_modules():
 
     current_user = session.get('username')
     modules = []
-    
-    # Scan modules folder
-    modules_folder = app.config['MODULES_FOLDER']
-    if os.path.exists(modules_folder):
-        for folder_name in os.listdir(modules_folder):
-            folder_path = os.path.join(modules_folder, folder_name)
-            
-            if os.path.isdir(folder_path):
-                trainer_file = os.path.join(folder_path, 'trainer.txt')
-                status_file = os.path.join(folder_path, 'status.txt')
-                
-                # Check if this module belongs to the current trainer
-                if os.path.exists(trainer_file):
-                    with open(trainer_file, 'r') as f:
-                        owner = f.read().strip()
-                    
-                    if owner == current_user:
-                        # Get Status
-                        status = "UNKNOWN"
-                        if os.path.exists(status_file):
-                            with open(status_file, 'r') as f:
-                                status = f.read().strip()
-                        
-                        # Read Module Name
-                        name_file = os.path.join(folder_path, 'name.txt')
-                        module_name = "Untitled Module"
-                        if os.path.exists(name_file):
-                            with open(name_file, 'r') as f:
-                                module_name = f.read().strip()
-
-                        module_data = {
-                            'code': folder_name,
-                            'name': module_name,
-                            'status': status,
-                            'content_items': []
-                        }
-                        
-                        # If complete, list files from transcripts.json
-                        if status == 'COMPLETE':
-                            json_path = os.path.join(folder_path, 'transcripts.json')
-                            if os.path.exists(json_path):
-                                try:
-                                    with open(json_path, 'r') as f:
-                                        data = json.load(f)
-                                        
-                                        for item in data:
-                                            module_data['content_items'].append({
-                                                'file': item.get('filename'),
-                                                'name': item.get('name'),
-                                                'transcript': item.get('transcript')
-                                            })
-                                except Exception as e:
-                                    print(f"Error reading transcripts.json for {folder_name}: {e}")
-                                    # Fallback or show error? Currently just empty list if fails.
-                        
-                        modules.append(module_data)
-
-    return render_template('list_modules.html', modules=modules)
+
+    # Taken before the lookup so the status stream can't miss a change in between
+    last_event_id = module_registry.last_event_seq()
+
+    # Indexed lookup of the trainer's modules
+    for module in module_registry.modules_for_trainer(current_user):
+        module_data = {
+            'code': module['code'],
+            'name': module['name'],
+            'status': module['status'],
+            'done': module['done'],
+            'total': module['total'],
+            'content_items': []
+        }
+
+        # Complete modules, and the clips finished so far of uploading and processing ones
+        if module['status'] in ('COMPLETE', 'UPLOADING', 'PROCESSING'):
+            for item in module['items']:
+                module_data['content_items'].append({
+                    'file': item.get('filename'),
+                    'name': item.get('name'),
+                    'transcript': item.get('transcript')
+                })
+
+        modules.append(module_data)
+
+    return render_template('list_modules.html', modules=modules, last_event_id=last_event_id)
 
 @app.route('/trainer/api/modules_status')
 def get_modules_status():
     if session.get('role') != 'trainer':
         return jsonify({'error': 'Unauthorized'}), 401
-        
+
+    return jsonify(module_registry.statuses_for_trainer(session.get('username')))
+
+# Seconds between checks for events published by other processes
+STATUS_STREAM_POLL_SECONDS = 1.0
+# Comment lines keep idle connections open through proxies
+STATUS_STREAM_HEARTBEAT_SECONDS = 15.0
+# Each open stream holds a server thread: streams end after this long and the browser
+# reconnects from Last-Event-ID, and past this many per process clients are told to retry later
+STATUS_STREAM_MAX_SECONDS = float(os.environ.get('STATUS_STREAM_MAX_SECONDS', 120))
+STATUS_STREAM_MAX_OPEN = int(os.environ.get('STATUS_STREAM_MAX_OPEN', max(1, int(os.environ.get('WEB_THREADS', 8)) // 4)))
+# Reconnect delay (ms) of a client turned away because every stream slot is taken
+STATUS_STREAM_BUSY_RETRY_MS = 15000
+status_stream_slots = threading.BoundedSemaphore(STATUS_STREAM_MAX_OPEN)
+
+@app.route('/trainer/api/modules_events')
+def stream_modules_events():
+    """
+    Server-Sent Events stream of the trainer's module status changes and
+    per-clip progress. Clients resume from Last-Event-ID (or ?since=) after reconnecting,
+    which they do whenever a stream ends (see STATUS_STREAM_MAX_SECONDS).
+    """
+    if session.get('role') != 'trainer':
+        return jsonify({'error': 'Unauthorized'}), 401
+
     current_user = session.get('username')
-    statuses = {}
-    
-    modules_folder = app.config['MODULES_FOLDER']
-    if os.path.exists(modules_folder):
-        for folder_name in os.listdir(modules_folder):
-            folder_path = os.path.join(modules_folder, folder_name)
-            
-            if os.path.isdir(folder_path):
-                trainer_file = os.path.join(folder_path, 'trainer.txt')
-                status_file = os.path.join(folder_path, 'status.txt')
-                
-                if os.path.exists(trainer_file):
-                    with open(trainer_file, 'r') as f:
-                        owner = f.read().strip()
-                    
-                    if owner == current_user:
-                        status = "UNKNOWN"
-                        if os.path.exists(status_file):
-                            with open(status_file, 'r') as f:
-                                status = f.read().strip()
-                        statuses[folder_name] = status
-                        
-    return jsonify(statuses)
+    last_seen = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_seen = int(last_seen)
+    except (TypeError, ValueError):
+        last_seen = module_registry.last_event_seq()
+
+    def generate():
+        # Taken here rather than before the response, so the slot is always released by the generator
+        if not status_stream_slots.acquire(blocking=False):
+            yield f"retry: {STATUS_STREAM_BUSY_RETRY_MS}\n\n"
+            return
+
+        try:
+            seen = last_seen
+            newest = last_seen
+            started = last_write = time.monotonic()
+            yield "retry: 3000\n\n"
+
+            while time.monotonic() - started < STATUS_STREAM_MAX_SECONDS:
+                # Cheap global check first, only query the trainer's events when something changed
+                latest = module_registry.last_event_seq()
+                if latest > newest:
+                    newest = latest
+                    for event in module_registry.events_for_trainer(current_user, seen):
+                        seen = event.pop('seq')
+                        yield f"id: {seen}\ndata: {json.dumps(event)}\n\n"
+                        last_write = time.monotonic()
+
+                if time.monotonic() - last_write >= STATUS_STREAM_HEARTBEAT_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_write = time.monotonic()
+
+                with status_changed:
+                    status_changed.wait(STATUS_STREAM_POLL_SECONDS)
+        finally:
+            status_stream_slots.release()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/trainer/delete_module/<module_code>', methods=['POST'])
 def delete_module(module_code):
@@ -491,30 +1075,21 @@ def delete_module(module_code):
     safe_code = secure_filename(module_code)
     module_path = os.path.join(app.config['MODULES_FOLDER'], safe_code)
     
-    if not os.path.exists(module_path):
+    module = module_registry.get_module(safe_code)
+    if not os.path.exists(module_path) or module is None:
         return jsonify({'error': 'Module not found'}), 404
         
     # Verify ownership
-    trainer_file = os.path.join(module_path, 'trainer.txt')
-    current_user = session.get('username')
-    
-    if not os.path.exists(trainer_file):
-        return jsonify({'error': 'Invalid module'}), 400
-        
-    with open(trainer_file, 'r') as f:
-        owner = f.read().strip()
-        
-    if owner != current_user:
+    if module['trainer'] != session.get('username'):
         return jsonify({'error': 'Permission denied'}), 403
         
     try:
-        shutil.rmtree(module_path)
+        remove_module(safe_code)
         return jsonify({'success': True})
     except Exception as e:
         print(f"Error deleting module {safe_code}: {e}")
         return jsonify({'error': str(e)}), 500
 
-from src.utils.qr_generator import generate_module_qr_zip
 
 @app.route('/trainer/download_qr/<module_code>')
 def download_qr(module_code):
@@ -528,45 +1103,232 @@ def download_qr(module_code):
     safe_code = secure_filename(module_code)
     module_path = os.path.join(app.config['MODULES_FOLDER'], safe_code)
     
-    if not os.path.exists(module_path):
+    module = module_registry.get_module(safe_code)
+    if not os.path.exists(module_path) or module is None:
         abort(404, description="Module not found")
         
     # Verify ownership
-    trainer_file = os.path.join(module_path, 'trainer.txt')
-    current_user = session.get('username')
-    
-    if not os.path.exists(trainer_file):
-        abort(400, description="Invalid module integrity")
-        
-    with open(trainer_file, 'r') as f:
-        owner = f.read().strip()
-        
-    if owner != current_user:
+    if module['trainer'] != session.get('username'):
         abort(403, description="Permission denied")
         
-    # Get Module Name for filename
-    name_file = os.path.join(module_path, 'name.txt')
-    module_name = "module"
-    if os.path.exists(name_file):
-        with open(name_file, 'r') as f:
-            module_name = f.read().strip()
-            
-    safe_download_name = f"{secure_filename(module_name)}-qr.zip"
+    # Module Name for filename
+    safe_download_name = f"{secure_filename(module['name'] or 'module')}-qr.zip"
     
     try:
-        zip_buffer = generate_module_qr_zip(module_path)
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=safe_download_name
-        )
+        # Served from the on-disk cache when it matches the module contents
+        zip_path = cached_module_qr_zip(module_path)
+        if zip_path:
+            return send_file(
+                zip_path,
+                mimetype='application/zip',
+                as_attachment=True,
+                download_name=safe_download_name,
+                conditional=True
+            )
+
+        # Otherwise stream the archive as it is generated (this also fills the cache)
+        response = Response(stream_with_context(timed_qr_stream(module_path)), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{safe_download_name}"'
+        return response
     except Exception as e:
         print(f"Error generating QR zip: {e}")
         return f"Error generation QR codes: {str(e)}", 500
 
+def timed_qr_stream(module_path):
+    """Streams the module's QR archive, recording how long generating it took."""
+    with metrics.timer('aeroar_qr_build_seconds', kind='zip'):
+        yield from stream_module_qr_zip(module_path)
+
+@app.route('/trainer/download_qr_sheet/<module_code>')
+def download_qr_sheet(module_code):
+    """Printable pages of the module's QR codes with their names (?format=pdf|png, page, cols, rows, dpi)."""
+    if session.get('role') != 'trainer':
+        return redirect(url_for('login_trainer'))
+
+    if not is_valid_module_code(module_code):
+        abort(400, description="Invalid module code")
+
+    safe_code = secure_filename(module_code)
+    module_path = os.path.join(app.config['MODULES_FOLDER'], safe_code)
+
+    module = module_registry.get_module(safe_code)
+    if not os.path.exists(module_path) or module is None:
+        abort(404, description="Module not found")
+
+    if module['trainer'] != session.get('username'):
+        abort(403, description="Permission denied")
+
+    if module['status'] != 'COMPLETE':
+        abort(409, description="Module is not ready yet")
+
+    fmt = request.args.get('format', 'pdf').lower()
+    if fmt not in ('pdf', 'png'):
+        abort(400, description="Format must be pdf or png")
+    try:
+        layout = sheet_layout(
+            request.args.get('page'),
+            request.args.get('cols'),
+            request.args.get('rows'),
+            request.args.get('dpi')
+        )
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    safe_download_name = f"{secure_filename(module['name'] or 'module')}-qr-sheets.{'pdf' if fmt == 'pdf' else 'zip'}"
+
+    try:
+        with metrics.timer('aeroar_qr_build_seconds', kind='sheet'):
+            sheet_path = build_module_qr_sheet(module_path, fmt, layout, title=module['name'])
+    except Exception as e:
+        print(f"Error generating QR sheet: {e}")
+        return f"Error generating QR sheet: {str(e)}", 500
+
+    return send_file(
+        sheet_path,
+        mimetype='application/pdf' if fmt == 'pdf' else 'application/zip',
+        as_attachment=True,
+        download_name=safe_download_name,
+        conditional=True
+    )
+
+@app.route('/trainer/api/transcription_stats')
+def transcription_stats():
+    if session.get('role') != 'trainer':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    # Pool workers report to the job worker process: read what it published with its metrics
+    workers = {}
+    for stats_by_worker in metrics.published('workers').values():
+        workers.update(stats_by_worker)
+    hits = metrics.total('aeroar_cache_hits_total', cache='transcript')
+    misses = metrics.total('aeroar_cache_misses_total', cache='transcript')
+    transcript_cache = {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else None,
+    }
+    try:
+        shared = TranscriptCache().stats()
+        transcript_cache.update(entries=shared['entries'], bytes=shared['bytes'], max_bytes=shared['max_bytes'])
+    except Exception as e:
+        print(f"Error reading transcript cache: {e}")
+
+    return jsonify({
+        'queue_depth': job_queue.depth,
+        'worker_processes': WORKER_PROCESSES,
+        'workers': workers,
+        'transcript_cache': transcript_cache,
+        # Per web process
+        'manifest_cache': manifest_cache_stats(),
+        'glossary_cache': glossary_cache.stats(),
+        'offline_bundle_cache': offline_bundle_cache.stats()
+    })
+
+def collect_app_metrics():
+    """Refreshes the metrics whose values live elsewhere: queue depth and cache hit counts."""
+    metrics.set('aeroar_job_queue_depth', job_queue.depth)
+    caches = {
+        'manifest': manifest_cache_stats(),
+        'glossary': glossary_cache.stats(),
+        'offline_bundle': offline_bundle_cache.stats(),
+    }
+    # Reported by this process's pool workers (the job worker's), zero in web processes
+    transcript_caches = [stats['cache'] for stats in worker_stats.values() if stats.get('cache')]
+    caches['transcript'] = {
+        'hits': sum(cache['hits'] for cache in transcript_caches),
+        'misses': sum(cache['misses'] for cache in transcript_caches),
+    }
+    for name, stats in caches.items():
+        metrics.set_total('aeroar_cache_hits_total', stats['hits'], cache=name)
+        metrics.set_total('aeroar_cache_misses_total', stats['misses'], cache=name)
+    # For transcription_stats in the web processes
+    metrics.publish('workers', dict(worker_stats))
+
+metrics.add_collector(collect_app_metrics)
+
+# Set to require "Authorization: Bearer <token>" from the scraper
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Metrics of every web and job worker process, in the Prometheus text format."""
+    if METRICS_TOKEN and not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"):
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def run_worker():
+    """Run only the background job worker (no HTTP) until terminated"""
+    print("Starting AeroAR job worker...")
+    start_background_processing()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    try:
+        while not stopping.wait(1):
+            # Keeps the snapshot fresh while idle, so it isn't pruned as stale
+            metrics.flush()
+    except KeyboardInterrupt:
+        pass
+    job_queue.stop()
+
+def start_worker_process():
+    """Starts the job worker as its own process, outside the forked web workers"""
+    project_root = os.path.dirname(basedir)
+    return subprocess.Popen([sys.executable, '-m', 'src.worker'], cwd=project_root)
+
+# How often the job worker process is checked on
+WORKER_CHECK_SECONDS = 5.0
+
+def supervise_worker_process(stopping):
+    """Runs the job worker process until stopping is set, restarting it whenever it exits"""
+    process = start_worker_process()
+    while not stopping.wait(WORKER_CHECK_SECONDS):
+        if process.poll() is not None:
+            print(f"Job worker exited with code {process.returncode}, restarting it")
+            process = start_worker_process()
+    process.terminate()
+    process.wait()
+
+def is_reloader_parent():
+    """
+    Whether this is the process the Werkzeug reloader (FLASK_DEBUG) only watches files from:
+    the app is served, and jobs must be dispatched, by its child alone.
+    """
+    return get_debug_flag() and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
 def run_server(host='0.0.0.0', port=80):
-    """Run the Flask server"""
+    """
+    Run the Flask server.
+    AEROAR_SERVER selects 'development' (Werkzeug) or 'production' (gunicorn).
+    AEROAR_ROLE selects what this process runs: 'all' (web + jobs), 'web' or 'worker'.
+    """
+    role = os.environ.get('AEROAR_ROLE', 'all')
+    server = os.environ.get('AEROAR_SERVER', 'development')
+
+    if role == 'worker':
+        run_worker()
+        return
+
     print(f"Starting AeroAR Flask application on port {port}...")
+
+    if server == 'production':
+        # Jobs run in a dedicated process so forked web workers never dispatch them twice
+        stopping = threading.Event()
+        supervisor = None
+        if role == 'all':
+            supervisor = threading.Thread(target=supervise_worker_process, args=(stopping,), daemon=True)
+            supervisor.start()
+        try:
+            run_production_server(app, host, port)
+        finally:
+            stopping.set()
+            if supervisor:
+                supervisor.join()
+        return
+
+    if role == 'all' and not is_reloader_parent():
+        # Resume queued modules and start the processing workers
+        start_background_processing()
+
     # debug flag is set via env vars
-    app.run(host=host, port=port)
+    app.run(host=host, port=port, threaded=True)
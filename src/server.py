@@ -0,0 +1,45 @@
+"""
+AeroAR - Production server
+Serves the Flask app with gunicorn (multi-process, threaded workers).
+"""
+
+import os
+
+def production_options(host, port):
+    """Gunicorn settings, overridable with environment variables."""
+    cores = os.cpu_count() or 1
+    return {
+        'bind': f"{host}:{port}",
+        # Web workers only serve requests, transcription runs in the job worker
+        'workers': int(os.environ.get('WEB_WORKERS', min(2 * cores + 1, 8))),
+        # Threads let a slow download or an open status stream not block a whole worker
+        'worker_class': 'gthread',
+        'threads': int(os.environ.get('WEB_THREADS', 8)),
+        'keepalive': int(os.environ.get('WEB_KEEPALIVE', 5)),
+        'timeout': int(os.environ.get('WEB_TIMEOUT', 120)),
+        'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+        'accesslog': '-',
+        'errorlog': '-',
+    }
+
+def run_production_server(app, host, port):
+    """Runs the app under gunicorn until the server is stopped."""
+    # Imported lazily so development setups don't need gunicorn
+    from gunicorn.app.base import BaseApplication
+
+    class AeroARApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = production_options(host, port)
+    print(f"Starting gunicorn with {options['workers']} worker(s) x {options['threads']} thread(s)")
+    AeroARApplication(app, options).run()
@@ -0,0 +1,25 @@
+// Offline mode: registers the service worker (sw.js) and asks it to keep the
+// session's module cached, so scans play from the device instead of the network
+
+// Compact audio rendition this browser can play (sent as ?format=, the server falls back to WAV)
+const audioFormat = (() => {
+    const probe = document.createElement('audio');
+    if (probe.canPlayType('audio/ogg; codecs="opus"')) return 'opus';
+    if (probe.canPlayType('audio/mp4; codecs="mp4a.40.2"')) return 'm4a';
+    return '';
+})();
+
+// Ask the service worker to download the module bundle (only what changed since last time)
+async function precacheModule() {
+    if (!('serviceWorker' in navigator)) return;
+
+    try {
+        await navigator.serviceWorker.register('/sw.js');
+        const registration = await navigator.serviceWorker.ready;
+        registration.active.postMessage({ type: 'precache', format: audioFormat });
+    } catch (err) {
+        console.warn('Offline mode unavailable:', err);
+    }
+}
+
+window.addEventListener('load', precacheModule);
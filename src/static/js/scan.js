@@ -2,7 +2,7 @@
 let html5QrCode;
 let isScanning = false;
 let currentAudio = null;
-let audioBlob = null;
+let audioUrl = null;
 let audioName = '';
 let cameraAvailable = false;
 let currentCameraId = null;
@@ -13,6 +13,14 @@ const config = {
     aspectRatio: 1.0
 };
 
+// Build the /audios URL for a scanned name (audioFormat comes from offline.js).
+// The module keys the service worker's offline cache (see sw.js)
+function audioUrlFor(name) {
+    const module = encodeURIComponent(document.body.dataset.module || '');
+    const format = audioFormat ? `&format=${audioFormat}` : '';
+    return `/audios?module=${module}&name=${encodeURIComponent(name)}${format}`;
+}
+
 // Function to update mode label
 function updateModeLabel(mode) {
     const modeLabel = document.getElementById('modeLabel');
@@ -158,23 +166,22 @@ function onScanError(errorMessage) {
 // Function to fetch audio from backend
 async function fetchAudio(qrCodeData) {
     try {
-        // Send GET request to /audios endpoint with QR code data as query parameter
-        const response = await fetch(`/audios?name=${encodeURIComponent(qrCodeData)}`);
+        // Check the audio exists with a HEAD request; the player streams it later
+        const url = audioUrlFor(qrCodeData);
+        const response = await fetch(url, { method: 'HEAD' });
 
         if (!response.ok) {
-            const errorText = await response.text();
             throw new Error(`Audio not found: ${response.status}`);
         }
 
-        // Get the audio file as a blob
-        audioBlob = await response.blob();
+        audioUrl = url;
         audioName = qrCodeData;
 
         // Show success toast
-        showToast(`✓ Audio file received!`, 'success');
+        showToast(`✓ Audio file found!`, 'success');
 
         document.getElementById('statusMessage').innerHTML =
-            '<span class="success">Audio file received!</span>';
+            '<span class="success">Audio file found!</span>';
 
         // Show confirmation modal
         showAudioConfirmModal(qrCodeData);
@@ -215,7 +222,7 @@ function hideAudioConfirmModal() {
 
 // Initialize audio player
 function initializeAudioPlayer() {
-    if (!audioBlob) return;
+    if (!audioUrl) return;
 
     // Clean up existing audio if any
     if (currentAudio) {
@@ -223,8 +230,8 @@ function initializeAudioPlayer() {
         currentAudio = null;
     }
 
-    // Create new audio element from blob
-    const audioUrl = URL.createObjectURL(audioBlob);
+    // Stream the audio: the browser uses Range requests, so playback starts
+    // before the download finishes and seeking doesn't need the whole file
     currentAudio = new Audio(audioUrl);
 
     // Set up audio title
@@ -320,7 +327,7 @@ function removeAudioPlayer() {
     const statusCard = document.getElementById('statusCard');
     if (statusCard) statusCard.style.display = 'block';
 
-    audioBlob = null;
+    audioUrl = null;
     audioName = '';
 
     // Show mode controls again when audio stops
@@ -361,15 +368,15 @@ function triggerWatchEasterEgg() {
         }
 
         try {
-            // Fetch the oil-filter audio
-            const response = await fetch('/audios?name=oil-filter');
+            // Check the oil-filter audio exists
+            const url = audioUrlFor('oil-filter');
+            const response = await fetch(url, { method: 'HEAD' });
 
             if (!response.ok) {
                 throw new Error(`Audio not found: ${response.status}`);
             }
 
-            // Get the audio file as a blob
-            audioBlob = await response.blob();
+            audioUrl = url;
             audioName = 'oil-filter';
 
             // Show custom modal with watch message
@@ -419,7 +426,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // No button - close modal and resume scanning
     document.getElementById('playNoBtn').onclick = () => {
         hideAudioConfirmModal();
-        audioBlob = null;
+        audioUrl = null;
         audioName = '';
 
         // Resume scanning only if camera is enabled
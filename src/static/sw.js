@@ -0,0 +1,223 @@
+// AeroAR service worker: keeps the logged-in module (its audio, glossary and pages)
+// in Cache Storage so a scan plays instantly, even without connectivity.
+// Served from the site root so its scope covers /audios and the pages.
+
+// Bump to refresh the cached scanner scripts and styles
+const SHELL_CACHE = 'aeroar-shell-v1';
+const SHELL_ASSETS = [
+    '/css/variables.css',
+    '/css/styles.css',
+    '/css/scan.css',
+    '/js/html5-qrcode.min.js',
+    '/js/offline.js',
+    '/js/scan.js'
+];
+
+// One cache per module: aeroar-bundle-<module code>
+const BUNDLE_PREFIX = 'aeroar-bundle-';
+// Where the bundle a module's cache holds is recorded (written last)
+const BUNDLE_URL = '/offline/bundle';
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then((cache) => cache.addAll(SHELL_ASSETS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name.startsWith('aeroar-shell-') && name !== SHELL_CACHE) {
+                await caches.delete(name);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+// Cache key of an /audios URL: the same parameters in any order give the same key
+function audioKey(url) {
+    const key = new URL(url, self.location.origin);
+    key.searchParams.sort();
+    return key.pathname + key.search;
+}
+
+// The URL the scanner requests for an audio of the bundle (see audioUrlFor in scan.js)
+function bundleAudioUrl(audio, format) {
+    return format ? `${audio.url}&format=${format}` : audio.url;
+}
+
+// Brings the session module's cache up to date with its bundle
+async function precacheBundle(format) {
+    const response = await fetch(BUNDLE_URL, { cache: 'no-cache' });
+    if (!response.ok) {
+        // Not logged in to a finished module
+        return;
+    }
+    const bundle = await response.json();
+    const cacheName = BUNDLE_PREFIX + bundle.module;
+    const cache = await caches.open(cacheName);
+
+    // Bundles of other modules belong to an earlier login
+    for (const name of await caches.keys()) {
+        if (name.startsWith(BUNDLE_PREFIX) && name !== cacheName) {
+            await caches.delete(name);
+        }
+    }
+
+    const stored = await cache.match(BUNDLE_URL);
+    const previous = stored ? await stored.json() : null;
+    if (previous && previous.version === bundle.version && previous.format === format) {
+        return;
+    }
+
+    // Only audio whose content changed since the stored bundle is downloaded again
+    const cachedVersions = {};
+    if (previous && previous.format === format) {
+        for (const audio of previous.audios) {
+            cachedVersions[audio.name] = audio.version;
+        }
+    }
+
+    const keys = new Set();
+    for (const audio of bundle.audios) {
+        const url = bundleAudioUrl(audio, format);
+        const key = audioKey(url);
+        keys.add(key);
+        if (cachedVersions[audio.name] === audio.version && await cache.match(key)) {
+            continue;
+        }
+        const audioResponse = await fetch(url);
+        if (!audioResponse.ok) {
+            throw new Error(`Failed to cache ${audio.name}: ${audioResponse.status}`);
+        }
+        await cache.put(key, audioResponse);
+    }
+
+    for (const page of bundle.pages) {
+        const pageResponse = await fetch(page, { cache: 'no-cache' });
+        if (pageResponse.ok) {
+            await cache.put(page, pageResponse);
+        }
+    }
+
+    // Drop audio the module no longer has
+    for (const request of await cache.keys()) {
+        const url = new URL(request.url);
+        if (url.pathname === '/audios' && !keys.has(audioKey(url))) {
+            await cache.delete(request);
+        }
+    }
+
+    // Recorded last, so an interrupted download is picked up again next time
+    await cache.put(BUNDLE_URL, new Response(JSON.stringify({ ...bundle, format }), {
+        headers: { 'Content-Type': 'application/json' }
+    }));
+    console.log(`Module ${bundle.module} (${bundle.audios.length} audio) available offline`);
+}
+
+let precaching = null;
+
+self.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'precache') {
+        // Pages opened together share one download
+        if (!precaching) {
+            precaching = precacheBundle(event.data.format)
+                .catch((err) => console.warn('Offline bundle incomplete:', err))
+                .finally(() => { precaching = null; });
+        }
+        event.waitUntil(precaching);
+    }
+});
+
+// Answers a media element's byte range request from a cached file
+async function rangeResponse(response, range) {
+    const blob = await response.blob();
+    const headers = new Headers(response.headers);
+    const match = /^bytes=(\d*)-(\d*)$/.exec(range.trim());
+    if (!match || (match[1] === '' && match[2] === '')) {
+        return new Response(blob, { status: 200, headers });
+    }
+
+    let start;
+    let end;
+    if (match[1] === '') {
+        // Suffix range: the last N bytes
+        start = Math.max(0, blob.size - Number(match[2]));
+        end = blob.size - 1;
+    } else {
+        start = Number(match[1]);
+        end = match[2] === '' ? blob.size - 1 : Math.min(Number(match[2]), blob.size - 1);
+    }
+    if (start >= blob.size || start > end) {
+        return new Response(null, { status: 416, headers: { 'Content-Range': `bytes */${blob.size}` } });
+    }
+
+    headers.set('Content-Range', `bytes ${start}-${end}/${blob.size}`);
+    headers.set('Content-Length', String(end - start + 1));
+    return new Response(blob.slice(start, end + 1), { status: 206, headers });
+}
+
+async function cachedAudio(request) {
+    const cached = await caches.match(audioKey(request.url), { ignoreVary: true });
+    if (!cached) {
+        return fetch(request);
+    }
+    if (request.method === 'HEAD') {
+        // The scanner checks an audio exists before playing it
+        return new Response(null, { status: cached.status, headers: cached.headers });
+    }
+    const range = request.headers.get('Range');
+    return range ? rangeResponse(cached, range) : cached;
+}
+
+// Pages follow the session, so the network wins and the cache is the fallback
+async function networkFirst(request) {
+    try {
+        return await fetch(request);
+    } catch (err) {
+        const path = new URL(request.url).pathname;
+        const cached = await caches.match(path === '/index.html' ? '/' : path, { ignoreVary: true });
+        if (cached) {
+            return cached;
+        }
+        throw err;
+    }
+}
+
+// Scripts and styles: served from the cache and refreshed in the background
+async function staleWhileRevalidate(event) {
+    const cache = await caches.open(SHELL_CACHE);
+    const cached = await cache.match(event.request);
+    const refresh = fetch(event.request).then((response) => {
+        if (response.ok) {
+            cache.put(event.request, response.clone());
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(refresh.catch(() => null));
+        return cached;
+    }
+    return refresh;
+}
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.pathname === '/audios' && (request.method === 'GET' || request.method === 'HEAD')) {
+        event.respondWith(cachedAudio(request));
+    } else if (request.method !== 'GET') {
+        return;
+    } else if (SHELL_ASSETS.includes(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.mode === 'navigate' && ['/', '/index.html', '/scan.html', '/glossary'].includes(url.pathname)) {
+        event.respondWith(networkFirst(request));
+    }
+});
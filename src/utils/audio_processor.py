@@ -1,7 +1,160 @@
 import os
+import json
+import wave
+import subprocess
+import threading
+import time
+import numpy as np
 import speech_recognition as sr
 from pydub import AudioSegment
 from io import BytesIO
+from .transcript_cache import TranscriptCache, transcript_key
+from .audio_store import AudioStore, file_hash, AUDIO_RENDITIONS
+from .transcription_backends import TRANSCRIPTION_BACKEND, create_backend, check_backend
+
+# Whisper configuration (overridable per deployment, see transcription_backends for the engine)
+# "tiny" keeps inference fast on resource-constrained EC2 instances; with the int8
+# faster-whisper backend a larger model runs at about the same speed (tools/bench_transcribe.py)
+WHISPER_MODEL = os.environ.get('WHISPER_MODEL', 'tiny')
+WHISPER_DEVICE = os.environ.get('WHISPER_DEVICE', 'cpu')
+
+# Whisper models expect 16 kHz mono samples
+WHISPER_SAMPLE_RATE = 16000
+
+# Voice activity detection: only speech is fed to Whisper (VAD_ENABLED=0 feeds whole clips).
+# Frames louder than the clip's noise floor by VAD_THRESHOLD_DB count as speech; pauses
+# shorter than VAD_MIN_GAP_SECONDS are kept so sentences aren't cut apart.
+VAD_ENABLED = os.environ.get('VAD_ENABLED', '1') == '1'
+VAD_FRAME_SECONDS = 0.03
+VAD_THRESHOLD_DB = 12.0
+VAD_SILENCE_DB = -60.0
+VAD_PADDING_SECONDS = 0.25
+VAD_MIN_GAP_SECONDS = 0.6
+# Silence put back between the speech segments handed to the model
+VAD_JOIN_SECONDS = 0.2
+
+# Also cut leading/trailing silence from the streaming renditions (the WAV master is kept whole)
+TRIM_RENDITIONS = os.environ.get('AUDIO_TRIM_RENDITIONS', '0') == '1'
+
+# Clips longer than this are split at silences into windows of at most
+# TRANSCRIBE_WINDOW_SECONDS that are transcribed in parallel
+LONG_CLIP_SECONDS = float(os.environ.get('LONG_CLIP_SECONDS', 60))
+TRANSCRIBE_WINDOW_SECONDS = float(os.environ.get('TRANSCRIBE_WINDOW_SECONDS', 30))
+
+def read_pcm(audio_path, offset=None, duration=None) -> bytes:
+    """
+    Decodes a WAV file (or the part starting at offset, lasting duration seconds)
+    to 16-bit mono PCM at WHISPER_SAMPLE_RATE.
+    """
+    with wave.open(audio_path, 'rb') as f:
+        native = (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (WHISPER_SAMPLE_RATE, 1, 2)
+        if native:
+            # Masters written by decode_audio are already in Whisper's format: no conversion
+            start = int((offset or 0) * WHISPER_SAMPLE_RATE)
+            f.setpos(min(start, f.getnframes()))
+            return f.readframes(int(duration * WHISPER_SAMPLE_RATE) if duration is not None else f.getnframes() - start)
+
+    if offset is None and duration is None:
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(audio_path) as source:
+            audio_data = recognizer.record(source)
+        return audio_data.get_raw_data(convert_rate=WHISPER_SAMPLE_RATE, convert_width=2)
+
+    # Sample-accurate seek (AudioFile reads in whole chunks); only the window is loaded
+    with wave.open(audio_path, 'rb') as f:
+        rate, channels, width = f.getframerate(), f.getnchannels(), f.getsampwidth()
+        start = int((offset or 0) * rate)
+        f.setpos(min(start, f.getnframes()))
+        frames = f.readframes(int(duration * rate) if duration is not None else f.getnframes() - start)
+
+    if channels > 1 and width == 2:
+        # Downmix to mono
+        frames = np.frombuffer(frames, dtype=np.int16).reshape(-1, channels).mean(axis=1).astype(np.int16).tobytes()
+    elif channels > 1:
+        raise ValueError(f"Unsupported WAV layout: {channels} channels of {width * 8} bits")
+    return sr.AudioData(frames, rate, width).get_raw_data(convert_rate=WHISPER_SAMPLE_RATE, convert_width=2)
+
+def audio_duration(audio_path) -> float:
+    """Length of a WAV file in seconds, from its header."""
+    with sr.AudioFile(audio_path) as source:
+        return source.DURATION
+
+def pcm_to_samples(pcm) -> np.ndarray:
+    """16-bit PCM (bytes or an int16 array) -> float32 in [-1, 1], the format Whisper works on."""
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+def detect_speech(samples, sample_rate=WHISPER_SAMPLE_RATE) -> list:
+    """
+    Energy-based voice activity detection on float samples.
+    Returns the speech segments as (start, end) sample indices: [] for a silent clip,
+    the whole clip when its level is too even to tell speech from background.
+    """
+    frame = int(sample_rate * VAD_FRAME_SECONDS)
+    count = len(samples) // frame
+    if count == 0:
+        return [(0, len(samples))] if len(samples) else []
+
+    frames = samples[:count * frame].reshape(count, frame)
+    levels = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10)
+
+    noise_floor, loud = np.percentile(levels, [10, 90])
+    if loud < VAD_SILENCE_DB:
+        return []
+    if loud - noise_floor < VAD_THRESHOLD_DB:
+        # No quiet stretches to remove (continuous speech, or steady noise throughout)
+        return [(0, len(samples))]
+
+    voiced = levels > max(noise_floor + VAD_THRESHOLD_DB, VAD_SILENCE_DB)
+
+    # Pad speech on both sides so word onsets and tails survive
+    pad = int(round(VAD_PADDING_SECONDS / VAD_FRAME_SECONDS))
+    # ('full' sliced back to the frame count: 'same' is longer than clips shorter than the kernel)
+    voiced = np.convolve(voiced, np.ones(2 * pad + 1))[pad:pad + count] > 0
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    segments = []
+    for start, end in zip(edges[::2] * frame, edges[1::2] * frame, strict=True):
+        if segments and start - segments[-1][1] < VAD_MIN_GAP_SECONDS * sample_rate:
+            segments[-1] = (segments[-1][0], int(end))
+        else:
+            segments.append((int(start), int(end)))
+
+    # Speech running into the last partial frame
+    if segments and segments[-1][1] == count * frame:
+        segments[-1] = (segments[-1][0], len(samples))
+    return segments
+
+def plan_windows(segments, length, sample_rate=WHISPER_SAMPLE_RATE, max_seconds=TRANSCRIBE_WINDOW_SECONDS) -> list:
+    """
+    Groups speech segments into transcription windows of at most max_seconds, cutting
+    in the silence between segments. Speech longer than a window is cut at window length.
+    Returns (start, end) sample ranges in order; the whole clip when it has no speech.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    pieces = []
+    for start, end in segments or [(0, length)]:
+        while end - start > max_samples:
+            pieces.append((start, start + max_samples))
+            start += max_samples
+        pieces.append((start, end))
+
+    windows = []
+    for start, end in pieces:
+        if windows and end - windows[-1][0] <= max_samples:
+            windows[-1] = (windows[-1][0], end)
+        else:
+            windows.append((start, end))
+    return windows
+
+def join_segments(samples, segments, sample_rate=WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Concatenates the speech segments, separated by VAD_JOIN_SECONDS of silence."""
+    gap = np.zeros(int(sample_rate * VAD_JOIN_SECONDS), dtype=samples.dtype)
+    parts = []
+    for start, end in segments:
+        if parts:
+            parts.append(gap)
+        parts.append(samples[start:end])
+    return np.concatenate(parts) if parts else samples[:0]
 
 def convert_to_wav(file_storage) -> BytesIO:
     """
@@ -27,27 +180,498 @@ def convert_to_wav(file_storage) -> BytesIO:
         print(f"Error converting audio to WAV: {e}")
         return None
 
+def convert_file_to_wav(source_path, wav_path) -> bool:
+    """
+    Converts an audio file on disk to a WAV file on disk without loading it into memory.
+    ffmpeg streams from the input file to a temporary output in fixed-size buffers, so
+    memory stays flat regardless of clip length. The output only appears once complete.
+    Returns True on success.
+
+    The upload pipeline decodes with decode_audio instead; this is kept as the previous
+    path that tools/bench_pipeline.py and tools/bench_convert.py compare against.
+    """
+    tmp_path = f"{wav_path}.part"
+    command = [
+        AudioSegment.converter,  # ffmpeg binary resolved by pydub
+        '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', source_path,
+        '-vn', '-acodec', 'pcm_s16le',
+        '-f', 'wav', tmp_path
+    ]
+
+    try:
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if completed.returncode != 0:
+            print(f"Error converting audio to WAV: {completed.stderr.decode(errors='replace').strip()}")
+            return False
+        os.replace(tmp_path, wav_path)
+        return True
+    except Exception as e:
+        print(f"Error converting audio to WAV: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def decode_audio(source_path):
+    """
+    Decodes an uploaded audio file once, with ffmpeg, straight to 16-bit mono PCM at
+    WHISPER_SAMPLE_RATE: the samples the WAV master, the VAD and the model all use.
+    Returns an int16 array, or None if decoding failed.
+    """
+    command = [
+        AudioSegment.converter,
+        '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-i', source_path,
+        '-vn', '-ac', '1', '-ar', str(WHISPER_SAMPLE_RATE), '-acodec', 'pcm_s16le', '-f', 's16le', '-'
+    ]
+    try:
+        completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except Exception as e:
+        print(f"Error decoding audio: {e}")
+        return None
+    if completed.returncode != 0:
+        print(f"Error decoding audio: {completed.stderr.decode(errors='replace').strip()}")
+        return None
+    # No copy: the array is a view of ffmpeg's output
+    return np.frombuffer(completed.stdout, dtype=np.int16, count=len(completed.stdout) // 2)
+
+def write_wav(wav_path, pcm):
+    """Writes 16-bit mono PCM at WHISPER_SAMPLE_RATE as a WAV file; it only appears once complete."""
+    tmp_path = f"{wav_path}.part"
+    try:
+        with wave.open(tmp_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(WHISPER_SAMPLE_RATE)
+            f.writeframes(pcm)
+        os.replace(tmp_path, wav_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def create_renditions(wav_path, trim=None) -> list:
+    """
+    Encodes the speech-quality renditions of a WAV file (e.g. Oil_Filter.opus next to
+    Oil_Filter.wav). Existing renditions are kept. Returns the extensions that exist afterwards.
+    trim: optional (start, end) in seconds to cut from the WAV
+    """
+    trim_args = ['-ss', f"{trim[0]:.3f}", '-to', f"{trim[1]:.3f}"] if trim else []
+    base_path, _ = os.path.splitext(wav_path)
+    created = []
+
+    for extension, (_, output_args) in AUDIO_RENDITIONS.items():
+        rendition_path = f"{base_path}.{extension}"
+        if os.path.exists(rendition_path):
+            created.append(extension)
+            continue
+
+        tmp_path = f"{rendition_path}.part"
+        command = [
+            AudioSegment.converter,
+            '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+            *trim_args, '-i', wav_path, '-vn', *output_args, tmp_path
+        ]
+        try:
+            completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if completed.returncode == 0:
+                os.replace(tmp_path, rendition_path)
+                created.append(extension)
+            else:
+                print(f"Error creating {extension} rendition: {completed.stderr.decode(errors='replace').strip()}")
+        except Exception as e:
+            print(f"Error creating {extension} rendition: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return created
+
+class TranscriptionEngine:
+    """
+    Keeps a single Whisper model loaded for the lifetime of the process.
+    The model is loaded on first use (or by warm_up) and shared by every clip,
+    so only the first transcription pays the load/deserialization cost.
+    The model runs on a pluggable backend (TRANSCRIPTION_BACKEND by default).
+    With a TranscriptCache, clips that were transcribed before skip the model entirely.
+    """
+
+    def __init__(self, model_name=WHISPER_MODEL, device=WHISPER_DEVICE, cache=None, backend=None):
+        self.backend = backend or create_backend(TRANSCRIPTION_BACKEND, model_name, device)
+        self.model_name = self.backend.model_name
+        self.device = self.backend.device
+        self.cache = cache
+        self._load_lock = threading.Lock()
+        # Inference is serialized: the backends already spread a single call across cores
+        self._inference_lock = threading.Lock()
+
+        # Metrics
+        self.load_seconds = None
+        self.clips_transcribed = 0
+        self.inference_seconds_total = 0.0
+        self.last_inference_seconds = None
+        self.audio_seconds_total = 0.0
+        self.speech_seconds_total = 0.0
+
+    @property
+    def model_id(self):
+        """Backend, model and package version; transcripts are only reused for the same combination."""
+        return self.backend.model_id
+
+    @property
+    def is_loaded(self):
+        return self.backend.is_loaded
+
+    def warm_up(self):
+        """Loads the model if it is not loaded yet. Safe to call from several threads."""
+        if self.backend.is_loaded:
+            return self.backend
+
+        with self._load_lock:
+            if not self.backend.is_loaded:
+                start = time.perf_counter()
+                self.backend.load()
+                self.load_seconds = time.perf_counter() - start
+                print(f"Loaded {self.backend.name} model '{self.model_name}' on {self.device} in {self.load_seconds:.2f}s")
+        return self.backend
+
+    @property
+    def cache_id(self):
+        """What a cached transcript depends on besides the audio: the model and the VAD stage."""
+        return f"{self.model_id}+vad" if VAD_ENABLED else self.model_id
+
+    def transcribe(self, audio_path) -> str:
+        """
+        Transcribes a WAV file with the warm model.
+        Raises on failure, callers decide how to report errors.
+        """
+        return self.transcribe_pcm(read_pcm(audio_path))['text']
+
+    def transcribe_pcm(self, pcm, offset=0.0, samples=None) -> dict:
+        """
+        Transcribes 16 kHz 16-bit mono PCM. Silence is trimmed first so the model only
+        runs on speech. Returns {'text', 'duration', 'speech_duration', 'segments'}, with
+        'segments' the model's [{'start', 'end', 'text'}] in seconds from the start of the
+        clip (offset is where this PCM starts within it).
+        samples: pcm_to_samples(pcm), when the caller already has it
+        """
+        if samples is None:
+            samples = pcm_to_samples(pcm)
+        segments = detect_speech(samples) if VAD_ENABLED else [(0, len(samples))]
+        result = {
+            'text': '',
+            'duration': len(samples) / WHISPER_SAMPLE_RATE,
+            'speech_duration': sum(end - start for start, end in segments) / WHISPER_SAMPLE_RATE,
+            'segments': [],
+        }
+        self.audio_seconds_total += result['duration']
+        self.speech_seconds_total += result['speech_duration']
+
+        if not segments:
+            # Nothing but dead air, no need to run the model
+            return result
+
+        # The same clip uploaded to another module was already transcribed by this model
+        key = transcript_key(pcm, self.cache_id)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                result.update(_load_cached(cached))
+                _shift_segments(result['segments'], offset)
+                return result
+
+        backend = self.warm_up()
+        with self._inference_lock:
+            start = time.perf_counter()
+            output = backend.transcribe(join_segments(samples, segments))
+            elapsed = time.perf_counter() - start
+            self.clips_transcribed += 1
+            self.inference_seconds_total += elapsed
+            self.last_inference_seconds = elapsed
+
+        # Model timestamps are on the trimmed audio, map them back onto the clip
+        to_clip = _trimmed_to_clip_time(segments)
+        result['text'] = output['text']
+        result['segments'] = [{
+            'start': round(to_clip(segment['start']), 2),
+            'end': round(to_clip(segment['end']), 2),
+            'text': segment['text'],
+        } for segment in output['segments']]
+
+        if self.cache is not None:
+            self.cache.put(key, self.cache_id, json.dumps({'text': result['text'], 'segments': result['segments']}))
+        _shift_segments(result['segments'], offset)
+        return result
+
+    def stats(self) -> dict:
+        """Returns load and inference timings for this process."""
+        average = None
+        if self.clips_transcribed:
+            average = self.inference_seconds_total / self.clips_transcribed
+        return {
+            'backend': self.backend.name,
+            'model': self.model_name,
+            'device': self.device,
+            'loaded': self.is_loaded,
+            'load_seconds': self.load_seconds,
+            'clips_transcribed': self.clips_transcribed,
+            'inference_seconds_total': self.inference_seconds_total,
+            'inference_seconds_avg': average,
+            'last_inference_seconds': self.last_inference_seconds,
+            'audio_seconds_total': self.audio_seconds_total,
+            'speech_seconds_total': self.speech_seconds_total,
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+def _load_cached(value) -> dict:
+    """Cached transcripts are JSON {'text', 'segments'}; older entries are plain text."""
+    try:
+        cached = json.loads(value)
+        if isinstance(cached, dict):
+            return {'text': cached.get('text', ''), 'segments': cached.get('segments', [])}
+    except ValueError:
+        pass
+    return {'text': value, 'segments': []}
+
+def _shift_segments(segments, offset):
+    if offset:
+        for segment in segments:
+            segment['start'] = round(segment['start'] + offset, 2)
+            segment['end'] = round(segment['end'] + offset, 2)
+
+def _trimmed_to_clip_time(segments, sample_rate=WHISPER_SAMPLE_RATE):
+    """Maps a time in the joined speech (see join_segments) to the time in the original clip."""
+    gap = int(sample_rate * VAD_JOIN_SECONDS)
+    pieces = []
+    position = 0
+    for start, end in segments:
+        pieces.append((position, start, end - start))
+        position += end - start + gap
+
+    def to_clip(seconds):
+        sample = seconds * sample_rate
+        joined_start, clip_start, length = pieces[0]
+        for piece in pieces:
+            if piece[0] > sample:
+                break
+            joined_start, clip_start, length = piece
+        return (clip_start + min(sample - joined_start, length)) / sample_rate
+    return to_clip
+
+def stitch_transcriptions(parts, duration) -> dict:
+    """Combines the transcribe_pcm results of consecutive windows of a clip lasting duration seconds."""
+    return {
+        'text': " ".join(part['text'] for part in parts if part['text']),
+        'duration': duration,
+        'speech_duration': sum(part['speech_duration'] for part in parts),
+        'segments': [segment for part in parts for segment in part['segments']],
+    }
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def _open_transcript_cache():
+    """The shared transcript cache, unless disabled with TRANSCRIPT_CACHE=0 (or unusable)."""
+    if os.environ.get('TRANSCRIPT_CACHE', '1') != '1':
+        return None
+    try:
+        return TranscriptCache()
+    except Exception as e:
+        print(f"Transcript cache unavailable: {e}")
+        return None
+
+def get_transcription_engine() -> TranscriptionEngine:
+    """Returns the process-wide transcription engine, creating it on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TranscriptionEngine(cache=_open_transcript_cache())
+    return _engine
+
 def transcribe_audio(audio_path) -> str:
     """
-    Transcribes an audio file at the given path using SpeechRecognition.
+    Transcribes an audio file at the given path using the shared Whisper engine.
     Returns the transcribed text or an error message/empty string.
     Expects a WAV file path.
     """
-    recognizer = sr.Recognizer()
-    
     try:
-        # The file is already WAV, so we can load it directly
-        with sr.AudioFile(audio_path) as source:
-            # Record the audio data
-            audio_data = recognizer.record(source)
-            # Recognize using OpenAI Whisper (local model) which supports punctuation
-            # Using "tiny" model for better performance on resource-constrained EC2 instances
-            text = recognizer.recognize_whisper(audio_data, model="tiny")
-            return text.strip()
-    except sr.UnknownValueError:
-        return "[Audio not clear enough to transcribe]"
-    except sr.RequestError as e:
-        return f"[Transcription service error: {e}]"
+        return get_transcription_engine().transcribe(audio_path)
     except Exception as e:
         print(f"Transcription error: {e}")
         return "[Error generating transcript]"
+
+def init_worker_process(worker_count=1):
+    """
+    Initializer for processing pool workers.
+    Splits the cores between workers so parallel clips don't oversubscribe the CPU,
+    then loads the model so the worker is warm before its first clip.
+    Raises if TRANSCRIPTION_BACKEND is unknown or not installed: the pool breaks and the
+    job fails right away, instead of every clip failing to transcribe.
+    """
+    threads = max(1, (os.cpu_count() or 1) // max(1, worker_count))
+    os.environ.setdefault('WHISPER_THREADS', str(threads))
+
+    check_backend(TRANSCRIPTION_BACKEND)
+
+    if os.environ.get('WHISPER_PRELOAD', '1') == '1':
+        try:
+            get_transcription_engine().warm_up()
+        except Exception as e:
+            print(f"Failed to preload Whisper model: {e}")
+
+def transcription_entry(transcription) -> dict:
+    """Transcript entry fields for a transcribe_pcm (or stitched) result."""
+    return {
+        "transcript": transcription['text'],
+        "duration": round(transcription['duration'], 2),
+        "speech_duration": round(transcription['speech_duration'], 2),
+        "segments": transcription['segments'],
+    }
+
+def transcribe_window(task) -> dict:
+    """
+    Transcribes one window of a long clip. Runs inside a pool worker; only the
+    window is decoded, so memory is bounded by the window length.
+    task: dict {'audio_path': str, 'start': float, 'end': float} (seconds)
+    Returns {'transcription': transcribe_pcm result, 'stats': engine stats, 'pid': int,
+    'timings': {'transcribe': seconds}}
+    """
+    engine = get_transcription_engine()
+    start = time.perf_counter()
+    try:
+        pcm = read_pcm(task['audio_path'], offset=task['start'], duration=task['end'] - task['start'])
+        transcription = engine.transcribe_pcm(pcm, offset=task['start'])
+    except Exception as e:
+        print(f"Transcription error: {e}")
+        transcription = {
+            'text': "[Error generating transcript]",
+            'duration': task['end'] - task['start'],
+            'speech_duration': 0.0,
+            'segments': [],
+        }
+    return {
+        'transcription': transcription,
+        'stats': engine.stats(),
+        'pid': os.getpid(),
+        'timings': {'transcribe': time.perf_counter() - start},
+    }
+
+def process_clip(task) -> dict:
+    """
+    Converts and transcribes a single clip. Runs inside a pool worker.
+    task: dict {'raw_path': str, 'final_wav_path': str, 'real_name': str, 'transcript_text': str}
+          plus optional 'store_root', 'module_code' and 'name' to keep the audio in the AudioStore
+    Returns {'entry': transcript entry or None if conversion failed, 'stats': engine stats, 'pid': int,
+    'timings': seconds spent per stage ('convert', 'transcribe')} and, for clips longer than
+    LONG_CLIP_SECONDS, 'windows': transcribe_window tasks whose results (see
+    stitch_transcriptions) complete the entry
+    """
+    raw_path = task['raw_path']
+    final_wav_path = task['final_wav_path']
+    engine = get_transcription_engine()
+    result = {'entry': None, 'stats': engine.stats(), 'pid': os.getpid(), 'timings': {}}
+    start = time.perf_counter()
+
+    store = AudioStore(task['store_root']) if task.get('store_root') else None
+    digest = None
+    # The clip as 16 kHz mono PCM, and as float samples, once decoded
+    pcm = None
+    samples = None
+    if store is not None:
+        if os.path.exists(raw_path):
+            digest = file_hash(raw_path)
+        else:
+            # A previous attempt already stored this clip
+            digest = store.module_ref(task['module_code'], task['name'])
+
+    if digest and store.add_ref(digest, task['module_code'], task['name']):
+        # The same upload was processed before (possibly for another module)
+        audio_path = store.audio_path(digest)
+    else:
+        # 1. Decode once; the WAV master is written from the same samples the model gets
+        if raw_path != final_wav_path and os.path.exists(raw_path):
+            pcm = decode_audio(raw_path)
+            if pcm is None:
+                # Conversion failed
+                print(f"Failed to convert {raw_path}")
+                return result
+            write_wav(final_wav_path, pcm)
+        elif not os.path.exists(final_wav_path):
+            # Neither the upload nor a converted file from a previous attempt is left
+            print(f"Missing audio for {task['real_name']}: {raw_path}")
+            return result
+
+        # 2. Compact renditions for streaming (a failed rendition falls back to the WAV)
+        trim = None
+        if TRIM_RENDITIONS:
+            if pcm is None:
+                pcm = read_pcm(final_wav_path)
+            samples = pcm_to_samples(pcm)
+            segments = detect_speech(samples)
+            if segments:
+                trim = (segments[0][0] / WHISPER_SAMPLE_RATE, segments[-1][1] / WHISPER_SAMPLE_RATE)
+        renditions = create_renditions(final_wav_path, trim)
+        audio_path = final_wav_path
+
+        # Move the WAV and its renditions into the shared store
+        if digest:
+            base_path, _ = os.path.splitext(final_wav_path)
+            files = [final_wav_path] + [f"{base_path}.{extension}" for extension in renditions]
+            store.add(digest, task['module_code'], task['name'], files)
+            audio_path = store.audio_path(digest)
+
+    if digest and not os.path.isdir(os.path.dirname(final_wav_path)):
+        # The module was deleted while this clip was processed, after it released its
+        # references: drop the one just added so the audio can be freed
+        store.release_ref(task['module_code'], task['name'])
+        store.gc()
+        return result
+
+    # Clean up raw file (only now, so an interrupted clip can still be identified by it)
+    if raw_path != final_wav_path and os.path.exists(raw_path):
+        try:
+            os.remove(raw_path)
+        except OSError:
+            pass
+
+    result['timings']['convert'] = time.perf_counter() - start
+
+    # 3. Transcribe (speech only), recording how much of the clip was speech
+    result['entry'] = {
+        "name": task['real_name'],
+        "transcript": task['transcript_text'],
+        "filename": os.path.basename(final_wav_path)
+    }
+    if not task['transcript_text']:
+        start = time.perf_counter()
+        try:
+            if pcm is not None:
+                duration = np.frombuffer(pcm, dtype=np.int16).size / WHISPER_SAMPLE_RATE
+            else:
+                duration = audio_duration(audio_path)
+            if duration > LONG_CLIP_SECONDS:
+                # Long clip: plan windows at silences, the caller fans them out over the pool
+                if samples is None:
+                    samples = pcm_to_samples(pcm if pcm is not None else read_pcm(audio_path))
+                windows = plan_windows(detect_speech(samples), len(samples))
+                del samples
+                result['entry']['duration'] = round(duration, 2)
+                result['windows'] = [{
+                    'audio_path': audio_path,
+                    'start': start / WHISPER_SAMPLE_RATE,
+                    'end': end / WHISPER_SAMPLE_RATE,
+                } for start, end in windows]
+            else:
+                if pcm is None:
+                    pcm = read_pcm(audio_path)
+                transcription = engine.transcribe_pcm(pcm, samples=samples)
+                result['entry'].update(transcription_entry(transcription))
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            result['entry']['transcript'] = "[Error generating transcript]"
+        result['timings']['transcribe'] = time.perf_counter() - start
+    if digest:
+        result['entry']['audio'] = digest
+    result['stats'] = engine.stats()
+    return result
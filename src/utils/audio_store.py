@@ -0,0 +1,183 @@
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+
+from .module_manifest import read_manifest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    module TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (module, name)
+);
+CREATE INDEX IF NOT EXISTS idx_refs_hash ON refs (hash);
+"""
+
+# Inside a blob folder every file is named audio.<ext> (the WAV master and its renditions)
+BLOB_STEM = 'audio'
+
+# Compact streaming renditions written next to each WAV master (which Whisper uses).
+# extension -> (mimetype, ffmpeg output arguments)
+AUDIO_RENDITIONS = {
+    'opus': ('audio/ogg', ['-ac', '1', '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip', '-f', 'ogg']),
+    'm4a': ('audio/mp4', ['-ac', '1', '-c:a', 'aac', '-b:a', '48k', '-movflags', '+faststart', '-f', 'ipod']),
+}
+
+def file_hash(path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def manifest_blob(module_folder, name):
+    """Blob hash of one of the module's audio names, or None when its audio isn't in the store."""
+    manifest = read_manifest(module_folder)
+    if manifest is None:
+        return None
+    return manifest.get('audio', {}).get(name)
+
+def module_audio_names(module_folder):
+    """The module's audio names, sorted: from the manifest, or the WAV files of modules that keep their own."""
+    manifest = read_manifest(module_folder)
+    if manifest and manifest.get('audio'):
+        return sorted(manifest['audio'])
+    wav_files = glob.glob(os.path.join(module_folder, "*.wav"))
+    return sorted(os.path.splitext(os.path.basename(path))[0] for path in wav_files)
+
+class AudioStore:
+    """
+    Content-addressed audio shared by all modules. Each distinct upload is stored once,
+    under the hash of the uploaded file, with its WAV master and renditions. Modules
+    reference blobs by name; a blob is garbage collected once no module references it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.db_path = os.path.join(root, 'store.sqlite3')
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def blob_folder(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def audio_path(self, digest, extension='wav'):
+        return os.path.join(self.blob_folder(digest), f"{BLOB_STEM}.{extension}")
+
+    def has_blob(self, digest):
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        return row is not None
+
+    def add(self, digest, module, name, files=()):
+        """
+        References blob digest as the module's audio name. When the blob is new, files
+        (the WAV master and its renditions) are moved into it; when it already exists they
+        are duplicates and are removed. Returns the blob folder.
+        """
+        folder = self.blob_folder(digest)
+        with self._connect() as conn:
+            # The write lock keeps the files and the rows consistent with a concurrent gc()
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            if exists:
+                for path in files:
+                    os.remove(path)
+            else:
+                tmp_folder = f"{folder}.{uuid.uuid4().hex}.part"
+                os.makedirs(tmp_folder)
+                size = 0
+                for path in files:
+                    _, extension = os.path.splitext(path)
+                    size += os.path.getsize(path)
+                    os.replace(path, os.path.join(tmp_folder, f"{BLOB_STEM}{extension}"))
+                # Left over by an interrupted gc()
+                shutil.rmtree(folder, ignore_errors=True)
+                os.replace(tmp_folder, folder)
+                conn.execute(
+                    "INSERT INTO blobs (hash, size, created_at) VALUES (?, ?, ?)",
+                    (digest, size, time.time())
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO refs (module, name, hash) VALUES (?, ?, ?)",
+                (module, name, digest)
+            )
+        return folder
+
+    def add_ref(self, digest, module, name):
+        """
+        References blob digest as the module's audio name if the blob is in the store.
+        Checked and referenced in one transaction, so a concurrent gc() can't free the
+        blob in between. Returns whether the blob was referenced.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO refs (module, name, hash) VALUES (?, ?, ?)",
+                (module, name, digest)
+            )
+        return True
+
+    def module_ref(self, module, name):
+        """Blob hash the module's audio name refers to, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT hash FROM refs WHERE module = ? AND name = ?", (module, name)).fetchone()
+        return row['hash'] if row else None
+
+    def refcount(self, digest):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM refs WHERE hash = ?", (digest,)).fetchone()[0]
+
+    def release_module(self, module):
+        """Drops every reference held by the module (blobs are freed by gc)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM refs WHERE module = ?", (module,))
+
+    def release_ref(self, module, name):
+        """Drops the reference of one of the module's audio names (the blob is freed by gc)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM refs WHERE module = ? AND name = ?", (module, name))
+
+    def gc(self):
+        """Deletes blobs no module references. Returns (blobs removed, bytes freed)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT hash, size FROM blobs WHERE hash NOT IN (SELECT hash FROM refs)"
+            ).fetchall()
+            for row in rows:
+                shutil.rmtree(self.blob_folder(row['hash']), ignore_errors=True)
+                conn.execute("DELETE FROM blobs WHERE hash = ?", (row['hash'],))
+        return len(rows), sum(row['size'] for row in rows)
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            blobs = conn.execute("SELECT COUNT(*) AS count, COALESCE(SUM(size), 0) AS size FROM blobs").fetchone()
+            refs = conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        return {'blobs': blobs['count'], 'bytes': blobs['size'], 'references': refs}
@@ -0,0 +1,31 @@
+"""
+Entry points of the audio processing stack for the web app.
+
+audio_processor pulls in numpy, speech_recognition, pydub and, once a model loads,
+Whisper/torch. Only the job worker and its pool processes need those, so these
+wrappers import it on first call: web processes never load it, and pool processes
+(which unpickle these functions by name) only import this module up front.
+"""
+
+def init_worker_process(worker_count=1):
+    """Initializer for processing pool workers, see audio_processor.init_worker_process."""
+    from .audio_processor import init_worker_process
+    init_worker_process(worker_count)
+
+def process_clip(task) -> dict:
+    """Processes one uploaded clip in a pool worker, see audio_processor.process_clip."""
+    from .audio_processor import process_clip
+    return process_clip(task)
+
+def transcribe_window(task) -> dict:
+    """Transcribes one window of a long clip in a pool worker, see audio_processor.transcribe_window."""
+    from .audio_processor import transcribe_window
+    return transcribe_window(task)
+
+def stitch_transcriptions(parts, duration) -> dict:
+    from .audio_processor import stitch_transcriptions
+    return stitch_transcriptions(parts, duration)
+
+def transcription_entry(transcription) -> dict:
+    from .audio_processor import transcription_entry
+    return transcription_entry(transcription)
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+
+from werkzeug.utils import secure_filename
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Clips of a module still being uploaded: <index>.json (what was announced and how much
+# of it arrived) and <index>.part (the bytes received so far)
+UPLOADS_DIR = '.uploads'
+UPLOAD_FILE = 'upload.json'
+
+# Largest chunk accepted in one request; clients send UPLOAD_CHUNK_BYTES
+UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES', 4 * 1024 * 1024))
+MAX_CHUNK_BYTES = 2 * UPLOAD_CHUNK_BYTES
+
+class UploadError(ValueError):
+    """A rejected upload request. status is the HTTP status to answer with; offset, when set,
+    is how many bytes of the clip the server has (the client resumes from there)."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+def uploads_folder(module_folder):
+    return os.path.join(module_folder, UPLOADS_DIR)
+
+def _clip_paths(module_folder, index):
+    base = os.path.join(uploads_folder(module_folder), str(index))
+    return f"{base}.json", f"{base}.part"
+
+def _lock(part):
+    """Takes the clip's exclusive lock on its open .part file, held until the file is closed."""
+    if fcntl is not None:
+        fcntl.flock(part, fcntl.LOCK_EX)
+    else:
+        # Locks the first byte (allowed past the end of the file); retries for up to 10 s
+        part.seek(0)
+        msvcrt.locking(part.fileno(), msvcrt.LK_LOCK, 1)
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def start_upload(module_folder, total):
+    """Opens the module for chunked uploads of `total` clips."""
+    os.makedirs(uploads_folder(module_folder), exist_ok=True)
+    _write_json(os.path.join(uploads_folder(module_folder), UPLOAD_FILE), {'total': total})
+
+def upload_total(module_folder):
+    """Number of clips announced for the module's upload, or None if it has no upload open."""
+    upload = _read_json(os.path.join(uploads_folder(module_folder), UPLOAD_FILE))
+    return upload['total'] if upload else None
+
+def upload_last_activity(module_folder):
+    """Time (epoch seconds) anything of the module's open upload last changed, or None without one."""
+    folder = uploads_folder(module_folder)
+    try:
+        return max((entry.stat().st_mtime for entry in os.scandir(folder)), default=os.path.getmtime(folder))
+    except FileNotFoundError:
+        return None
+
+def init_clip(module_folder, index, name, filename, size, sha256, transcript=''):
+    """
+    Announces clip `index` (its name, original file name, size and SHA-256). Announcing a
+    clip again with the same size and checksum resumes it; anything else starts it over.
+    Returns the clip's state (see clip_state).
+    """
+    total = upload_total(module_folder)
+    if total is None:
+        raise UploadError("Upload is not open", 409)
+    if not 0 <= index < total:
+        raise UploadError(f"Clip index must be between 0 and {total - 1}")
+    if not name or not name.strip():
+        raise UploadError("Clip name is required")
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError("Clip size must be a positive number of bytes")
+    if not isinstance(sha256, str) or len(sha256) != 64:
+        raise UploadError("Clip sha256 must be a hex SHA-256 digest")
+
+    meta_path, part_path = _clip_paths(module_folder, index)
+    if _finalized_match(_read_json(meta_path), size, sha256):
+        return clip_state(module_folder, index)
+
+    with open(part_path, 'ab') as part:
+        _lock(part)
+        meta = _read_json(meta_path)
+        if meta and meta['finalized']:
+            # Finalized while this request waited for the lock: the file opening it created goes
+            os.remove(part_path)
+            _finalized_match(meta, size, sha256)
+            return clip_state(module_folder, index)
+        if meta and meta['size'] == size and meta['sha256'] == sha256.lower():
+            return clip_state(module_folder, index)
+
+        _, extension = os.path.splitext(secure_filename(filename or ''))
+        meta = {
+            'index': index,
+            'name': name.strip(),
+            'extension': extension,
+            'size': size,
+            'sha256': sha256.lower(),
+            'transcript': (transcript or '').strip(),
+            'offset': 0,
+            'finalized': False,
+        }
+        part.truncate(0)
+        _write_json(meta_path, meta)
+    return clip_state(module_folder, index)
+
+def _finalized_match(meta, size, sha256):
+    """
+    Whether meta is of a finalized clip with this size and checksum (announcing it again is a
+    no-op). A finalized clip can't be replaced: a different one raises UploadError.
+    """
+    if not meta or not meta['finalized']:
+        return False
+    if meta['size'] != size or meta['sha256'] != sha256.lower():
+        raise UploadError("Clip is already finalized with different content", 409, meta['offset'])
+    return True
+
+def clip_state(module_folder, index):
+    """{'index', 'size', 'offset', 'finalized'} of an announced clip, or None."""
+    meta = _read_json(_clip_paths(module_folder, index)[0])
+    if meta is None:
+        return None
+    return {key: meta[key] for key in ('index', 'size', 'offset', 'finalized')}
+
+def append_chunk(module_folder, index, offset, stream, length, sha256=None) -> int:
+    """
+    Appends `length` bytes read from `stream` at `offset` of clip `index`, streamed straight
+    to disk. The chunk only counts once it is complete, matches sha256 (when given) and is
+    flushed; a chunk at any other offset than the acknowledged one is refused with the
+    offset to resume from. Returns the new acknowledged offset.
+    """
+    meta_path, part_path = _clip_paths(module_folder, index)
+    if not os.path.exists(meta_path):
+        raise UploadError("Clip was not announced", 404)
+    if length is None or length <= 0 or length > MAX_CHUNK_BYTES:
+        raise UploadError(f"Chunks must be between 1 and {MAX_CHUNK_BYTES} bytes")
+
+    try:
+        part = open(part_path, 'r+b')
+    except FileNotFoundError:
+        # Moved into the module folder by finalize_clip
+        raise UploadError("Clip is already finalized", 409, _read_json(meta_path)['offset']) from None
+
+    with part:
+        # One writer per clip, whichever web worker the chunk landed on
+        _lock(part)
+        meta = _read_json(meta_path)
+        if meta['finalized']:
+            raise UploadError("Clip is already finalized", 409, meta['offset'])
+        if offset != meta['offset']:
+            raise UploadError("Chunk is not at the acknowledged offset", 409, meta['offset'])
+        if offset + length > meta['size']:
+            raise UploadError("Chunk runs past the announced clip size", 400, meta['offset'])
+
+        # Bytes past the acknowledged offset are from a chunk that never completed
+        part.truncate(offset)
+        part.seek(offset)
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            while received < length:
+                data = stream.read(min(1024 * 1024, length - received))
+                if not data:
+                    break
+                digest.update(data)
+                part.write(data)
+                received += len(data)
+            if received != length:
+                raise UploadError("Chunk was cut short", 400, offset)
+            if sha256 and digest.hexdigest() != sha256.lower():
+                raise UploadError("Chunk checksum mismatch", 400, offset)
+            part.flush()
+            os.fsync(part.fileno())
+        except BaseException:
+            part.truncate(offset)
+            raise
+
+        meta['offset'] = offset + length
+        _write_json(meta_path, meta)
+    return meta['offset']
+
+def finalize_clip(module_folder, index):
+    """
+    Checks that clip `index` arrived in full and matches its checksum, then moves it into the
+    module folder as the raw upload. Returns its job task (see upload_tasks).
+    """
+    meta_path, part_path = _clip_paths(module_folder, index)
+    meta = _read_json(meta_path)
+    if meta is None:
+        raise UploadError("Clip was not announced", 404)
+    if meta['finalized']:
+        # A retry after a lost response: the part file was already moved away
+        return _clip_task(meta)
+
+    try:
+        part = open(part_path, 'rb')
+    except FileNotFoundError:
+        # Finalized by a concurrent request meanwhile
+        meta = _read_json(meta_path)
+        if meta['finalized']:
+            return _clip_task(meta)
+        raise
+
+    with part:
+        _lock(part)
+        meta = _read_json(meta_path)
+        if not meta['finalized']:
+            if meta['offset'] != meta['size']:
+                raise UploadError("Clip is incomplete", 409, meta['offset'])
+
+            digest = hashlib.sha256()
+            for data in iter(lambda: part.read(1024 * 1024), b''):
+                digest.update(data)
+            if digest.hexdigest() != meta['sha256']:
+                # Start the clip over, its bytes can't be trusted
+                meta['offset'] = 0
+                os.truncate(part_path, 0)
+                _write_json(meta_path, meta)
+                raise UploadError("Clip checksum mismatch", 400, 0)
+
+            os.replace(part_path, os.path.join(module_folder, _clip_task(meta)['raw_file']))
+            meta['finalized'] = True
+            _write_json(meta_path, meta)
+    return _clip_task(meta)
+
+def _clip_task(meta):
+    # Same file naming as a form upload to create_module
+    return {
+        'raw_file': f"temp_{meta['index']}{meta['extension']}",
+        'wav_file': f"{secure_filename(meta['name'])}.wav",
+        'real_name': meta['name'],
+        'transcript_text': meta['transcript'],
+    }
+
+def upload_tasks(module_folder):
+    """Job tasks of every clip, in order, once all of them are finalized."""
+    total = upload_total(module_folder)
+    if total is None:
+        raise UploadError("Upload is not open", 409)
+
+    tasks = []
+    missing = []
+    for index in range(total):
+        meta = _read_json(_clip_paths(module_folder, index)[0])
+        if meta is None or not meta['finalized']:
+            missing.append(index)
+        else:
+            tasks.append(_clip_task(meta))
+    if missing:
+        raise UploadError(f"Clips not finalized yet: {missing}", 409)
+    return tasks
+
+def close_upload(module_folder):
+    """Removes the upload state once the module's job is queued."""
+    folder = uploads_folder(module_folder)
+    for filename in os.listdir(folder):
+        os.remove(os.path.join(folder, filename))
+    os.rmdir(folder)
@@ -0,0 +1,45 @@
+import json
+import os
+
+# Append-only record of the clips of a module that finished processing
+JOURNAL_FILE = '.journal.jsonl'
+
+def journal_path(module_folder):
+    return os.path.join(module_folder, JOURNAL_FILE)
+
+def append_journal(module_folder, index, filename, entry):
+    """
+    Durably records that clip `index` (stored as `filename`) finished with `entry`
+    (None when the clip failed). One JSON line per clip, flushed to disk before returning.
+    """
+    line = json.dumps({'index': index, 'filename': filename, 'entry': entry})
+    with open(journal_path(module_folder), 'a') as f:
+        f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(module_folder) -> dict:
+    """
+    Returns {clip index: record} of the clips already processed. A line torn by
+    a crash mid-write is ignored (that clip is simply processed again).
+    """
+    records = {}
+    path = journal_path(module_folder)
+    if not os.path.exists(path):
+        return records
+
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record['index']] = record
+    return records
+
+def clear_journal(module_folder):
+    """Removes the journal once the module's results are written in full."""
+    try:
+        os.remove(journal_path(module_folder))
+    except FileNotFoundError:
+        pass
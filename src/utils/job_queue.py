@@ -0,0 +1,173 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Number of worker processes used for per-clip work (default: one per core)
+WORKER_PROCESSES = int(os.environ.get('AEROAR_WORKERS', 0)) or os.cpu_count() or 1
+
+# A job that keeps crashing the pool is given up after this many attempts
+MAX_JOB_ATTEMPTS = 3
+
+class JobQueue:
+    """
+    Persistent FIFO queue of processing jobs backed by a folder of JSON files.
+
+    Jobs are handled one at a time by a dispatcher thread; the handler receives the
+    job payload and a shared process pool to fan its work out on. A job file is only
+    removed once its handler returned, so anything in flight when the process died
+    is picked up again on the next start. Only crashes count toward MAX_JOB_ATTEMPTS:
+    a job interrupted by stop() (e.g. a deploy) gets its attempt back.
+    """
+
+    def __init__(self, jobs_folder, handler, max_workers=WORKER_PROCESSES,
+                 initializer=None, on_give_up=None, poll_interval=2.0):
+        self.jobs_folder = jobs_folder
+        self.handler = handler
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.on_give_up = on_give_up
+        self.poll_interval = poll_interval
+
+        self._executor = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = False
+        # (job path, job) of the job the handler is running
+        self._running = None
+        self._lock = threading.Lock()
+
+        os.makedirs(self.jobs_folder, exist_ok=True)
+
+    def submit(self, job_id, payload):
+        """Persists a job and wakes the dispatcher. Returns the job file path."""
+        # Zero-padded timestamp prefix keeps the folder listing in FIFO order
+        filename = f"{time.time_ns():020d}-{job_id}.json"
+        job_path = os.path.join(self.jobs_folder, filename)
+
+        job = {'id': job_id, 'attempts': 0, 'payload': payload}
+        self._write_job(job_path, job)
+
+        self._wakeup.set()
+        return job_path
+
+    def pending(self):
+        """Returns the paths of all queued jobs, oldest first."""
+        try:
+            names = sorted(n for n in os.listdir(self.jobs_folder) if n.endswith('.json'))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.jobs_folder, n) for n in names]
+
+    def pending_ids(self):
+        """Returns the ids of all queued jobs."""
+        return {os.path.basename(p)[:-len('.json')].split('-', 1)[1] for p in self.pending()}
+
+    @property
+    def depth(self):
+        return len(self.pending())
+
+    def start(self):
+        """Starts the dispatcher thread. Jobs left over from a previous run are resumed."""
+        if self._thread is not None:
+            return
+
+        leftover = self.depth
+        if leftover:
+            print(f"Resuming {leftover} queued job(s) from {self.jobs_folder}")
+
+        self._thread = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        with self._lock:
+            if self._running is not None:
+                job_path, job = self._running
+                self._running = None
+                self._write_job(job_path, dict(job, attempts=job['attempts'] - 1))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawned workers don't inherit the server's threads or locks
+            context = multiprocessing.get_context('spawn')
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=self.initializer,
+            )
+        return self._executor
+
+    def _dispatch_loop(self):
+        while not self._stopping:
+            jobs = self.pending()
+            if not jobs:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._run_job(jobs[0])
+
+    def _run_job(self, job_path):
+        try:
+            with open(job_path, 'r') as f:
+                job = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Discarding unreadable job {job_path}: {e}")
+            self._remove(job_path)
+            return
+
+        if job['attempts'] >= MAX_JOB_ATTEMPTS:
+            print(f"Giving up on job {job['id']} after {job['attempts']} attempts")
+            if self.on_give_up:
+                self.on_give_up(job['payload'])
+            self._remove(job_path)
+            return
+
+        # Count the attempt before running so a crash mid-job still counts
+        with self._lock:
+            if self._stopping:
+                return
+            job['attempts'] += 1
+            self._write_job(job_path, job)
+            self._running = (job_path, job)
+
+        try:
+            self.handler(job['payload'], self._get_executor())
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); start a fresh pool and retry the job
+            print(f"Worker pool broke while running job {job['id']}: {e}")
+            with self._lock:
+                self._running = None
+            self._executor = None
+            return
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+
+        with self._lock:
+            if self._running is None:
+                # Interrupted by stop(): resumed on the next start
+                return
+            self._running = None
+            self._remove(job_path)
+
+    def _write_job(self, job_path, job):
+        tmp_path = f"{job_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, job_path)
+
+    def _remove(self, job_path):
+        try:
+            os.remove(job_path)
+        except OSError:
+            pass
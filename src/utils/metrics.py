@@ -0,0 +1,258 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the histogram buckets, from fast requests to whole-module stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Each process publishes a snapshot this often at most (see Metrics.flush)
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+# Snapshots not rewritten for this long are dropped, even when their pid is in use
+# (by now a different process, e.g. after a container restart)
+METRICS_STALE_SECONDS = float(os.environ.get('METRICS_STALE_SECONDS', 24 * 3600))
+# Temporary files older than this were left by a crash mid-write
+PART_FILE_SECONDS = 60
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _labels_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    """
+    Counters, gauges and histograms in the Prometheus text format.
+    Web workers and the job worker are separate processes: each one periodically
+    writes a snapshot of its own metrics to a shared folder, and render() merges them
+    (counters and histograms are summed, the most recent value of a gauge wins).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.folder = None
+        self._help = {}
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._collectors = []
+        self._published = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def configure(self, folder):
+        """Sets the folder the processes share their snapshots through."""
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.prune()
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def add_collector(self, collector):
+        """collector() is called before each snapshot to refresh values kept elsewhere."""
+        self._collectors.append(collector)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_total(self, name, value, **labels):
+        """Sets a counter whose running total is tracked elsewhere (e.g. cache hits)."""
+        with self._lock:
+            self._counters[(name, _labels_key(labels))] = value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels_key(labels))] = (value, time.time())
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][bisect.bisect_left(self.buckets, value)] += 1
+            histogram[1] += value
+
+    def publish(self, key, value):
+        """Attaches JSON data to this process's snapshot for the other processes to read (not rendered)."""
+        with self._lock:
+            self._published[key] = value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes how long the with-block took, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'time': time.time(),
+                'counters': [[name, list(map(list, key)), value] for (name, key), value in self._counters.items()],
+                'gauges': [[name, list(map(list, key)), value, at] for (name, key), (value, at) in self._gauges.items()],
+                'histograms': [
+                    [name, list(map(list, key)), list(counts), total]
+                    for (name, key), (counts, total) in self._histograms.items()
+                ],
+                'published': dict(self._published),
+            }
+
+    def flush(self, force=False):
+        """Writes this process's snapshot for the others to merge, at most every METRICS_FLUSH_SECONDS."""
+        now = time.monotonic()
+        if self.folder is None or (not force and now - self._last_flush < METRICS_FLUSH_SECONDS):
+            return
+        self._last_flush = now
+        path = os.path.join(self.folder, f"{os.getpid()}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def prune(self):
+        """Removes the snapshots of processes that exited and temporary files left by crashes."""
+        if self.folder is None:
+            return
+        now = time.time()
+        own = f"{os.getpid()}.json"
+        for filename in os.listdir(self.folder):
+            path = os.path.join(self.folder, filename)
+            try:
+                age = now - os.path.getmtime(path)
+                if filename.endswith('.part'):
+                    stale = age > PART_FILE_SECONDS
+                elif filename.endswith('.json') and filename != own:
+                    pid = filename[:-len('.json')]
+                    stale = age > METRICS_STALE_SECONDS or (pid.isdigit() and not _pid_alive(int(pid)))
+                else:
+                    stale = False
+                if stale:
+                    os.remove(path)
+            except FileNotFoundError:
+                # Replaced or removed by another process meanwhile
+                continue
+
+    def _snapshots(self):
+        """This process's live metrics, then the latest snapshot of every other running process."""
+        snapshots = [self.snapshot()]
+        if self.folder is None:
+            return snapshots
+        self.prune()
+        own = f"{os.getpid()}.json"
+        for filename in os.listdir(self.folder):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.folder, filename), 'r') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Being replaced, or left half-written by a crash
+                continue
+        return snapshots
+
+    def _merged(self, snapshots):
+        counters, gauges, histograms = {}, {}, {}
+        for snapshot in snapshots:
+            for name, key, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, key)))
+                counters[key] = counters.get(key, 0) + value
+            for name, key, value, at in snapshot['gauges']:
+                key = (name, tuple(map(tuple, key)))
+                if key not in gauges or at > gauges[key][1]:
+                    gauges[key] = (value, at)
+            for name, key, counts, total in snapshot['histograms']:
+                key = (name, tuple(map(tuple, key)))
+                if key not in histograms:
+                    histograms[key] = [[0] * len(counts), 0.0]
+                # Not strict: a snapshot from before a change of buckets mustn't break /metrics
+                histograms[key][0] = [a + b for a, b in zip(histograms[key][0], counts, strict=False)]
+                histograms[key][1] += total
+        return counters, gauges, histograms
+
+    def total(self, name, **labels):
+        """A counter's value summed over every process."""
+        counters, _, _ = self._merged(self._snapshots())
+        return counters.get((name, _labels_key(labels)), 0)
+
+    def published(self, key):
+        """What each process published under key, by pid."""
+        return {
+            snapshot['pid']: snapshot['published'][key]
+            for snapshot in self._snapshots() if key in snapshot.get('published', {})
+        }
+
+    def render(self) -> str:
+        """All processes' metrics, merged, in the Prometheus text exposition format."""
+        counters, gauges, histograms = self._merged(self._snapshots())
+
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            kind, help_text = self._help.get(name, (kind, None))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in sorted(counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for (name, key), (value, _) in sorted(gauges.items()):
+            header(name, 'gauge')
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        for (name, key), (counts, total) in sorted(histograms.items()):
+            header(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts, strict=False):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+# Shared by everything in this process
+metrics = Metrics()
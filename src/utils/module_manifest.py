@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+
+from .lru_cache import LRUCache
+
+# Everything about a module (owner, name, status, progress, transcripts, audio) in one file
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 2
+
+# Files that held module state before the manifest
+LEGACY_FILES = ('trainer.txt', 'name.txt', 'status.txt', 'transcripts.json')
+
+# Parsed manifests of the most recently read modules, keyed by (path, file identity):
+# an edited manifest gets a new key and its stale entry ages out
+MANIFEST_CACHE_SIZE = int(os.environ.get('MANIFEST_CACHE_SIZE', 256))
+_cache = LRUCache(MANIFEST_CACHE_SIZE)
+# Serializes read-modify-write updates within the process
+_update_lock = threading.Lock()
+
+def manifest_path(module_folder):
+    return os.path.join(module_folder, MANIFEST_FILE)
+
+def new_manifest(trainer, name, status, created_at=None) -> dict:
+    return {
+        'version': MANIFEST_VERSION,
+        'trainer': trainer,
+        'name': name,
+        'status': status,
+        'created_at': created_at or time.time(),
+        'done': None,
+        'total': None,
+        'items': [],
+        'audio': {},
+    }
+
+def manifest_identity(module_folder):
+    """
+    Identifies the current version of the module's manifest (None if it has none). The
+    file is always replaced, never edited in place, so its inode/mtime/size change with it.
+    """
+    try:
+        stat = os.stat(manifest_path(module_folder))
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def read_manifest(module_folder):
+    """
+    Returns the module's manifest, or None if it has none. Parsed manifests are cached
+    per process and re-read only when the file changes. Treat the result as read-only.
+    """
+    identity = manifest_identity(module_folder)
+    if identity is None:
+        return None
+
+    path = manifest_path(module_folder)
+    manifest = _cache.get((path, identity))
+    if manifest is None:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        _cache.put((path, identity), manifest)
+    return manifest
+
+def manifest_cache_stats() -> dict:
+    """Hit/miss counts of this process's manifest cache."""
+    return _cache.stats()
+
+def write_manifest(module_folder, manifest):
+    """Writes the whole manifest: to a temporary file, flushed to disk, then renamed over the old one."""
+    path = manifest_path(module_folder)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    manifest = dict(manifest, version=MANIFEST_VERSION)
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def update_manifest(module_folder, **fields) -> dict:
+    """Sets the given fields of the module's manifest and writes it. Returns the new manifest."""
+    with _update_lock:
+        manifest = dict(read_manifest(module_folder) or {})
+        manifest.update(fields)
+        write_manifest(module_folder, manifest)
+    return manifest
+
+def _read_text(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+def migrate_module(module_folder) -> bool:
+    """
+    Converts a module that still keeps its state in text files (and an audio-only
+    version 1 manifest) to a manifest, then removes the old files.
+    Returns True if the module was migrated.
+    """
+    existing = read_manifest(module_folder)
+    if existing is not None and existing.get('version', 1) >= MANIFEST_VERSION:
+        return False
+
+    trainer = _read_text(os.path.join(module_folder, 'trainer.txt'))
+    if trainer is None and existing is None:
+        # Not a module folder
+        return False
+
+    items = []
+    json_path = os.path.join(module_folder, 'transcripts.json')
+    if os.path.exists(json_path):
+        with open(json_path, 'r') as f:
+            items = json.load(f)
+
+    manifest = new_manifest(
+        trainer or 'Unknown',
+        _read_text(os.path.join(module_folder, 'name.txt')) or "Untitled Module",
+        _read_text(os.path.join(module_folder, 'status.txt')) or "UNKNOWN",
+        created_at=os.path.getmtime(module_folder)
+    )
+    manifest['items'] = items
+    manifest['audio'] = (existing or {}).get('audio', {})
+    write_manifest(module_folder, manifest)
+
+    for filename in LEGACY_FILES:
+        path = os.path.join(module_folder, filename)
+        if os.path.exists(path):
+            os.remove(path)
+    return True
+
+def migrate_modules(modules_folder) -> int:
+    """Migrates every module folder under modules_folder. Returns how many were migrated."""
+    migrated = 0
+    for folder_name in os.listdir(modules_folder):
+        folder_path = os.path.join(modules_folder, folder_name)
+        if os.path.isdir(folder_path) and not folder_name.startswith('.'):
+            try:
+                migrated += migrate_module(folder_path)
+            except Exception as e:
+                print(f"Error migrating module {folder_name}: {e}")
+    return migrated
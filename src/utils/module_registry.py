@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from .module_manifest import read_manifest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    code TEXT PRIMARY KEY,
+    trainer TEXT NOT NULL,
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    items TEXT,
+    created_at REAL NOT NULL,
+    done INTEGER,
+    total INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_modules_trainer ON modules (trainer, created_at);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    trainer TEXT NOT NULL,
+    code TEXT NOT NULL,
+    status TEXT NOT NULL,
+    done INTEGER,
+    total INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_trainer ON events (trainer, seq);
+"""
+
+# Status events are only needed by clients that are currently connected
+EVENT_RETENTION_SECONDS = 3600
+
+class ModuleRegistry:
+    """
+    SQLite index of module metadata (owner, name, status, content items).
+    The module folders stay the source of truth; the registry is kept in sync on
+    create/delete/status change so listing a trainer's modules is a single indexed
+    query instead of a scan of every module folder.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            # WAL lets the web process read while the worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+            # Registries created before progress tracking
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(modules)")}
+            for column in ('done', 'total'):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE modules ADD COLUMN {column} INTEGER")
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call is safe across threads and processes
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add_module(self, code, trainer, name, status, items=None, created_at=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO modules (code, trainer, name, status, items, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (code, trainer, name, status, _dump_items(items), created_at or time.time())
+            )
+
+    def set_status(self, code, status, items=None):
+        """Updates a module's status, and its content items when given."""
+        with self._connect() as conn:
+            if items is None:
+                conn.execute("UPDATE modules SET status = ? WHERE code = ?", (status, code))
+            else:
+                conn.execute(
+                    "UPDATE modules SET status = ?, items = ? WHERE code = ?",
+                    (status, _dump_items(items), code)
+                )
+
+    def set_progress(self, code, done, total, items=None):
+        """Records how many of the module's clips are processed, and the items finished so far when given."""
+        with self._connect() as conn:
+            if items is None:
+                conn.execute("UPDATE modules SET done = ?, total = ? WHERE code = ?", (done, total, code))
+            else:
+                conn.execute(
+                    "UPDATE modules SET done = ?, total = ?, items = ? WHERE code = ?",
+                    (done, total, _dump_items(items), code)
+                )
+
+    def remove_module(self, code):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM modules WHERE code = ?", (code,))
+
+    def get_module(self, code):
+        """Returns the module as a dict, or None if it isn't registered."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM modules WHERE code = ?", (code,)).fetchone()
+        return _row_to_module(row) if row else None
+
+    def modules_for_trainer(self, trainer):
+        """Returns the trainer's modules, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM modules WHERE trainer = ? ORDER BY created_at", (trainer,)
+            ).fetchall()
+        return [_row_to_module(row) for row in rows]
+
+    def statuses_for_trainer(self, trainer):
+        """Returns {module code: status} for the trainer's modules."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT code, status FROM modules WHERE trainer = ?", (trainer,)
+            ).fetchall()
+        return {row['code']: row['status'] for row in rows}
+
+    def codes_with_status(self, status):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT code FROM modules WHERE status = ?", (status,)).fetchall()
+        return [row['code'] for row in rows]
+
+    def add_event(self, code, status, done=None, total=None):
+        """
+        Records a status transition (or progress update) for the module's trainer.
+        Returns the event sequence number, or None if the module isn't registered.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT trainer FROM modules WHERE code = ?", (code,)).fetchone()
+            if row is None:
+                return None
+            cursor = conn.execute(
+                "INSERT INTO events (trainer, code, status, done, total, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (row['trainer'], code, status, done, total, now)
+            )
+            conn.execute("DELETE FROM events WHERE created_at < ?", (now - EVENT_RETENTION_SECONDS,))
+            return cursor.lastrowid
+
+    def last_event_seq(self):
+        """Returns the newest event sequence number (0 when there are none)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(seq) AS seq FROM events").fetchone()
+        return row['seq'] or 0
+
+    def events_for_trainer(self, trainer, after_seq):
+        """Returns the trainer's events newer than after_seq, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, code, status, done, total FROM events "
+                "WHERE trainer = ? AND seq > ? ORDER BY seq",
+                (trainer, after_seq)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def is_empty(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM modules LIMIT 1").fetchone() is None
+
+    def rebuild(self, modules_folder):
+        """
+        Re-indexes every module folder from its manifest.
+        Used to populate the registry the first time (or after it was deleted).
+        Returns the number of modules indexed.
+        """
+        rows = []
+        for folder_name in os.listdir(modules_folder):
+            folder_path = os.path.join(modules_folder, folder_name)
+            if not os.path.isdir(folder_path):
+                continue
+            try:
+                manifest = read_manifest(folder_path)
+            except Exception as e:
+                print(f"Error reading manifest for {folder_name}: {e}")
+                continue
+            if manifest is None or not manifest.get('trainer'):
+                continue
+
+            rows.append((
+                folder_name,
+                manifest['trainer'],
+                manifest.get('name') or "Untitled Module",
+                manifest.get('status') or "UNKNOWN",
+                _dump_items(manifest.get('items')),
+                manifest.get('created_at') or os.path.getmtime(folder_path),
+                manifest.get('done'),
+                manifest.get('total')
+            ))
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM modules")
+            conn.executemany(
+                "INSERT INTO modules (code, trainer, name, status, items, created_at, done, total) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+def _dump_items(items):
+    return json.dumps(items) if items is not None else None
+
+def _row_to_module(row):
+    module = dict(row)
+    module['items'] = json.loads(module['items']) if module['items'] else []
+    return module
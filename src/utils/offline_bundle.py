@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+from urllib.parse import urlencode
+
+from .audio_store import AUDIO_RENDITIONS, module_audio_names
+from .module_manifest import read_manifest
+
+# Bumped when the bundle layout changes, so clients download every module again
+BUNDLE_FORMAT = 1
+
+# Session pages the service worker keeps for when the network is gone
+BUNDLE_PAGES = ['/', '/scan.html', '/glossary']
+
+def audio_url(module_code, name):
+    """The /audios URL of a module's audio as the scanner requests it (the client appends &format=)."""
+    return f"/audios?{urlencode({'module': module_code, 'name': name})}"
+
+def module_bundle(module_folder, module_code, audio_store):
+    """
+    What the scanner needs to work offline for a module: its audio URLs (with a content
+    version each, so clients only download audio that changed), the glossary items and
+    the pages to keep. 'version' is a content hash of all of it.
+    """
+    manifest = read_manifest(module_folder) or {}
+    digests = manifest.get('audio') or {}
+
+    audios = []
+    for name in module_audio_names(module_folder):
+        digest = digests.get(name)
+        if digest:
+            wav_path = audio_store.audio_path(digest)
+            version = digest
+        else:
+            # Modules from before the audio store keep their own files, which never change
+            wav_path = os.path.join(module_folder, f"{name}.wav")
+            try:
+                stat = os.stat(wav_path)
+            except FileNotFoundError:
+                continue
+            version = f"{stat.st_size}-{stat.st_mtime_ns}"
+
+        base_path, _ = os.path.splitext(wav_path)
+        formats = [ext for ext in AUDIO_RENDITIONS if os.path.exists(f"{base_path}.{ext}")]
+        audios.append({'name': name, 'url': audio_url(module_code, name), 'version': version, 'formats': formats})
+
+    bundle = {
+        'module': module_code,
+        'name': manifest.get('name') or module_code,
+        'audios': audios,
+        'glossary': manifest.get('items', []),
+        'pages': BUNDLE_PAGES,
+    }
+    digest = hashlib.sha256(f"v{BUNDLE_FORMAT}:".encode())
+    digest.update(json.dumps(bundle, sort_keys=True).encode())
+    bundle['version'] = digest.hexdigest()[:16]
+    return bundle
@@ -1,47 +1,493 @@
 import os
-import glob
 import io
+import time
+import uuid
+import hashlib
 import zipfile
 import qrcode
-from werkzeug.utils import secure_filename
-
-def generate_module_qr_zip(module_folder):
-    """
-    Generates a ZIP file containing QR codes for all .wav files in the module folder.
-    Returns a BytesIO object containing the ZIP file data.
-    """
-    # Create in-memory zip
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Find all .wav files
-        wav_files = glob.glob(os.path.join(module_folder, "*.wav"))
-        
-        for wav_path in wav_files:
-            # Strip directory path and extension to get the name
-            filename = os.path.basename(wav_path)
-            name_only = os.path.splitext(filename)[0]
-            
-            # Generate QR Code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image, ImageDraw, ImageFont
+from .audio_store import module_audio_names
+from .module_manifest import read_manifest
+
+# QR rendering settings; bump QR_CACHE_VERSION when the output changes so caches rebuild
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+QR_CACHE_VERSION = 2
+
+# Cached QR artifacts live in a hidden subfolder of the module
+QR_CACHE_DIR = '.qr'
+
+# Printable QR sheets: page sizes in millimetres and the default layout
+SHEET_PAGE_SIZES = {'a4': (210.0, 297.0), 'letter': (215.9, 279.4)}
+SHEET_FORMATS = ('pdf', 'png')
+SHEET_DEFAULT_LAYOUT = {'page': 'a4', 'cols': 3, 'rows': 4, 'dpi': 300}
+SHEET_MARGIN_MM = 10
+SHEET_LABEL_PT = 11
+# Sheets kept per module (layouts and titles of the current contents), least recently used go first
+SHEET_CACHE_SIZE = int(os.environ.get('QR_SHEET_CACHE_SIZE', 8))
+
+# Codes scored per vectorized step (bounds the size of the temporary arrays)
+QR_BATCH_SIZE = 256
+
+# ISO 18004 finder-like patterns penalized by mask evaluation (rule 3)
+_FINDER_PATTERNS = np.array([
+    [1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0],
+    [0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1],
+], dtype=bool)
+
+_data_cells_cache = {}
+
+def _new_qr(data, border):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        border=border,
+    )
+    qr.add_data(data)
+    return qr
+
+def _mask_grid(size) -> np.ndarray:
+    """The eight QR mask patterns (as in qrcode.util.mask_func) over a size x size grid, shape (8, size, size)."""
+    i, j = np.indices((size, size))
+    return np.array([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    ])
+
+def _data_cells(version) -> np.ndarray:
+    """
+    Cells of a version's symbol that hold (masked) data bits. With no data every data
+    cell equals the mask itself, so a cell is data if it follows all eight masks.
+    Cells where all masks agree may be misclassified, which is harmless: XOR-ing
+    masks never flips them.
+    """
+    if version not in _data_cells_cache:
+        qr = qrcode.QRCode(version=version, error_correction=qrcode.constants.ERROR_CORRECT_L)
+        qr.data_cache = []
+        masks = _mask_grid(version * 4 + 17)
+
+        follows_mask = []
+        for pattern in range(8):
+            qr.makeImpl(True, pattern)
+            follows_mask.append(np.array(qr.modules, dtype=bool) == masks[pattern])
+        _data_cells_cache[version] = np.logical_and.reduce(follows_mask)
+    return _data_cells_cache[version]
+
+def _mask_penalties(symbols) -> np.ndarray:
+    """
+    ISO 18004 mask penalty for a stack of symbols, shape (count, size, size).
+    Vectorized equivalent of qrcode.util.lost_point.
+    """
+    size = symbols.shape[-1]
+    penalties = np.zeros(len(symbols), dtype=np.int64)
+
+    for lines in (symbols, symbols.swapaxes(1, 2)):
+        # Rule 1: runs of 5+ same-colored modules score length - 2. A run of length L
+        # contains L - 4 uniform windows of 5, plus 2 counted at the window starting it.
+        same = lines[:, :, 1:] == lines[:, :, :-1]
+        uniform = sliding_window_view(same, 4, axis=2).all(axis=3)
+        run_start = np.ones_like(uniform)
+        run_start[:, :, 1:] = ~same[:, :, :size - 5]
+        penalties += uniform.sum(axis=(1, 2)) + 2 * (uniform & run_start).sum(axis=(1, 2))
+
+        # Rule 3: 1:1:3:1:1 finder-like patterns next to 4 light modules
+        windows = sliding_window_view(lines, 11, axis=2)
+        finder_like = (windows[:, :, :, None, :] == _FINDER_PATTERNS).all(axis=4).any(axis=3)
+        penalties += 40 * finder_like.sum(axis=(1, 2))
+
+    # Rule 2: 2x2 blocks of one color
+    top_left = symbols[:, :-1, :-1]
+    blocks = (top_left == symbols[:, 1:, :-1]) & (top_left == symbols[:, :-1, 1:]) & (top_left == symbols[:, 1:, 1:])
+    penalties += 3 * blocks.sum(axis=(1, 2))
+
+    # Rule 4: dark/light balance (same float arithmetic as qrcode)
+    for i, dark_count in enumerate(symbols.sum(axis=(1, 2))):
+        percent = float(dark_count) / (size ** 2)
+        penalties[i] += int(abs(percent * 100 - 50) / 5) * 10
+
+    return penalties
+
+def qr_matrices(payloads, border=QR_BORDER) -> list:
+    """
+    Encodes many texts to QR module matrices (border included) as bool arrays, True = dark.
+    The result is identical to qrcode's make(fit=True), but instead of laying out and
+    scoring every mask pattern in Python for each code, each code is laid out once and
+    the eight mask candidates of the whole batch are derived and scored with NumPy.
+    """
+    codes = []
+    for data in payloads:
+        qr = _new_qr(data, border)
+        qr.best_fit(start=qr.version)
+        # Layout with blank format bits (as qrcode scores masks), mask 0 applied
+        qr.makeImpl(True, 0)
+        codes.append(qr)
+
+    by_version = {}
+    for index, qr in enumerate(codes):
+        by_version.setdefault(qr.version, []).append(index)
+
+    best_patterns = [0] * len(codes)
+    for version, indices in by_version.items():
+        size = version * 4 + 17
+        masks = _mask_grid(size)
+        # Switching from mask 0 to mask k flips the data cells where the two masks differ
+        flips = _data_cells(version) & (masks ^ masks[0])
+
+        for start in range(0, len(indices), QR_BATCH_SIZE):
+            chunk = indices[start:start + QR_BATCH_SIZE]
+            base = np.array([codes[i].modules for i in chunk], dtype=bool)
+            candidates = (base[:, None] ^ flips[None]).reshape(-1, size, size)
+            penalties = _mask_penalties(candidates).reshape(len(chunk), 8)
+            # argmin keeps the first lowest score, like qrcode's best_mask_pattern
+            for index, pattern in zip(chunk, penalties.argmin(axis=1), strict=True):
+                best_patterns[index] = int(pattern)
+
+    matrices = []
+    for qr, pattern in zip(codes, best_patterns, strict=True):
+        qr.makeImpl(False, pattern)
+        matrices.append(np.array(qr.get_matrix(), dtype=bool))
+    return matrices
+
+def qr_matrix(data, border=QR_BORDER) -> np.ndarray:
+    """Encodes the text and returns the QR module matrix (border included) as a bool array, True = dark."""
+    return qr_matrices([data], border)[0]
+
+def rasterize_qr(matrix, box_size=QR_BOX_SIZE) -> np.ndarray:
+    """Scales a module matrix to pixels (box_size x box_size per module). True = white, as in a 1-bit image."""
+    return ~np.repeat(np.repeat(matrix, box_size, axis=0), box_size, axis=1)
+
+def qr_matrix_to_svg(matrix, box_size=QR_BOX_SIZE) -> bytes:
+    """Renders a module matrix as an SVG document (one path, a run per horizontal stretch of dark modules)."""
+    size = matrix.shape[0] * box_size
+    path = []
+    for y, row in enumerate(matrix):
+        # Start/end columns of each run of dark modules in this row
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False])).astype(np.int8)))
+        for start, end in zip(edges[::2], edges[1::2], strict=True):
+            path.append(f"M{start * box_size},{y * box_size}h{(end - start) * box_size}v{box_size}h-{(end - start) * box_size}z")
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">'
+        f'<rect width="100%" height="100%" fill="white"/>'
+        f'<path fill="black" d="{"".join(path)}"/></svg>'
+    ).encode()
+
+def render_qr_batch(payloads, box_size=QR_BOX_SIZE, border=QR_BORDER, fmt='png') -> list:
+    """
+    Renders many QR codes at once. The payloads are encoded together (see qr_matrices),
+    each matrix is scaled with NumPy and written straight to a 1-bit PNG (or an SVG with fmt='svg').
+    Returns the image bytes in payload order.
+    """
+    images = []
+    for matrix in qr_matrices(payloads, border):
+        if fmt == 'svg':
+            images.append(qr_matrix_to_svg(matrix, box_size))
+            continue
+
+        img_buffer = io.BytesIO()
+        Image.fromarray(rasterize_qr(matrix, box_size)).save(img_buffer, format="PNG")
+        images.append(img_buffer.getvalue())
+    return images
+
+def render_qr_png(data) -> bytes:
+    """Renders a single QR code for the given text and returns the PNG bytes."""
+    return render_qr_batch([data])[0]
+
+def module_qr_names(module_folder):
+    """Returns the scannable names of a module (its audio names), sorted."""
+    return module_audio_names(module_folder)
+
+def module_qr_key(names):
+    """Content hash of a module's QR codes: changes whenever the names or QR settings change."""
+    digest = hashlib.sha256(f"v{QR_CACHE_VERSION}:{QR_BOX_SIZE}:{QR_BORDER}".encode())
+    for name in names:
+        digest.update(b"\0" + name.encode())
+    return digest.hexdigest()[:16]
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink that hands out what ZipFile wrote so far."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_module_qr_zip(module_folder):
+    """
+    Yields a ZIP archive of the module's QR codes chunk by chunk, one PNG at a time, so
+    the first bytes go out as soon as the first batch of codes is rendered and memory
+    stays bounded by a single batch.
+    PNGs are stored uncompressed (they already are compressed). The same bytes are written
+    to the module's QR cache, and the archive becomes the cached copy once it is complete.
+    """
+    names = module_qr_names(module_folder)
+    cache_folder = os.path.join(module_folder, QR_CACHE_DIR)
+    png_folder = os.path.join(cache_folder, 'png')
+    os.makedirs(png_folder, exist_ok=True)
+
+    zip_path = module_qr_zip_path(module_folder, names)
+    # Unique temporary name so concurrent downloads don't write into the same file
+    tmp_path = f"{zip_path}.{uuid.uuid4().hex}.part"
+    stream = _ZipStream()
+
+    try:
+        with open(tmp_path, 'wb') as cache_file:
+            zip_file = zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED)
+            for name, png in zip(names, _cached_qr_pngs(png_folder, names), strict=True):
+                zip_file.writestr(f"{name}.png", png)
+                chunk = stream.take()
+                cache_file.write(chunk)
+                yield chunk
+
+            # Closing writes the central directory
+            zip_file.close()
+            chunk = stream.take()
+            cache_file.write(chunk)
+            yield chunk
+
+        os.replace(tmp_path, zip_path)
+        _prune_qr_cache(cache_folder, png_folder, names, zip_path)
+    finally:
+        # Client went away (or rendering failed) before the archive was complete
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def build_module_qr_cache(module_folder):
+    """
+    Renders the module's QR PNGs and ZIP archive into <module>/.qr/, reusing PNGs that
+    are already cached. The archive is named after the module content hash; archives
+    for older contents are removed. Returns the path of the ZIP file.
+    """
+    for _ in stream_module_qr_zip(module_folder):
+        pass
+    return module_qr_zip_path(module_folder)
+
+def _cached_qr_pngs(png_folder, names):
+    """
+    Yields the PNG of each name. Individual QR codes only depend on their name, so they
+    survive content changes; codes missing from the cache are rendered QR_BATCH_SIZE at a time.
+    """
+    for start in range(0, len(names), QR_BATCH_SIZE):
+        chunk = names[start:start + QR_BATCH_SIZE]
+        missing = [name for name in chunk if not os.path.exists(os.path.join(png_folder, f"{name}.png"))]
+        for name, png in zip(missing, render_qr_batch(missing), strict=True):
+            _write_atomic(os.path.join(png_folder, f"{name}.png"), png)
+
+        for name in chunk:
+            with open(os.path.join(png_folder, f"{name}.png"), 'rb') as f:
+                yield f.read()
+
+def _prune_qr_cache(cache_folder, png_folder, names, zip_path):
+    """Removes PNGs of codes that no longer exist and archives built for older contents."""
+    for filename in os.listdir(png_folder):
+        if filename.endswith('.png') and os.path.splitext(filename)[0] not in names:
+            os.remove(os.path.join(png_folder, filename))
+
+    for filename in os.listdir(cache_folder):
+        path = os.path.join(cache_folder, filename)
+        if filename.startswith('qr-') and filename.endswith('.zip') and path != zip_path:
+            os.remove(path)
+
+def module_qr_zip_path(module_folder, names=None):
+    """Path of the cached QR archive for the module's current contents (may not exist yet)."""
+    if names is None:
+        names = module_qr_names(module_folder)
+    return os.path.join(module_folder, QR_CACHE_DIR, f"qr-{module_qr_key(names)}.zip")
+
+def cached_module_qr_zip(module_folder):
+    """Returns the path of the cached QR archive if it matches the module contents, else None."""
+    zip_path = module_qr_zip_path(module_folder)
+    return zip_path if os.path.exists(zip_path) else None
+
+def module_qr_labels(module_folder, names):
+    """Display names for the module's codes from its manifest, falling back to the code itself."""
+    labels = {}
+    try:
+        for item in (read_manifest(module_folder) or {}).get('items', []):
+            labels[os.path.splitext(item.get('filename') or '')[0]] = item.get('name')
+    except Exception as e:
+        print(f"Error reading QR labels: {e}")
+    return [labels.get(name) or name for name in names]
+
+def _fit_text(draw, text, font, width):
+    """Shortens text with an ellipsis until it fits the given pixel width."""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    # Binary search for the longest prefix that fits (measuring text is slow)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if draw.textlength(f"{text[:middle]}\u2026", font=font) <= width:
+            low = middle
+        else:
+            high = middle - 1
+    return f"{text[:low]}\u2026"
+
+def iter_qr_sheets(pngs, labels, page='a4', cols=3, rows=4, dpi=300, title=None):
+    """
+    Lays out pre-rendered QR PNGs with their labels on print pages, cols x rows codes per page.
+    Codes are scaled by whole pixels per module so they stay sharp at any DPI.
+    Yields one 1-bit page image at a time.
+    """
+    def px(mm):
+        return int(round(mm / 25.4 * dpi))
+
+    page_width, page_height = (px(mm) for mm in SHEET_PAGE_SIZES[page])
+    margin = px(SHEET_MARGIN_MM)
+    cell_width = (page_width - 2 * margin) // cols
+    cell_height = (page_height - 2 * margin) // rows
+
+    font = ImageFont.load_default(size=max(8, SHEET_LABEL_PT * dpi // 72))
+    footer_font = ImageFont.load_default(size=max(6, (SHEET_LABEL_PT - 3) * dpi // 72))
+    label_height = int(font.size * 1.6)
+    qr_space = min(cell_width, cell_height - label_height)
+
+    per_page = cols * rows
+    page_count = max(1, -(-len(pngs) // per_page))
+    for page_index in range(page_count):
+        sheet = Image.new('1', (page_width, page_height), 1)
+        draw = ImageDraw.Draw(sheet)
+
+        start = page_index * per_page
+        for slot, (png, label) in enumerate(zip(pngs[start:start + per_page], labels[start:start + per_page], strict=True)):
+            img = Image.open(io.BytesIO(png))
+            modules = img.width // QR_BOX_SIZE
+            size = modules * max(1, qr_space // modules)
+            if size != img.width:
+                img = img.resize((size, size), Image.NEAREST)
+
+            left = margin + (slot % cols) * cell_width
+            top = margin + (slot // cols) * cell_height
+            sheet.paste(img, (left + (cell_width - size) // 2, top + (qr_space - size) // 2))
+            draw.text(
+                (left + cell_width // 2, top + qr_space + label_height // 2),
+                _fit_text(draw, label, font, cell_width - margin // 2),
+                fill=0, font=font, anchor='mm'
             )
-            qr.add_data(name_only)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Save QR image to memory
-            img_buffer = io.BytesIO()
-            img.save(img_buffer, format="PNG")
-            img_buffer.seek(0)
-            
-            # Add to ZIP
-            # We'll name the QR file same as the audio file but with .png
-            zip_file.writestr(f"{name_only}.png", img_buffer.getvalue())
-            
-    zip_buffer.seek(0)
-    return zip_buffer
+
+        footer = f"{title} \u2013 page {page_index + 1}/{page_count}" if title else f"Page {page_index + 1}/{page_count}"
+        draw.text((page_width // 2, page_height - margin // 2), footer, fill=0, font=footer_font, anchor='mm')
+        yield sheet
+
+def sheet_layout(page=None, cols=None, rows=None, dpi=None) -> dict:
+    """Validated sheet layout; missing values take the defaults. Raises ValueError on bad input."""
+    layout = dict(SHEET_DEFAULT_LAYOUT)
+    layout.update({k: v for k, v in (('page', page), ('cols', cols), ('rows', rows), ('dpi', dpi)) if v is not None})
+    layout['page'] = str(layout['page']).lower()
+    layout['cols'], layout['rows'], layout['dpi'] = int(layout['cols']), int(layout['rows']), int(layout['dpi'])
+
+    if layout['page'] not in SHEET_PAGE_SIZES:
+        raise ValueError(f"Unknown page size: {layout['page']}")
+    if not (1 <= layout['cols'] <= 10 and 1 <= layout['rows'] <= 12):
+        raise ValueError("Grid must be 1-10 columns by 1-12 rows")
+    if not 72 <= layout['dpi'] <= 600:
+        raise ValueError("DPI must be between 72 and 600")
+    return layout
+
+def module_qr_sheet_path(module_folder, fmt='pdf', layout=None, title=None):
+    """
+    Path of the cached print sheets for the module's current contents, labels, title and
+    layout (may not exist yet). PNG sheets are a ZIP with one image per page.
+    """
+    layout = layout or sheet_layout()
+    names = module_qr_names(module_folder)
+    digest = hashlib.sha256(module_qr_key(names).encode())
+    for label in module_qr_labels(module_folder, names) + [title or '']:
+        digest.update(b"\0" + label.encode())
+
+    layout_key = f"{layout['page']}-{layout['cols']}x{layout['rows']}-{layout['dpi']}"
+    extension = 'pdf' if fmt == 'pdf' else 'zip'
+    return os.path.join(module_folder, QR_CACHE_DIR, f"sheet-{digest.hexdigest()[:16]}-{layout_key}.{extension}")
+
+def build_module_qr_sheet(module_folder, fmt='pdf', layout=None, title=None):
+    """
+    Renders the module's QR codes with their names onto printable pages (a PDF, or a ZIP of
+    PNG pages) in <module>/.qr/, from the cached QR PNGs. Sheets built for older contents are
+    removed. Returns the path; an existing sheet is returned as is.
+    """
+    if fmt not in SHEET_FORMATS:
+        raise ValueError(f"Unknown sheet format: {fmt}")
+    layout = layout or sheet_layout()
+
+    sheet_path = module_qr_sheet_path(module_folder, fmt, layout, title)
+    if os.path.exists(sheet_path):
+        # The access time orders the cached sheets by last use (set explicitly: mounts may skip it)
+        os.utime(sheet_path, (time.time(), os.path.getmtime(sheet_path)))
+        return sheet_path
+
+    names = module_qr_names(module_folder)
+    png_folder = os.path.join(module_folder, QR_CACHE_DIR, 'png')
+    os.makedirs(png_folder, exist_ok=True)
+    pages = iter_qr_sheets(list(_cached_qr_pngs(png_folder, names)), module_qr_labels(module_folder, names), title=title, **layout)
+
+    tmp_path = f"{sheet_path}.{uuid.uuid4().hex}.part"
+    try:
+        if fmt == 'pdf':
+            # Appended one page at a time: a 300 dpi page is ~9 MB in memory, so
+            # holding them all for save_all would grow with the module
+            for number, page in enumerate(pages):
+                page.save(tmp_path, format='PDF', append=number > 0, resolution=layout['dpi'])
+        else:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zip_file:
+                for number, page in enumerate(pages, start=1):
+                    img_buffer = io.BytesIO()
+                    page.save(img_buffer, format='PNG', dpi=(layout['dpi'], layout['dpi']))
+                    zip_file.writestr(f"page-{number:03d}.png", img_buffer.getvalue())
+        os.replace(tmp_path, sheet_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _prune_sheet_cache(sheet_path)
+    return sheet_path
+
+def _prune_sheet_cache(sheet_path):
+    """
+    Sheets of older contents go; other layouts of the current contents stay cached,
+    up to SHEET_CACHE_SIZE of them.
+    """
+    content_prefix = os.path.basename(sheet_path).split('-')[1]
+    cache_folder = os.path.dirname(sheet_path)
+    current = []
+    for filename in os.listdir(cache_folder):
+        if not filename.startswith('sheet-') or filename.endswith('.part'):
+            continue
+        path = os.path.join(cache_folder, filename)
+        if filename.split('-')[1] != content_prefix:
+            os.remove(path)
+        else:
+            current.append(path)
+
+    current.sort(key=os.path.getatime, reverse=True)
+    for path in current[SHEET_CACHE_SIZE:]:
+        if path != sheet_path:
+            os.remove(path)
+
+def _write_atomic(path, data):
+    # Unique temporary name: concurrent downloads render the same missing PNGs
+    tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
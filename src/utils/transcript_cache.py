@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_last_used ON transcripts (last_used);
+"""
+
+# Shared by every worker process; transcripts are small so this holds a lot of clips
+TRANSCRIPT_CACHE_PATH = os.environ.get(
+    'TRANSCRIPT_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modules', '.transcripts.sqlite3')
+)
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+def transcript_key(pcm, model) -> str:
+    """Content address of a clip for a model: the same audio gives the same key in any module."""
+    digest = hashlib.sha256(f"{model}\0".encode())
+    digest.update(pcm)
+    return digest.hexdigest()
+
+class TranscriptCache:
+    """
+    On-disk transcripts keyed by the hash of a clip's decoded PCM and the model that
+    produced them, so a clip reused across modules is only transcribed once.
+    Entries are evicted least recently used first once their total size exceeds max_bytes.
+    """
+
+    def __init__(self, db_path=TRANSCRIPT_CACHE_PATH, max_bytes=TRANSCRIPT_CACHE_MAX_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Returns the cached transcript or None, counting the hit/miss and refreshing its LRU position."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row['text']
+
+    def put(self, key, model, text):
+        """Stores a transcript, then evicts the least recently used entries beyond max_bytes."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, model, text, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, text, len(text.encode()), now, now)
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(conn, total - self.max_bytes)
+
+    def _evict(self, conn, excess):
+        freed = 0
+        rows = conn.execute("SELECT key, size FROM transcripts ORDER BY last_used").fetchall()
+        for row in rows:
+            if freed >= excess:
+                break
+            conn.execute("DELETE FROM transcripts WHERE key = ?", (row['key'],))
+            freed += row['size']
+
+    def stats(self) -> dict:
+        """Hit/miss counts of this process and the size of the shared cache."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS size FROM transcripts").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'entries': row['entries'],
+            'bytes': row['size'],
+            'max_bytes': self.max_bytes,
+        }
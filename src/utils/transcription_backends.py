@@ -0,0 +1,122 @@
+import functools
+import importlib.metadata
+import importlib.util
+import os
+
+# Which engine runs the model: 'whisper' (openai-whisper on PyTorch) or 'faster-whisper'
+# (CTranslate2 with int8-quantized weights, several times faster on CPU, so a larger model
+# fits the same latency). Selected per deployment.
+TRANSCRIPTION_BACKEND = os.environ.get('TRANSCRIPTION_BACKEND', 'whisper')
+
+# faster-whisper weight precision: int8 on CPU, float16 / int8_float16 on GPU
+WHISPER_COMPUTE_TYPE = os.environ.get('WHISPER_COMPUTE_TYPE', 'int8')
+# 1 is greedy decoding, like openai-whisper's default
+WHISPER_BEAM_SIZE = int(os.environ.get('WHISPER_BEAM_SIZE', 1))
+
+def _package_version(package):
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+def _cpu_threads():
+    """Threads per model set by init_worker_process (0 lets the library decide)."""
+    return int(os.environ.get('WHISPER_THREADS') or 0)
+
+class WhisperBackend:
+    """
+    openai-whisper on PyTorch. A backend loads one model and transcribes 16 kHz float32
+    samples to {'text', 'segments': [{'start', 'end', 'text'}]} (seconds into the samples).
+    """
+    name = 'whisper'
+    # Module load() imports, and what to install when it's missing
+    module = 'whisper'
+    install_hint = "pip install openai-whisper"
+
+    def __init__(self, model_name, device):
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+
+    @functools.cached_property
+    def model_id(self):
+        """Model name and package version; cached transcripts are only reused for the same pair."""
+        return f"whisper-{_package_version('openai-whisper')}:{self.model_name}"
+
+    @property
+    def is_loaded(self):
+        return self._model is not None
+
+    def load(self):
+        # Imported lazily, whisper pulls in torch
+        import whisper
+
+        threads = _cpu_threads()
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self._model = whisper.load_model(self.model_name, device=self.device)
+
+    def transcribe(self, samples) -> dict:
+        output = self._model.transcribe(samples, fp16=False)
+        return {
+            'text': output['text'].strip(),
+            'segments': [{
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': segment['text'].strip(),
+            } for segment in output.get('segments', [])],
+        }
+
+class FasterWhisperBackend(WhisperBackend):
+    """Whisper converted to CTranslate2 (faster-whisper), with quantized weights."""
+    name = 'faster-whisper'
+    module = 'faster_whisper'
+    install_hint = "pip install 'aeroar[faster-whisper]'"
+
+    def __init__(self, model_name, device, compute_type=WHISPER_COMPUTE_TYPE, beam_size=WHISPER_BEAM_SIZE):
+        super().__init__(model_name, device)
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+
+    @functools.cached_property
+    def model_id(self):
+        return f"faster-whisper-{_package_version('faster-whisper')}:{self.model_name}:{self.compute_type}"
+
+    def load(self):
+        # Imported lazily, only deployments using this backend need the package
+        from faster_whisper import WhisperModel
+
+        self._model = WhisperModel(
+            self.model_name, device=self.device, compute_type=self.compute_type, cpu_threads=_cpu_threads()
+        )
+
+    def transcribe(self, samples) -> dict:
+        segments, _ = self._model.transcribe(samples, beam_size=self.beam_size)
+        # Segments are decoded lazily, as the generator is consumed
+        segments = [{'start': segment.start, 'end': segment.end, 'text': segment.text.strip()} for segment in segments]
+        return {
+            'text': " ".join(segment['text'] for segment in segments if segment['text']),
+            'segments': segments,
+        }
+
+TRANSCRIPTION_BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+def create_backend(name, model_name, device):
+    """The backend registered as name, for model_name on device. Raises ValueError for unknown names."""
+    try:
+        backend_class = TRANSCRIPTION_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown transcription backend '{name}' (expected one of: {', '.join(TRANSCRIPTION_BACKENDS)})") from None
+    return backend_class(model_name, device)
+
+def check_backend(name):
+    """Raises ValueError for unknown names and ImportError when the backend's package isn't installed."""
+    backend_class = TRANSCRIPTION_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown transcription backend '{name}' (expected one of: {', '.join(TRANSCRIPTION_BACKENDS)})")
+    if importlib.util.find_spec(backend_class.module) is None:
+        raise ImportError(f"Transcription backend '{name}' needs the {backend_class.module} package ({backend_class.install_hint})")
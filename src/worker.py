@@ -0,0 +1,9 @@
+"""
+AeroAR - Background processing worker
+Runs the module job queue without serving HTTP.
+"""
+
+from .app import run_worker
+
+if __name__ == '__main__':
+    run_worker()
@@ -0,0 +1,53 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the project root to the path so we can import the app
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(root_path)
+
+from src.utils.audio_store import AudioStore  # noqa: E402
+from src.utils.module_registry import ModuleRegistry  # noqa: E402
+
+# The app module (it defines the Flask object as app)
+app_module = importlib.import_module('src.app')
+
+class AppTestCase(unittest.TestCase):
+    """
+    Base of the tests that run the app: each test gets a scratch modules folder (tmp_dir)
+    with its own registry and audio store, and a test client (client).
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+        self.registry = ModuleRegistry(os.path.join(self.tmp_dir, 'registry.sqlite3'))
+        store_folder = os.path.join(self.tmp_dir, '.store')
+        self.patch_config(MODULES_FOLDER=self.tmp_dir, AUDIO_STORE_FOLDER=store_folder)
+        self.patch('module_registry', self.registry)
+        self.patch('audio_store', AudioStore(store_folder))
+
+        self.client = app_module.app.test_client()
+
+    def patch(self, name, value):
+        """Replaces the app module's global `name` with value until the test ends."""
+        patcher = mock.patch.object(app_module, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return value
+
+    def patch_config(self, **values):
+        patcher = mock.patch.dict(app_module.app.config, values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, role, **values):
+        """Logs the client in: role 'trainer' (with username) or 'trainee' (with module_code)."""
+        with self.client.session_transaction() as session:
+            session['role'] = role
+            session.update(values)
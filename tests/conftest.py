@@ -0,0 +1,11 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Importing src.app creates its registry, job queue, audio store and metrics folder under
+# the modules folder: point it (and the transcript cache) at a scratch directory first
+_state_folder = tempfile.mkdtemp(prefix='aeroar-tests-')
+os.environ['AEROAR_MODULES_FOLDER'] = _state_folder
+os.environ['TRANSCRIPT_CACHE_PATH'] = os.path.join(_state_folder, '.transcripts.sqlite3')
+atexit.register(shutil.rmtree, _state_folder, ignore_errors=True)
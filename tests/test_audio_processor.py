@@ -11,7 +11,11 @@ warnings.simplefilter("ignore", ResourceWarning)
 src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
 sys.path.append(src_path)
 
-from utils.audio_processor import convert_to_wav, transcribe_audio
+import numpy as np
+
+from utils.audio_processor import convert_to_wav, convert_file_to_wav, transcribe_audio, detect_speech, join_segments
+from utils.audio_processor import plan_windows, stitch_transcriptions, _trimmed_to_clip_time
+from utils.audio_processor import write_wav, read_pcm, pcm_to_samples
 
 class TestAudioProcessor(unittest.TestCase):
     def setUp(self):
@@ -60,5 +64,104 @@ class TestAudioProcessor(unittest.TestCase):
         else:
             self.assertTrue(len(text) > 0, "Transcription returned empty string")
 
+    def test_streaming_conversion(self):
+        """Test the file-to-file conversion path produces a complete WAV"""
+        self.assertTrue(convert_file_to_wav(self.sample_mp3, self.temp_wav), "Streaming conversion failed")
+
+        with open(self.temp_wav, 'rb') as f:
+            header = f.read(16)
+        self.assertTrue(header.startswith(b'RIFF'), "Output does not start with RIFF header")
+        self.assertTrue(b'WAVE' in header, "Output does not contain WAVE format marker")
+        self.assertFalse(os.path.exists(f"{self.temp_wav}.part"), "Temporary output was left behind")
+
+class TestVoiceActivity(unittest.TestCase):
+    RATE = 16000
+
+    def noise(self, seconds):
+        # Background hiss around -60 dBFS
+        return (np.random.default_rng(1).standard_normal(int(seconds * self.RATE)) * 0.001).astype(np.float32)
+
+    def tone(self, seconds):
+        t = np.arange(int(seconds * self.RATE)) / self.RATE
+        return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    def test_silence_is_trimmed(self):
+        samples = np.concatenate([self.noise(1), self.tone(1), self.noise(2), self.tone(0.5), self.noise(1)])
+        segments = detect_speech(samples)
+
+        # Two stretches of speech, each padded by a quarter second
+        self.assertEqual(len(segments), 2)
+        self.assertAlmostEqual(segments[0][0] / self.RATE, 0.75, places=2)
+        self.assertAlmostEqual(segments[1][1] / self.RATE, 4.75, places=1)
+        self.assertLess(len(join_segments(samples, segments)), len(samples) / 2)
+
+    def test_short_pauses_are_kept(self):
+        samples = np.concatenate([self.noise(1), self.tone(1), self.noise(0.4), self.tone(0.5), self.noise(1)])
+        self.assertEqual(len(detect_speech(samples)), 1)
+
+    def test_silent_and_continuous_clips(self):
+        self.assertEqual(detect_speech(np.zeros(self.RATE, dtype=np.float32)), [])
+        self.assertEqual(detect_speech(self.tone(2)), [(0, 2 * self.RATE)])
+
+    def test_short_clip_segments_stay_within_the_clip(self):
+        # 0.12 s: fewer frames than the padding kernel is wide
+        samples = np.concatenate([self.noise(0.06), self.tone(0.03), self.noise(0.03)])
+        segments = detect_speech(samples)
+        self.assertTrue(segments)
+        self.assertLessEqual(segments[-1][1], len(samples))
+
+class TestLongClipWindows(unittest.TestCase):
+    RATE = 16000
+
+    def test_windows_are_cut_in_silence(self):
+        # Speech at 0-20s, 25-40s and 42-50s: the first two don't fit one 30s window
+        segments = [(0, 20 * self.RATE), (25 * self.RATE, 40 * self.RATE), (42 * self.RATE, 50 * self.RATE)]
+        windows = plan_windows(segments, 60 * self.RATE, max_seconds=30)
+        self.assertEqual(windows, [(0, 20 * self.RATE), (25 * self.RATE, 50 * self.RATE)])
+
+    def test_continuous_speech_is_split(self):
+        windows = plan_windows([], 70 * self.RATE, max_seconds=30)
+        self.assertEqual([(start // self.RATE, end // self.RATE) for start, end in windows], [(0, 30), (30, 60), (60, 70)])
+
+    def test_trimmed_timestamps_map_to_clip(self):
+        # Speech at 1-2s and 5-6s, joined with 0.2s of silence in between
+        to_clip = _trimmed_to_clip_time([(self.RATE, 2 * self.RATE), (5 * self.RATE, 6 * self.RATE)])
+        self.assertAlmostEqual(to_clip(0.5), 1.5)
+        self.assertAlmostEqual(to_clip(1.1), 2.0)
+        self.assertAlmostEqual(to_clip(1.7), 5.5)
+
+    def test_stitching_keeps_order(self):
+        parts = [
+            {'text': 'Remove the cowling.', 'duration': 30, 'speech_duration': 25,
+             'segments': [{'start': 1.0, 'end': 4.0, 'text': 'Remove the cowling.'}]},
+            {'text': 'Inspect the mounts.', 'duration': 20, 'speech_duration': 10,
+             'segments': [{'start': 41.0, 'end': 44.0, 'text': 'Inspect the mounts.'}]},
+        ]
+        stitched = stitch_transcriptions(parts, 75.0)
+        self.assertEqual(stitched['text'], 'Remove the cowling. Inspect the mounts.')
+        self.assertEqual((stitched['duration'], stitched['speech_duration']), (75.0, 35))
+        self.assertEqual([segment['start'] for segment in stitched['segments']], [1.0, 41.0])
+
+class TestDecodedPcm(unittest.TestCase):
+    RATE = 16000
+
+    def setUp(self):
+        self.wav_path = os.path.join(os.path.dirname(__file__), 'audios', 'temp_pcm.wav')
+
+    def tearDown(self):
+        if os.path.exists(self.wav_path):
+            os.remove(self.wav_path)
+
+    def test_master_is_written_from_the_decoded_samples(self):
+        pcm = (np.sin(np.arange(3 * self.RATE) / 10) * 8000).astype(np.int16)
+        write_wav(self.wav_path, pcm)
+
+        # Read back as is, whole or one window, without resampling
+        self.assertEqual(read_pcm(self.wav_path), pcm.tobytes())
+        window = read_pcm(self.wav_path, offset=1.0, duration=0.5)
+        self.assertEqual(window, pcm[self.RATE:self.RATE + self.RATE // 2].tobytes())
+        # Arrays and bytes give the same samples
+        np.testing.assert_array_equal(pcm_to_samples(pcm), pcm_to_samples(pcm.tobytes()))
+
 if __name__ == '__main__':
     unittest.main()
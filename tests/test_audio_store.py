@@ -0,0 +1,105 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+from utils.audio_processor import process_clip
+from utils.audio_store import AudioStore, file_hash, manifest_blob, module_audio_names
+from utils.module_manifest import update_manifest
+
+class TestAudioStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = AudioStore(os.path.join(self.tmp_dir, '.store'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def make_file(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_identical_audio_is_stored_once(self):
+        first = [self.make_file('Oil_Filter.wav', b'RIFF-1'), self.make_file('Oil_Filter.opus', b'OggS')]
+        digest = file_hash(first[0])
+        self.store.add(digest, 'AAAAAAAAAA', 'Oil_Filter', first)
+
+        # The same clip in a second module: the new copy is dropped, the blob is shared
+        duplicate = [self.make_file('Filter.wav', b'RIFF-1')]
+        self.store.add(digest, 'BBBBBBBBBB', 'Filter', duplicate)
+
+        self.assertFalse(any(os.path.exists(path) for path in first + duplicate))
+        self.assertEqual(self.store.refcount(digest), 2)
+        with open(self.store.audio_path(digest, 'opus'), 'rb') as f:
+            self.assertEqual(f.read(), b'OggS')
+        self.assertEqual(self.store.stats(), {'blobs': 1, 'bytes': 10, 'references': 2})
+
+    def test_gc_keeps_referenced_blobs(self):
+        shared = file_hash(self.make_file('shared.wav', b'shared'))
+        own = file_hash(self.make_file('own.wav', b'own'))
+        self.store.add(shared, 'AAAAAAAAAA', 'Shared', [os.path.join(self.tmp_dir, 'shared.wav')])
+        self.store.add(shared, 'BBBBBBBBBB', 'Shared', [])
+        self.store.add(own, 'AAAAAAAAAA', 'Own', [os.path.join(self.tmp_dir, 'own.wav')])
+
+        self.store.release_module('AAAAAAAAAA')
+        self.assertEqual(self.store.gc(), (1, 3))
+
+        self.assertTrue(os.path.exists(self.store.audio_path(shared)))
+        self.assertFalse(os.path.exists(self.store.blob_folder(own)))
+        self.assertFalse(self.store.has_blob(own))
+
+    def test_add_ref_only_references_stored_blobs(self):
+        digest = file_hash(self.make_file('shared.wav', b'shared'))
+        self.assertFalse(self.store.add_ref(digest, 'BBBBBBBBBB', 'Shared'))
+
+        self.store.add(digest, 'AAAAAAAAAA', 'Shared', [os.path.join(self.tmp_dir, 'shared.wav')])
+        self.assertTrue(self.store.add_ref(digest, 'BBBBBBBBBB', 'Shared'))
+        self.assertEqual(self.store.refcount(digest), 2)
+
+        # Once collected, the blob can't be referenced without its files again
+        self.store.release_module('AAAAAAAAAA')
+        self.store.release_module('BBBBBBBBBB')
+        self.store.gc()
+        self.assertFalse(self.store.add_ref(digest, 'BBBBBBBBBB', 'Shared'))
+        self.assertEqual(self.store.stats(), {'blobs': 0, 'bytes': 0, 'references': 0})
+
+    def test_clip_of_a_deleted_module_releases_its_audio(self):
+        upload = self.make_file('upload.mp3', b'ID3')
+        digest = file_hash(upload)
+        self.store.add(digest, 'AAAAAAAAAA', 'Oil_Filter', [self.make_file('Oil_Filter.wav', b'RIFF')])
+
+        # Module BBBBBBBBBB was deleted (and released its references) while its clip was processed
+        result = process_clip({
+            'raw_path': upload,
+            'final_wav_path': os.path.join(self.tmp_dir, 'BBBBBBBBBB', 'Oil_Filter.wav'),
+            'real_name': 'Oil Filter',
+            'transcript_text': '',
+            'store_root': self.store.root,
+            'module_code': 'BBBBBBBBBB',
+            'name': 'Oil_Filter',
+        })
+
+        self.assertIsNone(result['entry'])
+        self.assertIsNone(self.store.module_ref('BBBBBBBBBB', 'Oil_Filter'))
+        self.assertEqual(self.store.refcount(digest), 1)
+
+    def test_manifest(self):
+        module_folder = os.path.join(self.tmp_dir, 'AAAAAAAAAA')
+        os.makedirs(module_folder)
+        self.make_file('AAAAAAAAAA/Legacy.wav', b'RIFF')
+        self.assertEqual(module_audio_names(module_folder), ['Legacy'])
+        self.assertIsNone(manifest_blob(module_folder, 'Legacy'))
+
+        update_manifest(module_folder, audio={'Tires': 'b' * 64, 'Brakes': 'a' * 64})
+        self.assertEqual(module_audio_names(module_folder), ['Brakes', 'Tires'])
+        self.assertEqual(manifest_blob(module_folder, 'Tires'), 'b' * 64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+from app_test_case import AppTestCase, app_module
+
+from src.utils.metrics import Metrics
+from src.utils.module_manifest import update_manifest
+
+MODULE_CODE = 'ABCDEF0123'
+
+class TestAudiosEndpoint(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        module_folder = os.path.join(self.tmp_dir, MODULE_CODE)
+        os.makedirs(module_folder)
+
+        # One second of silence
+        with wave.open(os.path.join(module_folder, 'Oil_Filter.wav'), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b'\x00\x00' * 16000)
+
+        self.registry.add_module(MODULE_CODE, 'DemoTrainer', 'Engine', 'COMPLETE')
+        self.login('trainee', module_code=MODULE_CODE)
+
+    def test_demo_audio_outside_the_modules_folder(self):
+        demo_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, demo_folder, ignore_errors=True)
+        shutil.copy(os.path.join(self.tmp_dir, MODULE_CODE, 'Oil_Filter.wav'), demo_folder)
+        with self.client.session_transaction() as session:
+            session.clear()
+
+        with mock.patch.dict(app_module.app.config, {'DEMO_FOLDER': demo_folder}):
+            self.assertEqual(self.client.get('/audios?name=Oil_Filter').status_code, 200)
+
+    def test_path_check_compares_whole_components(self):
+        self.assertTrue(app_module.is_within('/data/modules/ABC/a.wav', '/data/modules'))
+        self.assertFalse(app_module.is_within('/data/modules-evil/a.wav', '/data/modules'))
+
+    def test_range_request(self):
+        response = self.client.get('/audios?name=Oil_Filter', headers={'Range': 'bytes=0-99'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(response.data), 100)
+        self.assertTrue(response.headers['Content-Range'].startswith('bytes 0-99/'))
+
+    def test_conditional_get_and_cache_headers(self):
+        response = self.client.get('/audios?name=Oil_Filter')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertFalse(etag.startswith('W/'), "ETag should be strong")
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertIn('private', response.headers['Cache-Control'])
+        self.assertNotIn('no-cache', response.headers['Cache-Control'])
+        self.assertIn('Cookie', response.headers['Vary'])
+
+        response = self.client.get('/audios?name=Oil_Filter', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_audio_bytes_are_counted(self):
+        fresh = Metrics()
+        with mock.patch.object(app_module, 'metrics', fresh):
+            full = self.client.get('/audios?name=Oil_Filter')
+            self.client.get('/audios?name=Oil_Filter', headers={'Range': 'bytes=0-99'})
+            text = fresh.render()
+
+        self.assertIn(f'aeroar_http_response_bytes_total{{route="/audios"}} {len(full.data) + 100}', text)
+
+    def test_processing_module_is_revalidated(self):
+        self.registry.set_status(MODULE_CODE, 'PROCESSING')
+        response = self.client.get('/audios?name=Oil_Filter')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+
+    def test_rendition_negotiation(self):
+        with open(os.path.join(self.tmp_dir, MODULE_CODE, 'Oil_Filter.opus'), 'wb') as f:
+            f.write(b'OggS' + b'\x00' * 60)
+
+        response = self.client.get('/audios?name=Oil_Filter', headers={'Accept': '*/*'})
+        self.assertEqual(response.mimetype, 'audio/ogg')
+        self.assertIn('Accept', response.headers['Vary'])
+
+        response = self.client.get('/audios?name=Oil_Filter', headers={'Accept': 'audio/wav'})
+        self.assertEqual(response.mimetype, 'audio/wav')
+
+        # Explicit format wins; an unavailable one falls back to negotiation
+        response = self.client.get('/audios?name=Oil_Filter&format=wav', headers={'Accept': '*/*'})
+        self.assertEqual(response.mimetype, 'audio/wav')
+        response = self.client.get('/audios?name=Oil_Filter&format=m4a', headers={'Accept': 'audio/mp4'})
+        self.assertEqual(response.mimetype, 'audio/wav')
+
+    def test_manifest_resolves_to_store(self):
+        module_folder = os.path.join(self.tmp_dir, MODULE_CODE)
+        files = []
+        for extension, data in (('wav', b'RIFF' + b'\x00' * 60), ('opus', b'OggS' + b'\x01' * 60)):
+            files.append(os.path.join(module_folder, f"Torque.{extension}"))
+            with open(files[-1], 'wb') as f:
+                f.write(data)
+        app_module.audio_store.add('c' * 64, MODULE_CODE, 'Torque', files)
+        update_manifest(module_folder, audio={'Torque': 'c' * 64})
+
+        response = self.client.get('/audios?name=Torque', headers={'Accept': 'audio/ogg'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'OggS' + b'\x01' * 60)
+        self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename=Torque.opus')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,204 @@
+import functools
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+from app_test_case import AppTestCase, app_module
+
+from src.utils.chunked_upload import (
+    UploadError,
+    append_chunk,
+    clip_state,
+    finalize_clip,
+    init_clip,
+    start_upload,
+)
+from src.utils.clip_journal import read_journal
+
+class TestChunkedUpload(unittest.TestCase):
+    def setUp(self):
+        self.module_folder = tempfile.mkdtemp()
+        start_upload(self.module_folder, 1)
+        self.data = os.urandom(2500)
+        init_clip(self.module_folder, 0, 'Oil Filter', 'oil.mp3', len(self.data), hashlib.sha256(self.data).hexdigest())
+
+    def tearDown(self):
+        shutil.rmtree(self.module_folder, ignore_errors=True)
+
+    def send(self, offset, length, sha256=None):
+        chunk = self.data[offset:offset + length]
+        return append_chunk(self.module_folder, 0, offset, io.BytesIO(chunk), len(chunk), sha256)
+
+    def test_resume_from_acknowledged_offset(self):
+        self.assertEqual(self.send(0, 1000), 1000)
+
+        # A chunk at the wrong offset is refused with where to resume
+        with self.assertRaises(UploadError) as raised:
+            self.send(2000, 500)
+        self.assertEqual((raised.exception.status, raised.exception.offset), (409, 1000))
+
+        # A corrupted chunk isn't acknowledged
+        with self.assertRaises(UploadError):
+            self.send(1000, 1000, sha256='0' * 64)
+        self.assertEqual(clip_state(self.module_folder, 0)['offset'], 1000)
+
+        # Announcing the same clip again (e.g. after a reload) keeps what arrived
+        init_clip(self.module_folder, 0, 'Oil Filter', 'oil.mp3', len(self.data), hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(self.send(1000, 1500, hashlib.sha256(self.data[1000:]).hexdigest()), 2500)
+
+        task = finalize_clip(self.module_folder, 0)
+        self.assertEqual(task['wav_file'], 'Oil_Filter.wav')
+        with open(os.path.join(self.module_folder, task['raw_file']), 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_finalized_clip_is_not_reset(self):
+        self.send(0, 2500)
+        task = finalize_clip(self.module_folder, 0)
+
+        # A retried finalize (its response was lost) gets the same task
+        self.assertEqual(finalize_clip(self.module_folder, 0), task)
+
+        # Announcing it again is a no-op, and leaves no empty .part behind
+        sha256 = hashlib.sha256(self.data).hexdigest()
+        self.assertTrue(init_clip(self.module_folder, 0, 'Oil Filter', 'oil.mp3', len(self.data), sha256)['finalized'])
+        self.assertFalse(os.path.exists(os.path.join(self.module_folder, '.uploads', '0.part')))
+
+        # A different clip can't replace it
+        with self.assertRaises(UploadError) as raised:
+            init_clip(self.module_folder, 0, 'Oil Filter', 'oil.mp3', len(self.data), '0' * 64)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertTrue(clip_state(self.module_folder, 0)['finalized'])
+
+    def test_incomplete_clip_cannot_be_finalized(self):
+        self.send(0, 1000)
+        with self.assertRaises(UploadError) as raised:
+            finalize_clip(self.module_folder, 0)
+        self.assertEqual(raised.exception.offset, 1000)
+
+class TestChunkedUploadEndpoints(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.submitted = []
+        self.processed = []
+
+        job_queue = self.patch('job_queue', mock.Mock(depth=0))
+        job_queue.submit.side_effect = lambda job_id, payload: self.submitted.append(payload)
+        self.patch('process_clip', self.fake_process_clip)
+        self.patch('build_module_qr_cache', lambda module_folder: None)
+        self.patch('build_module_qr_sheet', lambda *args, **kwargs: None)
+        self.login('trainer', username='DemoTrainer')
+
+    def fake_process_clip(self, task):
+        self.processed.append(task['real_name'])
+        entry = {'name': task['real_name'], 'transcript': 'done', 'filename': os.path.basename(task['final_wav_path'])}
+        return {'entry': entry, 'stats': {}, 'pid': 1}
+
+    def upload(self, base, index, name, data):
+        response = self.client.post(f"{base}/clips/{index}", json={
+            'name': name, 'filename': 'clip.mp3', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()
+        })
+        self.assertEqual(response.get_json()['offset'], 0)
+        response = self.client.put(
+            f"{base}/clips/{index}/chunks?offset=0", data=data,
+            headers={'X-Chunk-SHA256': hashlib.sha256(data).hexdigest()}
+        )
+        self.assertEqual(response.get_json(), {'offset': len(data)})
+        self.assertEqual(self.client.post(f"{base}/clips/{index}/finalize").status_code, 200)
+
+    def test_finalized_clips_are_processed_before_the_upload_completes(self):
+        response = self.client.post('/trainer/api/uploads', json={'module_name': 'Engine', 'clips': 2})
+        self.assertEqual(response.status_code, 201)
+        module_code = response.get_json()['module_code']
+        module_folder = os.path.join(self.tmp_dir, module_code)
+        base = f"/trainer/api/uploads/{module_code}"
+        self.assertEqual(self.registry.get_module(module_code)['status'], 'UPLOADING')
+
+        self.upload(base, 0, 'Step 0', b'first clip')
+        # Not every clip is there yet
+        self.assertEqual(self.client.post(f"{base}/complete").status_code, 409)
+
+        # The finalized clip's job starts it right away
+        app_module.run_module_job(self.submitted[-1], None)
+        self.assertEqual(self.processed, ['Step 0'])
+        self.assertEqual(list(read_journal(module_folder)), [0])
+        self.assertEqual(self.registry.get_module(module_code)['done'], 1)
+
+        self.upload(base, 1, 'Step 1', b'second clip')
+        self.assertEqual(self.registry.get_module(module_code)['status'], 'UPLOADING')
+        self.assertEqual(self.client.post(f"{base}/complete").status_code, 200)
+        self.assertEqual(self.registry.get_module(module_code)['status'], 'PROCESSING')
+        self.assertEqual(self.client.post(f"{base}/complete").status_code, 409)
+
+        # The module's job only processes what is left
+        app_module.run_module_job(self.submitted[-1], None)
+        self.assertEqual(self.processed, ['Step 0', 'Step 1'])
+        self.assertEqual(self.registry.get_module(module_code)['status'], 'COMPLETE')
+
+    def test_adopted_early_clip_is_left_to_the_module_job(self):
+        response = self.client.post('/trainer/api/uploads', json={'module_name': 'Engine', 'clips': 1})
+        module_code = response.get_json()['module_code']
+        module_folder = os.path.join(self.tmp_dir, module_code)
+        task = {'final_wav_path': os.path.join(module_folder, 'Step_0.wav'), 'real_name': 'Step 0'}
+
+        future = Future()
+        app_module.early_clips[(module_code, 0)] = future
+        future.add_done_callback(functools.partial(app_module.record_early_clip, module_folder, 0, 1, task))
+
+        # The module's job adopts the clip and completes the module before the callback runs
+        app_module.early_clips.pop((module_code, 0))
+        self.registry.set_status(module_code, 'COMPLETE', [{'name': 'Step 0', 'transcript': 'done'}])
+        future.set_result(self.fake_process_clip(task))
+
+        self.assertEqual(read_journal(module_folder), {})
+        module = self.registry.get_module(module_code)
+        self.assertEqual(module['status'], 'COMPLETE')
+        self.assertEqual(module['items'], [{'name': 'Step 0', 'transcript': 'done'}])
+
+    def test_abandoned_upload_can_be_deleted_and_expires(self):
+        codes = [
+            self.client.post('/trainer/api/uploads', json={'module_name': name, 'clips': 1}).get_json()['module_code']
+            for name in ('Engine', 'Wing', 'Tail')
+        ]
+
+        # An upload that never completes can still be deleted by its trainer
+        self.assertEqual(self.client.post(f"/trainer/delete_module/{codes[0]}").status_code, 200)
+        self.assertIsNone(self.registry.get_module(codes[0]))
+
+        # Uploads nothing arrived for in UPLOAD_EXPIRY_SECONDS are deleted on startup
+        stale = time.time() - app_module.UPLOAD_EXPIRY_SECONDS - 60
+        uploads = os.path.join(self.tmp_dir, codes[1], '.uploads')
+        for name in os.listdir(uploads):
+            os.utime(os.path.join(uploads, name), (stale, stale))
+        os.utime(uploads, (stale, stale))
+        app_module.recover_interrupted_modules()
+
+        self.assertIsNone(self.registry.get_module(codes[1]))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, codes[1])))
+        self.assertEqual(self.registry.get_module(codes[2])['status'], 'UPLOADING')
+
+    def test_early_clips_of_abandoned_uploads_expire(self):
+        codes = [
+            self.client.post('/trainer/api/uploads', json={'module_name': name, 'clips': 2}).get_json()['module_code']
+            for name in ('Engine', 'Wing', 'Tail')
+        ]
+        early_clips = self.patch('early_clips', {(code, index): Future() for code in codes for index in range(2)})
+
+        # Wing's upload went quiet for longer than UPLOAD_EXPIRY_SECONDS, Tail was deleted
+        stale = time.time() - app_module.UPLOAD_EXPIRY_SECONDS - 60
+        uploads = os.path.join(self.tmp_dir, codes[1], '.uploads')
+        for name in os.listdir(uploads):
+            os.utime(os.path.join(uploads, name), (stale, stale))
+        os.utime(uploads, (stale, stale))
+        self.assertEqual(self.client.post(f"/trainer/delete_module/{codes[2]}").status_code, 200)
+        app_module.expire_early_clips()
+
+        self.assertEqual(sorted(early_clips), [(codes[0], 0), (codes[0], 1)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import unittest
+
+from app_test_case import AppTestCase, app_module
+
+from src.utils.lru_cache import LRUCache
+from src.utils.module_manifest import new_manifest, update_manifest, write_manifest
+
+MODULE_CODE = 'ABCDEF0123'
+
+class TestLRUCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+class TestGlossaryCache(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.module_folder = os.path.join(self.tmp_dir, MODULE_CODE)
+        os.makedirs(self.module_folder)
+        manifest = new_manifest('DemoTrainer', 'Engine', 'COMPLETE')
+        manifest['items'] = [{'name': 'Oil Filter', 'transcript': 'Drain the oil', 'filename': 'Oil_Filter.wav'}]
+        write_manifest(self.module_folder, manifest)
+
+        self.registry.add_module(MODULE_CODE, 'DemoTrainer', 'Engine', 'COMPLETE')
+        self.patch('glossary_cache', LRUCache(8))
+        self.login('trainee', module_code=MODULE_CODE)
+
+    def test_rendered_page_is_reused_until_manifest_changes(self):
+        first = self.client.get('/glossary')
+        self.assertIn(b'Drain the oil', first.data)
+        self.assertEqual(self.client.get('/glossary').data, first.data)
+        self.assertEqual(app_module.glossary_cache.stats()['hits'], 1)
+
+        update_manifest(self.module_folder, items=[{'name': 'Tires', 'transcript': 'Check tread', 'filename': 'Tires.wav'}])
+        self.assertIn(b'Check tread', self.client.get('/glossary').data)
+
+    def test_processing_module_is_not_cached(self):
+        self.registry.set_progress(MODULE_CODE, 1, 3)
+        self.registry.set_status(MODULE_CODE, 'PROCESSING')
+        self.client.get('/glossary')
+        self.assertEqual(len(app_module.glossary_cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+from utils.job_queue import MAX_JOB_ATTEMPTS, JobQueue
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.jobs_folder = tempfile.mkdtemp()
+        self.handled = []
+        self.done = threading.Event()
+
+    def tearDown(self):
+        shutil.rmtree(self.jobs_folder, ignore_errors=True)
+
+    def handler(self, payload, executor):
+        self.handled.append(payload['n'])
+        if len(self.handled) == payload['expected']:
+            self.done.set()
+
+    def test_jobs_persist_until_handled(self):
+        """Submitted jobs are files on disk, so a new queue resumes them in FIFO order"""
+        first = JobQueue(self.jobs_folder, self.handler)
+        for n in range(3):
+            first.submit(f"job{n}", {'n': n, 'expected': 3})
+        self.assertEqual(first.depth, 3)
+        self.assertEqual(first.pending_ids(), {'job0', 'job1', 'job2'})
+
+        # Simulate a restart: a fresh queue over the same folder picks the jobs up
+        second = JobQueue(self.jobs_folder, self.handler, poll_interval=0.05)
+        second.start()
+        try:
+            self.assertTrue(self.done.wait(5), "Jobs were not processed")
+        finally:
+            second.stop()
+
+        self.assertEqual(self.handled, [0, 1, 2])
+        self.assertEqual(second.depth, 0)
+
+    def test_gives_up_after_repeated_crashes(self):
+        """A job whose attempts were exhausted is handed to on_give_up instead of the handler"""
+        given_up = []
+        queue = JobQueue(self.jobs_folder, self.handler, on_give_up=given_up.append)
+        job_path = queue.submit("crashy", {'n': 0, 'expected': 1})
+
+        with open(job_path, 'r') as f:
+            job = json.load(f)
+        job['attempts'] = MAX_JOB_ATTEMPTS
+        with open(job_path, 'w') as f:
+            json.dump(job, f)
+
+        queue._run_job(job_path)
+
+        self.assertEqual(self.handled, [])
+        self.assertEqual(given_up, [{'n': 0, 'expected': 1}])
+        self.assertFalse(os.path.exists(job_path))
+
+    def test_stopped_job_keeps_its_attempts(self):
+        """A job interrupted by stop() is resumed later without counting toward MAX_JOB_ATTEMPTS"""
+        running = threading.Event()
+        release = threading.Event()
+
+        def slow_handler(payload, executor):
+            running.set()
+            release.wait(5)
+            # What the pool raises once it was shut down under the job
+            raise RuntimeError('cannot schedule new futures after shutdown')
+
+        queue = JobQueue(self.jobs_folder, slow_handler, poll_interval=0.05)
+        job_path = queue.submit("deploy", {'n': 0, 'expected': 1})
+        queue.start()
+        self.assertTrue(running.wait(5), "Job did not start")
+        queue.stop()
+        release.set()
+        queue._thread.join(5)
+
+        with open(job_path, 'r') as f:
+            self.assertEqual(json.load(f)['attempts'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
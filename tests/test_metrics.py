@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app_test_case import app_module
+
+from src.utils.metrics import Metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_snapshots_of_other_processes_are_merged(self):
+        # What another process (e.g. the job worker) published
+        other = Metrics()
+        other.inc('jobs_total', 2)
+        other.observe('stage_seconds', 0.2, stage='convert')
+        with open(os.path.join(self.tmp_dir, '1.json'), 'w') as f:
+            json.dump(other.snapshot(), f)
+
+        metrics = Metrics()
+        metrics.configure(self.tmp_dir)
+        metrics.inc('jobs_total')
+        metrics.observe('stage_seconds', 7, stage='convert')
+        metrics.set('depth', 3)
+        text = metrics.render()
+
+        self.assertIn('jobs_total 3', text)
+        self.assertIn('depth 3', text)
+        self.assertIn('stage_seconds_bucket{stage="convert",le="0.25"} 1', text)
+        self.assertIn('stage_seconds_bucket{stage="convert",le="+Inf"} 2', text)
+        self.assertIn('stage_seconds_count{stage="convert"} 2', text)
+
+    def test_snapshots_of_exited_processes_are_dropped(self):
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        dead_pid = int(exited.stdout)
+        paths = {}
+        for name, pid in (('dead', dead_pid), ('live', os.getppid())):
+            other = Metrics()
+            other.inc(f"{name}_total")
+            paths[name] = os.path.join(self.tmp_dir, f"{pid}.json")
+            with open(paths[name], 'w') as f:
+                json.dump(other.snapshot(), f)
+        # Left behind by a crash mid-write a while ago
+        part_path = os.path.join(self.tmp_dir, f"{dead_pid}.json.1.part")
+        with open(part_path, 'w') as f:
+            f.write('{')
+        os.utime(part_path, (time.time() - 3600, time.time() - 3600))
+
+        metrics = Metrics()
+        metrics.configure(self.tmp_dir)
+        self.assertFalse(os.path.exists(paths['dead']))
+        self.assertFalse(os.path.exists(part_path))
+        self.assertIn('live_total 1', metrics.render())
+
+        # A process that stopped publishing long ago, even if its pid is now in use
+        os.utime(paths['live'], (time.time() - 2 * 24 * 3600, time.time() - 2 * 24 * 3600))
+        text = metrics.render()
+        self.assertNotIn('live_total', text)
+        self.assertNotIn('dead_total', text)
+
+    def test_metrics_endpoint_times_requests(self):
+        fresh = Metrics()
+        fresh.add_collector(app_module.collect_app_metrics)
+        with mock.patch.object(app_module, 'metrics', fresh):
+            client = app_module.app.test_client()
+            client.get('/')
+            response = client.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        self.assertIn('aeroar_http_request_duration_seconds_count{method="GET",route="/",status="200"} 1', text)
+        self.assertIn('aeroar_job_queue_depth', text)
+        self.assertIn('aeroar_cache_hits_total{cache="glossary"}', text)
+
+    def test_transcription_stats_come_from_the_job_worker(self):
+        # The job worker's snapshot: its pool workers' stats and transcript cache counts
+        worker = Metrics()
+        worker.set_total('aeroar_cache_hits_total', 3, cache='transcript')
+        worker.set_total('aeroar_cache_misses_total', 1, cache='transcript')
+        worker.publish('workers', {'4242': {'model': 'base', 'clips_transcribed': 4}})
+        with open(os.path.join(self.tmp_dir, f"{os.getppid()}.json"), 'w') as f:
+            json.dump(worker.snapshot(), f)
+
+        fresh = Metrics()
+        fresh.configure(self.tmp_dir)
+        fresh.add_collector(app_module.collect_app_metrics)
+        with mock.patch.object(app_module, 'metrics', fresh):
+            client = app_module.app.test_client()
+            with client.session_transaction() as session:
+                session['role'] = 'trainer'
+            stats = client.get('/trainer/api/transcription_stats').get_json()
+
+        self.assertEqual(stats['workers'], {'4242': {'model': 'base', 'clips_transcribed': 4}})
+        self.assertEqual((stats['transcript_cache']['hits'], stats['transcript_cache']['misses']), (3, 1))
+        self.assertEqual(stats['transcript_cache']['hit_rate'], 0.75)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+from utils.module_manifest import (
+    manifest_path,
+    migrate_modules,
+    new_manifest,
+    read_manifest,
+    update_manifest,
+    write_manifest,
+)
+
+class TestModuleManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.module_folder = os.path.join(self.tmp_dir, 'ABCDEF0123')
+        os.makedirs(self.module_folder)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_write_is_atomic_and_reads_are_cached(self):
+        self.assertIsNone(read_manifest(self.module_folder))
+        write_manifest(self.module_folder, new_manifest('alice', 'Engine', 'PROCESSING'))
+
+        manifest = read_manifest(self.module_folder)
+        self.assertEqual(manifest['status'], 'PROCESSING')
+        # Unchanged file: the parsed manifest is reused
+        self.assertIs(read_manifest(self.module_folder), manifest)
+
+        update_manifest(self.module_folder, status='COMPLETE', items=[{'name': 'Oil'}])
+        manifest = read_manifest(self.module_folder)
+        self.assertEqual((manifest['status'], manifest['name']), ('COMPLETE', 'Engine'))
+        self.assertEqual(manifest['items'], [{'name': 'Oil'}])
+        self.assertEqual(os.listdir(self.module_folder), ['manifest.json'])
+
+    def test_legacy_files_are_migrated(self):
+        for filename, content in (('trainer.txt', 'alice'), ('name.txt', 'Engine'), ('status.txt', 'COMPLETE')):
+            with open(os.path.join(self.module_folder, filename), 'w') as f:
+                f.write(content)
+        with open(os.path.join(self.module_folder, 'transcripts.json'), 'w') as f:
+            json.dump([{'name': 'Oil', 'transcript': 'Drain oil', 'filename': 'Oil.wav'}], f)
+        # Audio-only manifest written before version 2
+        with open(manifest_path(self.module_folder), 'w') as f:
+            json.dump({'version': 1, 'audio': {'Oil': 'a' * 64}}, f)
+        os.makedirs(os.path.join(self.tmp_dir, '.store'))
+
+        self.assertEqual(migrate_modules(self.tmp_dir), 1)
+        self.assertEqual(migrate_modules(self.tmp_dir), 0)
+
+        manifest = read_manifest(self.module_folder)
+        self.assertEqual(manifest['version'], 2)
+        self.assertEqual((manifest['trainer'], manifest['name'], manifest['status']), ('alice', 'Engine', 'COMPLETE'))
+        self.assertEqual(manifest['items'][0]['filename'], 'Oil.wav')
+        self.assertEqual(manifest['audio'], {'Oil': 'a' * 64})
+        self.assertEqual(os.listdir(self.module_folder), ['manifest.json'])
+
+if __name__ == '__main__':
+    unittest.main()
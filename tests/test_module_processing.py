@@ -0,0 +1,104 @@
+import os
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app_test_case import AppTestCase, app_module
+
+from src.utils.clip_journal import append_journal, journal_path, read_journal
+from src.utils.job_queue import JobQueue
+from src.utils.module_manifest import new_manifest, read_manifest, write_manifest
+
+MODULE_CODE = 'ABCDEF0123'
+
+class TestModuleProcessing(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.module_folder = os.path.join(self.tmp_dir, MODULE_CODE)
+        os.makedirs(self.module_folder)
+
+        self.registry.add_module(MODULE_CODE, 'DemoTrainer', 'Engine', 'PROCESSING')
+        write_manifest(self.module_folder, new_manifest('DemoTrainer', 'Engine', 'PROCESSING'))
+
+        self.tasks = [{
+            'raw_path': os.path.join(self.module_folder, f"temp_{i}.mp3"),
+            'final_wav_path': os.path.join(self.module_folder, f"Step_{i}.wav"),
+            'real_name': f"Step {i}",
+            'transcript_text': '',
+        } for i in range(4)]
+        self.processed = []
+
+        self.patch('process_clip', self.fake_process_clip)
+        self.patch('build_module_qr_cache', lambda module_folder: None)
+        self.patch('build_module_qr_sheet', lambda *args, **kwargs: None)
+
+    def fake_process_clip(self, task):
+        self.processed.append(task['real_name'])
+        if task['real_name'] == 'Step 2' and self.crash_on_step_2:
+            raise RuntimeError("worker died")
+        entry = {'name': task['real_name'], 'transcript': 'done', 'filename': os.path.basename(task['final_wav_path'])}
+        return {'entry': entry, 'stats': {}, 'pid': 1}
+
+    def read_transcripts(self):
+        return read_manifest(self.module_folder)['items']
+
+    def test_interrupted_module_resumes_from_journal(self):
+        self.crash_on_step_2 = True
+        app_module.process_module_background(self.module_folder, self.tasks)
+
+        # Clips finished before the failure are durable and already visible
+        self.assertEqual(sorted(read_journal(self.module_folder)), [0, 1])
+        self.assertEqual([item['name'] for item in self.read_transcripts()], ['Step 0', 'Step 1'])
+        module = self.registry.get_module(MODULE_CODE)
+        self.assertEqual((module['done'], module['total']), (2, 4))
+
+        self.crash_on_step_2 = False
+        self.processed = []
+        app_module.process_module_background(self.module_folder, self.tasks)
+
+        self.assertEqual(self.processed, ['Step 2', 'Step 3'])
+        self.assertEqual([item['name'] for item in self.read_transcripts()], ['Step 0', 'Step 1', 'Step 2', 'Step 3'])
+        self.assertEqual(self.registry.get_module(MODULE_CODE)['status'], 'COMPLETE')
+        self.assertFalse(os.path.exists(journal_path(self.module_folder)))
+
+    def test_stopped_queue_leaves_the_module_processing(self):
+        """A server shutdown cancels the job's clips without marking the module as failed"""
+        running = threading.Event()
+        release = threading.Event()
+
+        def slow_process_clip(task):
+            running.set()
+            release.wait(5)
+            return self.fake_process_clip(task)
+
+        queue = JobQueue(os.path.join(self.tmp_dir, '.jobs'), app_module.run_module_job, poll_interval=0.05)
+        # One clip at a time, the others wait in the pool until stop() cancels them
+        queue._executor = ThreadPoolExecutor(max_workers=1)
+        job_tasks = [{
+            'raw_file': os.path.basename(task['raw_path']), 'wav_file': os.path.basename(task['final_wav_path']),
+            'real_name': task['real_name'], 'transcript_text': '',
+        } for task in self.tasks]
+        job_path = queue.submit(MODULE_CODE, {'module_code': MODULE_CODE, 'tasks': job_tasks})
+
+        self.patch('process_clip', slow_process_clip)
+        queue.start()
+        self.assertTrue(running.wait(5), "Job did not start")
+        queue.stop()
+        release.set()
+        queue._thread.join(5)
+
+        self.assertFalse(queue._thread.is_alive())
+        self.assertEqual(self.registry.get_module(MODULE_CODE)['status'], 'PROCESSING')
+        self.assertEqual(read_manifest(self.module_folder)['status'], 'PROCESSING')
+        # Resumed on the next start
+        self.assertTrue(os.path.exists(job_path))
+
+    def test_torn_journal_line_is_ignored(self):
+        append_journal(self.module_folder, 0, 'Step_0.wav', {'name': 'Step 0', 'transcript': 'x', 'filename': 'Step_0.wav'})
+        with open(journal_path(self.module_folder), 'a') as f:
+            f.write('{"index": 1, "filen')
+
+        self.assertEqual(list(read_journal(self.module_folder)), [0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+from utils.module_manifest import new_manifest, write_manifest
+from utils.module_registry import ModuleRegistry
+
+class TestModuleRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.registry = ModuleRegistry(os.path.join(self.tmp_dir, 'registry.sqlite3'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_lookups_are_scoped_to_trainer(self):
+        self.registry.add_module('AAAAAAAAAA', 'alice', 'Brakes', 'PROCESSING')
+        self.registry.add_module('BBBBBBBBBB', 'bob', 'Tires', 'PROCESSING')
+
+        items = [{'name': 'Pads', 'transcript': 'Check pad wear', 'filename': 'Pads.wav'}]
+        self.registry.set_status('AAAAAAAAAA', 'COMPLETE', items)
+
+        self.assertEqual(self.registry.statuses_for_trainer('alice'), {'AAAAAAAAAA': 'COMPLETE'})
+        modules = self.registry.modules_for_trainer('alice')
+        self.assertEqual(len(modules), 1)
+        self.assertEqual(modules[0]['items'], items)
+
+        self.registry.remove_module('AAAAAAAAAA')
+        self.assertIsNone(self.registry.get_module('AAAAAAAAAA'))
+        self.assertEqual(self.registry.codes_with_status('PROCESSING'), ['BBBBBBBBBB'])
+
+    def test_events_since_sequence(self):
+        """Status events are scoped to the module owner and resumable by sequence number"""
+        self.registry.add_module('AAAAAAAAAA', 'alice', 'Brakes', 'PROCESSING')
+        self.registry.add_module('BBBBBBBBBB', 'bob', 'Tires', 'PROCESSING')
+
+        first = self.registry.add_event('AAAAAAAAAA', 'PROCESSING', 1, 2)
+        self.registry.add_event('BBBBBBBBBB', 'COMPLETE')
+        self.registry.add_event('AAAAAAAAAA', 'COMPLETE')
+        self.assertIsNone(self.registry.add_event('0000000000', 'COMPLETE'))
+
+        events = self.registry.events_for_trainer('alice', first)
+        self.assertEqual([(e['code'], e['status']) for e in events], [('AAAAAAAAAA', 'COMPLETE')])
+        self.assertEqual(self.registry.last_event_seq(), events[-1]['seq'])
+
+    def test_rebuild_from_module_folders(self):
+        """Existing module folders are indexed from their manifests"""
+        modules_folder = os.path.join(self.tmp_dir, 'modules')
+        module_folder = os.path.join(modules_folder, 'CCCCCCCCCC')
+        os.makedirs(module_folder)
+        os.makedirs(os.path.join(modules_folder, '.jobs'))
+
+        manifest = new_manifest('alice', 'Engine', 'COMPLETE')
+        manifest['items'] = [{'name': 'Oil', 'transcript': 'Drain oil', 'filename': 'Oil.wav'}]
+        write_manifest(module_folder, manifest)
+
+        self.assertEqual(self.registry.rebuild(modules_folder), 1)
+
+        module = self.registry.get_module('CCCCCCCCCC')
+        self.assertEqual(module['trainer'], 'alice')
+        self.assertEqual(module['name'], 'Engine')
+        self.assertEqual(module['items'][0]['filename'], 'Oil.wav')
+
+if __name__ == '__main__':
+    unittest.main()
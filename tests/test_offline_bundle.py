@@ -0,0 +1,69 @@
+import os
+import unittest
+import wave
+
+from app_test_case import AppTestCase
+
+from src.utils.lru_cache import LRUCache
+from src.utils.module_manifest import update_manifest
+
+MODULE_CODE = 'ABCDEF0123'
+
+class TestOfflineBundle(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.module_folder = os.path.join(self.tmp_dir, MODULE_CODE)
+        os.makedirs(self.module_folder)
+
+        # One second of silence, with a compact rendition
+        with wave.open(os.path.join(self.module_folder, 'Oil_Filter.wav'), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b'\x00\x00' * 16000)
+        with open(os.path.join(self.module_folder, 'Oil_Filter.opus'), 'wb') as f:
+            f.write(b'OggS')
+        update_manifest(self.module_folder, name='Engine', status='COMPLETE', items=[
+            {'name': 'Oil Filter', 'transcript': 'Remove the oil filter.', 'filename': 'Oil_Filter.wav'}
+        ])
+
+        self.registry.add_module(MODULE_CODE, 'DemoTrainer', 'Engine', 'COMPLETE')
+        self.patch('offline_bundle_cache', LRUCache(8))
+        self.login('trainee', module_code=MODULE_CODE)
+
+    def test_bundle_lists_audio_and_glossary(self):
+        response = self.client.get('/offline/bundle')
+        self.assertEqual(response.status_code, 200)
+        bundle = response.get_json()
+
+        self.assertEqual(bundle['module'], MODULE_CODE)
+        self.assertEqual(len(bundle['audios']), 1)
+        audio = bundle['audios'][0]
+        self.assertEqual(audio['url'], f"/audios?module={MODULE_CODE}&name=Oil_Filter")
+        self.assertEqual(audio['formats'], ['opus'])
+        self.assertEqual(bundle['glossary'][0]['transcript'], 'Remove the oil filter.')
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+
+        # The listed URL serves the audio
+        self.assertEqual(self.client.get(f"{audio['url']}&format=opus").data, b'OggS')
+
+    def test_unchanged_bundle_is_not_sent_again(self):
+        response = self.client.get('/offline/bundle')
+        version = response.get_json()['version']
+        self.assertEqual(response.headers['ETag'], f'"{version}"')
+
+        response = self.client.get('/offline/bundle', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        # Any change to the module's content gives a new version
+        update_manifest(self.module_folder, items=[
+            {'name': 'Oil Filter', 'transcript': 'Replace the oil filter.', 'filename': 'Oil_Filter.wav'}
+        ])
+        self.assertNotEqual(self.client.get('/offline/bundle').get_json()['version'], version)
+
+    def test_processing_module_is_not_bundled(self):
+        self.registry.set_status(MODULE_CODE, 'PROCESSING')
+        self.assertEqual(self.client.get('/offline/bundle').status_code, 409)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest import mock
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+import numpy as np
+import qrcode
+from PIL import Image, PdfParser
+
+from utils import qr_generator
+from utils.module_manifest import update_manifest
+from utils.qr_generator import (
+    build_module_qr_cache,
+    build_module_qr_sheet,
+    cached_module_qr_zip,
+    module_qr_zip_path,
+    render_qr_batch,
+    sheet_layout,
+    stream_module_qr_zip,
+)
+
+class TestQrCache(unittest.TestCase):
+    def setUp(self):
+        self.module_folder = tempfile.mkdtemp()
+        for name in ('Oil_Filter', 'Tires_and_Wheels'):
+            self.add_audio(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.module_folder, ignore_errors=True)
+
+    def add_audio(self, name):
+        with open(os.path.join(self.module_folder, f"{name}.wav"), 'wb') as f:
+            f.write(b'RIFF')
+
+    def test_archive_is_cached_and_invalidated(self):
+        zip_path = build_module_qr_cache(self.module_folder)
+        with zipfile.ZipFile(zip_path) as zip_file:
+            self.assertEqual(sorted(zip_file.namelist()), ['Oil_Filter.png', 'Tires_and_Wheels.png'])
+            self.assertTrue(zip_file.read('Oil_Filter.png').startswith(b'\x89PNG'))
+
+        # Unchanged module: the cached archive is still valid
+        self.assertEqual(cached_module_qr_zip(self.module_folder), zip_path)
+
+        # New content: the cache no longer matches until a new archive replaces the stale one
+        self.add_audio('Brakes')
+        self.assertIsNone(cached_module_qr_zip(self.module_folder))
+        new_zip_path = build_module_qr_cache(self.module_folder)
+        self.assertNotEqual(new_zip_path, zip_path)
+        self.assertFalse(os.path.exists(zip_path))
+        with zipfile.ZipFile(new_zip_path) as zip_file:
+            self.assertIn('Brakes.png', zip_file.namelist())
+
+    def test_streamed_archive_matches_cache(self):
+        """Streaming yields one chunk per PNG plus the central directory, and fills the cache"""
+        chunks = list(stream_module_qr_zip(self.module_folder))
+        self.assertEqual(len(chunks), 3)
+
+        streamed = b"".join(chunks)
+        with zipfile.ZipFile(io.BytesIO(streamed)) as zip_file:
+            self.assertIsNone(zip_file.testzip())
+            self.assertTrue(all(info.compress_type == zipfile.ZIP_STORED for info in zip_file.infolist()))
+
+        with open(module_qr_zip_path(self.module_folder), 'rb') as f:
+            self.assertEqual(f.read(), streamed)
+
+    def test_abandoned_stream_leaves_no_cache(self):
+        stream = stream_module_qr_zip(self.module_folder)
+        next(stream)
+        stream.close()
+
+        self.assertIsNone(cached_module_qr_zip(self.module_folder))
+        leftovers = [n for n in os.listdir(os.path.join(self.module_folder, '.qr')) if n.endswith('.part')]
+        self.assertEqual(leftovers, [])
+
+    def test_concurrent_builds_share_the_png_cache(self):
+        """Downloads racing to render the same missing PNGs each write their own temporary file"""
+        for n in range(40):
+            self.add_audio(f"Part_{n:03d}")
+        errors = []
+
+        def build():
+            try:
+                build_module_qr_cache(self.module_folder)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=build) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        with zipfile.ZipFile(cached_module_qr_zip(self.module_folder)) as zip_file:
+            self.assertEqual(len(zip_file.namelist()), 42)
+        png_folder = os.path.join(self.module_folder, '.qr', 'png')
+        self.assertEqual([n for n in os.listdir(png_folder) if not n.endswith('.png')], [])
+
+    def test_archive_renders_missing_codes_in_batches(self):
+        for name in ('Brakes', 'Flaps', 'Rudder'):
+            self.add_audio(name)
+        batches = []
+        render = qr_generator.render_qr_batch
+
+        def render_qr_batch(payloads, **kwargs):
+            batches.append(len(payloads))
+            return render(payloads, **kwargs)
+
+        with mock.patch.object(qr_generator, 'QR_BATCH_SIZE', 2), \
+                mock.patch.object(qr_generator, 'render_qr_batch', render_qr_batch):
+            build_module_qr_cache(self.module_folder)
+            self.assertEqual(batches, [2, 2, 1])
+
+            # Cached codes are not rendered again
+            self.add_audio('Tail')
+            build_module_qr_cache(self.module_folder)
+            self.assertEqual(batches[3:], [0, 0, 1])
+
+class TestQrSheets(unittest.TestCase):
+    def setUp(self):
+        self.module_folder = tempfile.mkdtemp()
+        names = ['Step_%02d' % i for i in range(7)]
+        for name in names:
+            with open(os.path.join(self.module_folder, f"{name}.wav"), 'wb') as f:
+                f.write(b'RIFF')
+        update_manifest(self.module_folder, items=[
+            {'name': f"Label {name}", 'transcript': '', 'filename': f"{name}.wav"} for name in names
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.module_folder, ignore_errors=True)
+
+    def test_png_sheets_are_paginated_and_cached(self):
+        layout = sheet_layout('letter', 2, 2, 100)
+        sheet_path = build_module_qr_sheet(self.module_folder, 'png', layout, title='Engine')
+        with zipfile.ZipFile(sheet_path) as zip_file:
+            self.assertEqual(zip_file.namelist(), ['page-001.png', 'page-002.png'])
+            page = Image.open(io.BytesIO(zip_file.read('page-001.png')))
+            self.assertEqual(page.size, (850, 1100))
+
+        mtime = os.path.getmtime(sheet_path)
+        self.assertEqual(build_module_qr_sheet(self.module_folder, 'png', layout, title='Engine'), sheet_path)
+        self.assertEqual(os.path.getmtime(sheet_path), mtime)
+
+        # Changed labels invalidate the sheet
+        update_manifest(self.module_folder, items=[])
+        new_path = build_module_qr_sheet(self.module_folder, 'png', layout, title='Engine')
+        self.assertNotEqual(new_path, sheet_path)
+        self.assertFalse(os.path.exists(sheet_path))
+
+    def test_sheet_cache_keeps_recently_used_layouts(self):
+        with mock.patch.object(qr_generator, 'SHEET_CACHE_SIZE', 2):
+            first = build_module_qr_sheet(self.module_folder, 'png', sheet_layout(dpi=72))
+            second = build_module_qr_sheet(self.module_folder, 'png', sheet_layout(dpi=73))
+            # Using the first sheet again makes the second the least recently used
+            os.utime(second, (os.path.getatime(first) - 60, os.path.getmtime(second)))
+            build_module_qr_sheet(self.module_folder, 'png', sheet_layout(dpi=72))
+            third = build_module_qr_sheet(self.module_folder, 'png', sheet_layout(dpi=74))
+
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+
+    def test_pdf_sheet(self):
+        sheet_path = build_module_qr_sheet(self.module_folder, 'pdf', sheet_layout(dpi=72))
+        with open(sheet_path, 'rb') as f:
+            self.assertTrue(f.read().startswith(b'%PDF'))
+
+    def test_pdf_sheet_memory_does_not_grow_with_pages(self):
+        """A 300 dpi PDF of 307 codes (26 A4 pages, ~9 MB each in memory) is written page by page"""
+        for number in range(300):
+            with open(os.path.join(self.module_folder, f"Extra_{number:03d}.wav"), 'wb') as f:
+                f.write(b'RIFF')
+        script = (
+            "import sys, resource\n"
+            f"sys.path.insert(0, {src_path!r})\n"
+            "from utils.qr_generator import build_module_qr_sheet, build_module_qr_cache\n"
+            f"build_module_qr_cache({self.module_folder!r})\n"
+            "before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            f"build_module_qr_sheet({self.module_folder!r}, 'pdf')\n"
+            "print((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) // 1024)\n"
+        )
+        completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+        # ru_maxrss is in KiB on Linux: all pages held at once would take over 200 MB
+        self.assertLess(int(completed.stdout.strip().splitlines()[-1]), 60)
+
+        sheet_path = build_module_qr_sheet(self.module_folder, 'pdf')
+        self.assertEqual(len(PdfParser.PdfParser(sheet_path).pages), 26)
+
+    def test_invalid_layout(self):
+        for bad in ({'page': 'a3'}, {'cols': 0}, {'dpi': 5000}):
+            with self.assertRaises(ValueError):
+                sheet_layout(**bad)
+
+class TestQrBatchRendering(unittest.TestCase):
+    def test_batch_matches_qrcode_library(self):
+        """Batch mask selection and rasterization give exactly what qrcode + PIL draw"""
+        payloads = ['A', 'Oil_Filter', 'Tires and Wheels ' * 3, 'x' * 120, 'Maintenance_Step_%04d' % 7 * 20]
+        for data, png in zip(payloads, render_qr_batch(payloads), strict=True):
+            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+            qr.add_data(data)
+            qr.make(fit=True)
+            expected = qr.make_image(fill_color="black", back_color="white").get_image().convert('1')
+            actual = Image.open(io.BytesIO(png)).convert('1')
+            self.assertEqual(actual.size, expected.size)
+            self.assertTrue(np.array_equal(np.array(actual), np.array(expected)), data)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import threading
+import unittest
+
+from app_test_case import AppTestCase, app_module
+
+class TestStatusStream(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.registry.add_module('ABCDEF0123', 'DemoTrainer', 'Engine', 'PROCESSING')
+        self.patch('status_stream_slots', threading.BoundedSemaphore(1))
+        self.patch('STATUS_STREAM_MAX_SECONDS', 0.2)
+        self.patch('STATUS_STREAM_POLL_SECONDS', 0.05)
+        self.login('trainer', username='DemoTrainer')
+
+    def test_stream_ends_and_resumes_from_last_event_id(self):
+        app_module.publish_status_event('ABCDEF0123', 'PROCESSING', 1, 2)
+        body = self.client.get('/trainer/api/modules_events?since=0').get_data(as_text=True)
+        self.assertTrue(body.startswith('retry: 3000'))
+        last_id = int(body.split('id: ')[-1].split('\n')[0])
+
+        # The reconnect only gets what happened since
+        app_module.publish_status_event('ABCDEF0123', 'PROCESSING', 2, 2)
+        body = self.client.get('/trainer/api/modules_events', headers={'Last-Event-ID': str(last_id)}).get_data(as_text=True)
+        self.assertEqual(body.count('data: '), 1)
+        self.assertIn('"done": 2', body)
+
+    def test_client_retries_later_when_every_slot_is_taken(self):
+        app_module.status_stream_slots.acquire()
+        try:
+            body = self.client.get('/trainer/api/modules_events').get_data(as_text=True)
+        finally:
+            app_module.status_stream_slots.release()
+        self.assertEqual(body, f"retry: {app_module.STATUS_STREAM_BUSY_RETRY_MS}\n\n")
+
+        # The slot is free again once a stream ends
+        self.assertTrue(self.client.get('/trainer/api/modules_events').get_data(as_text=True).startswith('retry: 3000'))
+        self.assertTrue(app_module.status_stream_slots.acquire(blocking=False))
+        app_module.status_stream_slots.release()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+from utils.audio_processor import TranscriptionEngine
+from utils.transcript_cache import TranscriptCache, transcript_key
+
+class TestTranscriptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = TranscriptCache(os.path.join(self.tmp_dir, 'transcripts.sqlite3'), max_bytes=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_key_depends_on_audio_and_model(self):
+        pcm = b'\x01\x00' * 160
+        self.assertEqual(transcript_key(pcm, 'tiny'), transcript_key(bytes(pcm), 'tiny'))
+        self.assertNotEqual(transcript_key(pcm, 'tiny'), transcript_key(pcm, 'base'))
+        self.assertNotEqual(transcript_key(pcm, 'tiny'), transcript_key(pcm + b'\x00\x00', 'tiny'))
+
+    def test_hits_and_misses(self):
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', 'tiny', 'Check torque')
+        self.assertEqual(self.cache.get('a'), 'Check torque')
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put('a', 'tiny', 'x' * 40)
+        self.cache.put('b', 'tiny', 'y' * 40)
+        # Reading 'a' makes 'b' the least recently used
+        self.cache.get('a')
+        self.cache.put('c', 'tiny', 'z' * 40)
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertLessEqual(self.cache.stats()['bytes'], 100)
+
+    def test_engine_skips_model_on_hit(self):
+        # One second of steady noise: no silence to trim, so the whole clip is looked up
+        pcm = np.random.default_rng(0).integers(-3000, 3000, 16000, dtype=np.int16).tobytes()
+        wav_path = os.path.join(self.tmp_dir, 'clip.wav')
+        with wave.open(wav_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(pcm)
+
+        engine = TranscriptionEngine(cache=self.cache)
+        self.cache.put(transcript_key(pcm, engine.cache_id), engine.cache_id, 'Safety briefing')
+
+        self.assertEqual(engine.transcribe(wav_path), 'Safety briefing')
+        self.assertFalse(engine.is_loaded)
+        self.assertEqual(engine.stats()['cache']['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
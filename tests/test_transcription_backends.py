@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add src to the path so we can import the utils
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+sys.path.append(src_path)
+
+import numpy as np
+
+from utils import audio_processor
+from utils.audio_processor import TranscriptionEngine, get_transcription_engine
+from utils.transcription_backends import FasterWhisperBackend, check_backend, create_backend
+
+class EchoBackend:
+    """Stands in for a model: reports how much audio it was given."""
+    name = 'echo'
+    model_id = 'echo:1'
+
+    def __init__(self):
+        self.model_name = 'echo'
+        self.device = 'cpu'
+        self.is_loaded = False
+        self.loads = 0
+        self.calls = 0
+
+    def load(self):
+        time.sleep(0.05)
+        self.loads += 1
+        self.is_loaded = True
+
+    def transcribe(self, samples):
+        self.calls += 1
+        return {'text': f"{len(samples)} samples", 'segments': [{'start': 0.0, 'end': 0.5, 'text': 'hello'}]}
+
+class TestTranscriptionBackends(unittest.TestCase):
+    def test_backends_are_selected_by_name(self):
+        backend = create_backend('faster-whisper', 'small', 'cpu')
+        self.assertIsInstance(backend, FasterWhisperBackend)
+        self.assertEqual(backend.compute_type, 'int8')
+        self.assertFalse(backend.is_loaded)
+        with self.assertRaises(ValueError):
+            create_backend('nope', 'tiny', 'cpu')
+
+    def test_missing_backend_package_fails_fast(self):
+        with self.assertRaises(ValueError):
+            check_backend('nope')
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            with self.assertRaisesRegex(ImportError, r"aeroar\[faster-whisper\]"):
+                check_backend('faster-whisper')
+
+    def test_engine_runs_on_the_backend(self):
+        backend = EchoBackend()
+        engine = TranscriptionEngine(backend=backend)
+        self.assertEqual(engine.model_id, 'echo:1')
+
+        # One second of steady noise, nothing for the VAD to trim
+        pcm = np.random.default_rng(0).integers(-3000, 3000, 16000, dtype=np.int16)
+        result = engine.transcribe_pcm(pcm, offset=10.0)
+
+        self.assertTrue(backend.is_loaded)
+        self.assertEqual(result['text'], '16000 samples')
+        self.assertEqual(result['segments'][0]['start'], 10.0)
+        self.assertEqual(engine.stats()['backend'], 'echo')
+
+    def test_model_is_loaded_once_and_reused(self):
+        backend = EchoBackend()
+        engine = TranscriptionEngine(backend=backend)
+
+        # Startup preloading racing the first clips
+        threads = [threading.Thread(target=engine.warm_up) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pcm = np.random.default_rng(0).integers(-3000, 3000, 16000, dtype=np.int16)
+        engine.transcribe_pcm(pcm)
+        engine.transcribe_pcm(pcm)
+
+        self.assertEqual((backend.loads, backend.calls), (1, 2))
+        self.assertIsNotNone(engine.stats()['load_seconds'])
+
+    def test_engine_is_shared_by_the_process(self):
+        with mock.patch.object(audio_processor, '_engine', None):
+            self.assertIs(get_transcription_engine(), get_transcription_engine())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app_test_case import app_module
+
+class TestWorkerProcess(unittest.TestCase):
+    def test_exited_worker_is_restarted(self):
+        started = []
+
+        def start_worker_process():
+            # A worker that crashes right away, then one that keeps running
+            command = 'raise SystemExit(1)' if not started else 'import time; time.sleep(60)'
+            started.append(subprocess.Popen([sys.executable, '-c', command]))
+            return started[-1]
+
+        stopping = threading.Event()
+        with mock.patch.object(app_module, 'start_worker_process', start_worker_process), \
+                mock.patch.object(app_module, 'WORKER_CHECK_SECONDS', 0.05):
+            supervisor = threading.Thread(target=app_module.supervise_worker_process, args=(stopping,))
+            supervisor.start()
+            deadline = time.monotonic() + 10
+            while len(started) < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            stopping.set()
+            supervisor.join(10)
+
+        self.assertEqual(len(started), 2)
+        self.assertEqual(started[0].returncode, 1)
+        # Stopped along with the server
+        self.assertIsNotNone(started[1].returncode)
+
+    def test_dev_server_dispatches_jobs_in_the_reloader_child_only(self):
+        with mock.patch.dict(os.environ, {'FLASK_DEBUG': '1'}):
+            os.environ.pop('WERKZEUG_RUN_MAIN', None)
+            self.assertTrue(app_module.is_reloader_parent())
+            os.environ['WERKZEUG_RUN_MAIN'] = 'true'
+            self.assertFalse(app_module.is_reloader_parent())
+        with mock.patch.dict(os.environ, {'FLASK_DEBUG': '0'}):
+            self.assertFalse(app_module.is_reloader_parent())
+
+    def test_pool_workers_do_not_load_the_web_app(self):
+        root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        command = (
+            "import sys; import src.utils.audio_tasks; print('src.app' in sys.modules); "
+            "from src import app, run_server; print(type(app).__name__, run_server.__name__)"
+        )
+        output = subprocess.run([sys.executable, '-c', command], cwd=root_path, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.splitlines()[0], 'False')
+        # The package still exports the Flask app
+        self.assertEqual(output.splitlines()[-1], 'Flask run_server')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Conversion Memory Benchmark
+Compares peak RSS of the in-memory convert_to_wav path against the
+file-to-file convert_file_to_wav path on the same input.
+
+Usage:
+    python tools/bench_convert.py [input_audio] [--loop N]
+
+--loop N concatenates the input N times first (with ffmpeg) to simulate a
+long recording. Each mode runs in a fresh subprocess so peaks don't mix.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+DEFAULT_INPUT = os.path.join(ROOT, 'tests', 'audios', 'oil-filter.mp3')
+MODES = ['in-memory', 'streaming']
+
+
+def peak_rss_mb(who):
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return peak / 1024
+
+
+def run_mode(mode, input_path, output_path):
+    """Runs one conversion in this process and prints a JSON result line."""
+    from src.utils.audio_processor import convert_file_to_wav, convert_to_wav
+
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        # Same steps as the original process_module_background path
+        with open(input_path, 'rb') as f:
+            wav_data = convert_to_wav(f)
+        with open(output_path, 'wb') as f:
+            f.write(wav_data.read())
+    else:
+        convert_file_to_wav(input_path, output_path)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'mode': mode,
+        'seconds': elapsed,
+        'python_peak_mb': peak_rss_mb(resource.RUSAGE_SELF),
+        'ffmpeg_peak_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'output_mb': os.path.getsize(output_path) / (1024 * 1024),
+    }))
+
+
+def make_long_input(input_path, loops, workdir):
+    """Concatenates the input `loops` times into a new file."""
+    _, ext = os.path.splitext(input_path)
+    long_path = os.path.join(workdir, f"long{ext}")
+    subprocess.run(
+        ['ffmpeg', '-nostdin', '-loglevel', 'error', '-y',
+         '-stream_loop', str(loops - 1), '-i', input_path, '-c', 'copy', long_path],
+        check=True
+    )
+    return long_path
+
+
+def main():
+    """Main function to handle command-line usage."""
+    args = sys.argv[1:]
+
+    if args and args[0] == '--run':
+        run_mode(args[1], args[2], args[3])
+        return
+
+    loops = 1
+    if '--loop' in args:
+        index = args.index('--loop')
+        loops = int(args[index + 1])
+        del args[index:index + 2]
+
+    input_path = args[0] if args else DEFAULT_INPUT
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if loops > 1:
+            input_path = make_long_input(input_path, loops, workdir)
+
+        print(f"Input: {input_path} ({os.path.getsize(input_path) / (1024 * 1024):.1f} MB)")
+        print(f"{'mode':<12}{'seconds':>10}{'python MB':>12}{'ffmpeg MB':>12}{'wav MB':>10}")
+
+        for mode in MODES:
+            output_path = os.path.join(workdir, f"{mode}.wav")
+            completed = subprocess.run(
+                [sys.executable, __file__, '--run', mode, input_path, output_path],
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(f"{result['mode']:<12}{result['seconds']:>10.2f}{result['python_peak_mb']:>12.1f}"
+                  f"{result['ffmpeg_peak_mb']:>12.1f}{result['output_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
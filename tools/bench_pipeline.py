@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Clip Pipeline Timing Benchmark
+Times each stage of getting an upload to the model's input, for the previous
+path (ffmpeg to a WAV at the source rate, re-read and resampled to 16 kHz PCM)
+and the single-decode path (ffmpeg straight to 16 kHz mono PCM, WAV master
+written from the same buffer).
+
+Usage:
+    python tools/bench_pipeline.py [input_audio ...] [--repeat N] [--transcribe]
+
+--transcribe also runs the Whisper model on each path's samples (needs whisper).
+Defaults to the clips in tests/audios. Times are the best of N runs.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from src.utils.audio_processor import (  # noqa: E402
+    convert_file_to_wav,
+    decode_audio,
+    detect_speech,
+    get_transcription_engine,
+    join_segments,
+    pcm_to_samples,
+    read_pcm,
+    write_wav,
+)
+
+DEFAULT_INPUTS = sorted(glob.glob(os.path.join(ROOT, 'tests', 'audios', '*.mp3')))
+
+
+def previous_path(input_path, wav_path):
+    """Yields (stage, samples or None) as each stage of the previous pipeline finishes."""
+    convert_file_to_wav(input_path, wav_path)
+    yield 'decode+write wav', None
+    pcm = read_pcm(wav_path)
+    yield 're-read+resample', None
+    yield 'to float32', pcm_to_samples(pcm)
+
+
+def single_decode_path(input_path, wav_path):
+    """Yields (stage, samples or None) as each stage of the single-decode pipeline finishes."""
+    pcm = decode_audio(input_path)
+    yield 'decode', None
+    write_wav(wav_path, pcm)
+    yield 'write wav', None
+    yield 'to float32', pcm_to_samples(pcm)
+
+
+def time_path(path, input_path, workdir, transcribe):
+    """Runs one pipeline, returning {stage: seconds} (plus 'vad' and 'transcribe')."""
+    timings = {}
+    samples = None
+    start = time.perf_counter()
+    for stage, result in path(input_path, os.path.join(workdir, 'master.wav')):
+        now = time.perf_counter()
+        timings[stage] = now - start
+        start = now
+        if result is not None:
+            samples = result
+
+    segments = detect_speech(samples)
+    timings['vad'] = time.perf_counter() - start
+
+    if transcribe:
+        backend = get_transcription_engine().warm_up()
+        start = time.perf_counter()
+        backend.transcribe(join_segments(samples, segments))
+        timings['transcribe'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    """Main function to handle command-line usage."""
+    args = sys.argv[1:]
+    repeat = 5
+    if '--repeat' in args:
+        index = args.index('--repeat')
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+    transcribe = '--transcribe' in args
+    if transcribe:
+        args.remove('--transcribe')
+        repeat = 1
+
+    paths = [('previous', previous_path), ('single-decode', single_decode_path)]
+    with tempfile.TemporaryDirectory() as workdir:
+        for input_path in args or DEFAULT_INPUTS:
+            print(f"\n{os.path.basename(input_path)} ({os.path.getsize(input_path) / 1024:.0f} KB)")
+            for name, path in paths:
+                best = {}
+                for _ in range(repeat):
+                    for stage, seconds in time_path(path, input_path, workdir, transcribe).items():
+                        best[stage] = min(best.get(stage, seconds), seconds)
+                stages = "  ".join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in best.items())
+                print(f"  {name:<14} total {sum(best.values()) * 1000:8.1f}ms   {stages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+QR Rendering Benchmark
+Compares the per-code qrcode/PIL path against the batch NumPy renderer
+for a module-sized set of payloads.
+
+Usage:
+    python tools/bench_qr.py [count]
+"""
+
+import io
+import os
+import sys
+import time
+
+import qrcode
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils.qr_generator import render_qr_batch
+
+def legacy_render(payloads):
+    """The original path: one qrcode.QRCode and PIL image per code."""
+    images = []
+    for data in payloads:
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        images.append(buffer.getvalue())
+    return images
+
+
+def timed(label, render, payloads):
+    start = time.perf_counter()
+    images = render(payloads)
+    elapsed = time.perf_counter() - start
+    size_kb = sum(len(image) for image in images) / 1024
+    print(f"{label:<14}{elapsed:>10.3f}s{elapsed / len(payloads) * 1000:>10.2f}ms/code{size_kb:>10.0f} KB")
+    return elapsed
+
+
+def main():
+    """Main function to handle command-line usage."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    payloads = [f"Maintenance_Step_{i:04d}" for i in range(count)]
+
+    print(f"Rendering {count} QR codes")
+    legacy = timed("per-code PIL", legacy_render, payloads)
+    batch = timed("batch NumPy", render_qr_batch, payloads)
+    timed("batch SVG", lambda p: render_qr_batch(p, fmt='svg'), payloads)
+    print(f"Speedup (PNG): {legacy / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup Import Benchmark
+Measures the import time and peak memory of a fresh process for what each kind of
+process loads: a web process (main.py, which imports src.app) and a job pool worker
+(the audio stack). For comparison, each also runs with what it loaded before the
+audio stack was imported lazily: web processes loaded the audio stack, and pool
+workers loaded the whole web app through the src package.
+
+Usage:
+    python tools/bench_startup.py [--repeat N]
+
+Each measurement runs in a new interpreter; times are the best of N runs (default 5).
+Also lists which heavy packages each process ended up importing.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# name -> statements run in the fresh process
+SCENARIOS = [
+    ('web (main.py)', "import main"),
+    ('web, audio stack (before)', "import main; import src.utils.audio_processor"),
+    # Pool workers import the audio stack when their initializer runs
+    ('pool worker', "import src.utils.audio_tasks; import src.utils.audio_processor"),
+    ('pool worker, web app (before)', "import src.app; import src.utils.audio_processor"),
+]
+
+HEAVY_PACKAGES = ['flask', 'numpy', 'PIL', 'qrcode', 'speech_recognition', 'pydub', 'whisper', 'torch', 'faster_whisper']
+
+PROBE = """
+import sys, time, json, resource
+start = time.perf_counter()
+exec({statements!r})
+seconds = time.perf_counter() - start
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in KiB on Linux and in bytes on macOS
+if sys.platform == 'darwin':
+    max_rss //= 1024
+print(json.dumps({{'seconds': seconds, 'max_rss_kb': max_rss,
+                  'loaded': [name for name in {packages!r} if name in sys.modules]}}))
+"""
+
+
+def measure(statements, env=None):
+    """Runs statements in a new interpreter from the project root, returning its probe result."""
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE.format(statements=statements, packages=HEAVY_PACKAGES)],
+        cwd=ROOT, capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Main function to handle command-line usage."""
+    args = sys.argv[1:]
+    repeat = 5
+    if '--repeat' in args:
+        repeat = int(args[args.index('--repeat') + 1])
+
+    # Importing src.app creates the server's state (registry, job queue, audio store) in
+    # the modules folder: keep it out of src/modules
+    with tempfile.TemporaryDirectory(prefix='aeroar-bench-') as state_folder:
+        env = dict(os.environ, AEROAR_MODULES_FOLDER=state_folder,
+                   TRANSCRIPT_CACHE_PATH=os.path.join(state_folder, '.transcripts.sqlite3'))
+
+        print(f"{'process':<30}{'import ms':>10}{'max RSS MB':>12}   heavy packages loaded")
+        for name, statements in SCENARIOS:
+            try:
+                runs = [measure(statements, env) for _ in range(repeat)]
+            except RuntimeError as e:
+                print(f"{name:<30}  {e}")
+                continue
+            seconds = min(run['seconds'] for run in runs)
+            max_rss = min(run['max_rss_kb'] for run in runs) / 1024
+            print(f"{name:<30}{seconds * 1000:>10.1f}{max_rss:>12.1f}   {', '.join(runs[0]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
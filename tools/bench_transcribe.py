@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Transcription Backend Benchmark
+Reports, per backend and model, the load time, the real-time factor (seconds of
+compute per second of audio, lower is faster) and the word error rate against
+reference transcripts, so a larger model can be picked at the same latency.
+
+Usage:
+    python tools/bench_transcribe.py [backend:model ...] [--fixtures DIR] [--threads N]
+
+Defaults to whisper:tiny and faster-whisper (int8) tiny, base and small on the
+clips in tests/audios, whose references are in tests/audios/references.json
+(the demo module's transcripts with obvious recognition errors corrected).
+Each combination runs in a fresh subprocess so loaded models don't share memory.
+faster-whisper needs `pip install faster-whisper`.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+DEFAULT_FIXTURES = os.path.join(ROOT, 'tests', 'audios')
+DEFAULT_COMBINATIONS = ['whisper:tiny', 'faster-whisper:tiny', 'faster-whisper:base', 'faster-whisper:small']
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, so only recognition errors count."""
+    return re.sub(r"[^a-z0-9' ]+", ' ', text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """(substitutions + deletions + insertions) / reference words, by word-level edit distance."""
+    reference, hypothesis = normalize_words(reference), normalize_words(hypothesis)
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            ))
+        previous = current
+    return previous[-1] / max(1, len(reference))
+
+
+def run_combination(combination, fixtures):
+    """Transcribes every fixture with one backend:model in this process and prints a JSON result line."""
+    from src.utils.audio_processor import (
+        WHISPER_DEVICE,
+        WHISPER_SAMPLE_RATE,
+        TranscriptionEngine,
+        decode_audio,
+    )
+    from src.utils.transcription_backends import create_backend
+
+    backend_name, model_name = combination.split(':', 1)
+    with open(os.path.join(fixtures, 'references.json'), 'r') as f:
+        references = json.load(f)
+
+    # Production path (VAD included), without the transcript cache
+    engine = TranscriptionEngine(backend=create_backend(backend_name, model_name, WHISPER_DEVICE))
+    engine.warm_up()
+
+    audio_seconds = compute_seconds = 0.0
+    errors = []
+    for filename, reference in sorted(references.items()):
+        pcm = decode_audio(os.path.join(fixtures, filename))
+        start = time.perf_counter()
+        result = engine.transcribe_pcm(pcm)
+        compute_seconds += time.perf_counter() - start
+        audio_seconds += len(pcm) / WHISPER_SAMPLE_RATE
+        errors.append(word_error_rate(reference, result['text']))
+
+    print(json.dumps({
+        'combination': combination,
+        'load_seconds': engine.load_seconds,
+        'rtf': compute_seconds / audio_seconds,
+        'wer': sum(errors) / len(errors),
+    }))
+
+
+def main():
+    """Main function to handle command-line usage."""
+    args = sys.argv[1:]
+
+    if args and args[0] == '--run':
+        run_combination(args[1], args[2])
+        return
+
+    fixtures = DEFAULT_FIXTURES
+    if '--fixtures' in args:
+        index = args.index('--fixtures')
+        fixtures = args[index + 1]
+        del args[index:index + 2]
+    env = dict(os.environ)
+    if '--threads' in args:
+        index = args.index('--threads')
+        env['WHISPER_THREADS'] = args[index + 1]
+        del args[index:index + 2]
+
+    print(f"Fixtures: {fixtures}")
+    print(f"{'backend:model':<24}{'load s':>8}{'RTF':>8}{'WER':>8}")
+    for combination in args or DEFAULT_COMBINATIONS:
+        completed = subprocess.run(
+            [sys.executable, __file__, '--run', combination, fixtures],
+            capture_output=True, text=True, env=env
+        )
+        if completed.returncode != 0:
+            error = (completed.stderr.strip().splitlines() or ['failed'])[-1]
+            print(f"{combination:<24}  {error}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{result['combination']:<24}{result['load_seconds']:>8.2f}{result['rtf']:>8.3f}{result['wer']:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
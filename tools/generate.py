@@ -1,68 +1,123 @@
 #!/usr/bin/env python3
 """
 QR Code Generator
-Generates a QR code PNG image from any text input.
+Generates a QR code PNG image from any text input, or many at once in bulk mode.
 """
 
-import qrcode
-from PIL import Image
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared QR rendering engine from the app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils.qr_generator import render_qr_batch
+
+# Payloads per worker task in bulk mode
+BULK_CHUNK_SIZE = 50
 
 
 def generate_qr_code(text, filename="qr_code.png", box_size=10, border=4):
     """
     Generate a QR code from text and save it as a PNG image.
-    
+
     Args:
         text (str): The text content to encode in the QR code
         filename (str): Output filename for the PNG image (default: qr_code.png)
         box_size (int): Size of each box in pixels (default: 10)
         border (int): Border size in boxes (default: 4, minimum is 4)
-    
+
     Returns:
         str: Path to the generated QR code image
     """
-    # Create QR code instance
-    qr = qrcode.QRCode(
-        version=1,  # Controls the size (1 is smallest, None is auto)
-        error_correction=qrcode.constants.ERROR_CORRECT_L,  # Error correction level
-        box_size=box_size,
-        border=border,
-    )
-    
-    # Add data to the QR code
-    qr.add_data(text)
-    qr.make(fit=True)
-    
-    # Create an image from the QR code
-    img = qr.make_image(fill_color="black", back_color="white")
-    
+    fmt = 'svg' if filename.lower().endswith('.svg') else 'png'
+    image = render_qr_batch([text], box_size=box_size, border=border, fmt=fmt)[0]
+
     # Save the image
-    img.save(filename)
+    with open(filename, 'wb') as f:
+        f.write(image)
     print(f"QR code successfully generated: {filename}")
     print(f"Encoded text: {text[:50]}{'...' if len(text) > 50 else ''}")
-    
+
     return filename
 
 
+def output_filename(text, index, fmt):
+    """File name for a payload: the text itself when it is file-name safe, else its line number."""
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', text).strip('._')[:100]
+    return f"{safe or index}.{fmt}"
+
+
+def _write_chunk(items, output_dir, fmt, box_size, border):
+    """Bulk worker: renders a chunk of (filename, text) pairs and writes the images."""
+    images = render_qr_batch([text for _, text in items], box_size=box_size, border=border, fmt=fmt)
+    for (filename, _), image in zip(items, images, strict=True):
+        with open(os.path.join(output_dir, filename), 'wb') as f:
+            f.write(image)
+    return len(items)
+
+
+def generate_bulk(payload_file, output_dir="qr_codes", fmt="png", box_size=10, border=4, jobs=None):
+    """
+    Generate one QR code per non-empty line of payload_file into output_dir,
+    rendering chunks of payloads in parallel worker processes.
+
+    Returns:
+        int: Number of images written
+    """
+    with open(payload_file, 'r') as f:
+        payloads = [line.strip() for line in f if line.strip()]
+
+    os.makedirs(output_dir, exist_ok=True)
+    items = [(output_filename(text, i + 1, fmt), text) for i, text in enumerate(payloads)]
+    chunks = [items[i:i + BULK_CHUNK_SIZE] for i in range(0, len(items), BULK_CHUNK_SIZE)]
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_write_chunk, chunk, output_dir, fmt, box_size, border) for chunk in chunks]
+        for future in futures:
+            written += future.result()
+
+    print(f"{written} QR code(s) successfully generated in {output_dir}")
+    return written
+
+
 def main():
     """Main function to handle command-line usage."""
     if len(sys.argv) < 2:
-        print("Usage: python qr_generator.py <text> [output_filename]")
+        print("Usage: python generate.py <text> [output_filename]")
+        print("       python generate.py --bulk <payloads.txt> [output_dir] [--svg] [--jobs N]")
         print("\nExample:")
-        print('  python qr_generator.py "Hello, World!" my_qr.png')
-        print('  python qr_generator.py "Any text you want"')
+        print('  python generate.py "Hello, World!" my_qr.png')
+        print('  python generate.py "Any text you want"')
+        print('  python generate.py --bulk names.txt qr_codes --jobs 4')
         sys.exit(1)
-    
+
+    if sys.argv[1] == '--bulk':
+        args = sys.argv[2:]
+        fmt = 'svg' if '--svg' in args else 'png'
+        jobs = None
+        if '--jobs' in args:
+            jobs = int(args[args.index('--jobs') + 1])
+            del args[args.index('--jobs'):args.index('--jobs') + 2]
+        args = [arg for arg in args if arg != '--svg']
+
+        if not args:
+            print("Error: --bulk needs a payload file (one text per line)")
+            sys.exit(1)
+
+        generate_bulk(args[0], args[1] if len(args) > 1 else "qr_codes", fmt=fmt, jobs=jobs)
+        return
+
     # Get text from command line
     text = sys.argv[1]
-    
+
     # Get optional filename
     filename = sys.argv[2] if len(sys.argv) > 2 else "qr_code.png"
-    
+
     # Generate QR code
     generate_qr_code(text, filename)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()